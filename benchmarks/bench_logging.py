@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""قياس أداء سجل النشاط: log_activity وتدوير السجل (truncate_log_file) والاستعلام عن سجل كبير
+
+يُولد سجل اصطناعي بحجم --log-mb (مع فهرسه الجانبي) في مجلد منزل مؤقت.
+
+أمثلة:
+    python3 benchmarks/bench_logging.py
+    python3 benchmarks/bench_logging.py --events 500000 --log-mb 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from common import emit, load_toolkit, measure, peak_memory, rate, summarize
+from generators import history_log
+
+
+def run(events, log_mb, runs):
+    toolkit = load_toolkit()
+    report = {"benchmark": "logging", "python": sys.version.split()[0], "events": events, "log_mb": log_mb}
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        tool = toolkit.AhmadToolkit(headless=True)
+        # بدون حد للحجم حتى لا يتداخل التدوير التلقائي مع القياس
+        tool.logger.max_bytes = 0
+
+        def log_events():
+            for index in range(events):
+                tool.log_activity(f"حدث رقم {index}", event="scan_finished", target="10.0.0.0/24", scan_type="basic",
+                                  duration=1.5, result_file="/tmp/scan.xml", exit_code=0)
+            tool.logger.flush()
+            return events
+
+        _, timing = measure(log_events, runs)
+        report["log_activity"] = {"timing": timing, "events_per_s": rate(events, timing),
+                                  "peak_mb": peak_memory(log_events)}
+
+        # سجل كبير للاستعلام والتدوير
+        generated = history_log(tool.history_file, log_mb)
+        size = os.path.getsize(tool.history_file)
+        report["generated_events"] = generated
+        hour_ago = time.time() - 3600
+
+        queries = {
+            "query_all": lambda: sum(1 for _ in tool.logger.query()),
+            "query_last_hour": lambda: sum(1 for _ in tool.logger.query(since=hour_ago)),
+            "query_event": lambda: sum(1 for _ in tool.logger.query(events=["scan_failed"])),
+        }
+        for name, func in queries.items():
+            matched, timing = measure(func, runs)
+            report[name] = {"matched": matched, "timing": timing, "events_per_s": rate(matched, timing),
+                            "peak_mb": peak_memory(func)}
+        report["query_all"]["mb_per_s"] = round(size / (1024 * 1024) / (report["query_all"]["timing"]["median_ms"] / 1000), 2)
+
+        # التدوير يضغط الملف وينقله، فيُولد السجل من جديد قبل كل قياس
+        samples = []
+        for _ in range(runs):
+            history_log(tool.history_file, log_mb)
+            start = time.perf_counter()
+            tool.truncate_log_file()
+            samples.append((time.perf_counter() - start) * 1000)
+        timing = summarize(samples)
+        report["truncate_log_file"] = {"timing": timing,
+                                       "mb_per_s": round(size / (1024 * 1024) / (timing["median_ms"] / 1000), 2)}
+        tool.logger.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100000, help="عدد الأحداث في قياس log_activity")
+    parser.add_argument("--log-mb", type=float, default=200, help="حجم السجل الاصطناعي بالميجابايت")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+    emit(run(args.events, args.log_mb, args.runs), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""قياس سرعة تحليل تقارير nmap واستخدام الذاكرة على تقرير اصطناعي كبير
+
+يُقاس التحليل التدريجي (iter_nmap_hosts)، والحاوية المضغوطة (CompactDevices)، و parse_nmap_results
+كاملة (مع عرض الجدول المختصر إلى /dev/null).
+
+أمثلة:
+    python3 benchmarks/bench_nmap_parser.py
+    python3 benchmarks/bench_nmap_parser.py --hosts 50000 --runs 3
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+
+from common import emit, load_toolkit, measure, peak_memory, rate
+from generators import nmap_xml
+
+
+def run(hosts, ports_per_host, runs):
+    toolkit = load_toolkit()
+    report = {"benchmark": "nmap_parser", "python": sys.version.split()[0], "hosts": hosts,
+              "ports_per_host": ports_per_host, "phases": {}}
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        path = os.path.join(home, "report.xml")
+        size = nmap_xml(path, hosts, ports_per_host)
+        report["xml_mb"] = round(size / (1024 * 1024), 2)
+        tool = toolkit.AhmadToolkit(headless=True)
+
+        def parse_results():
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                return tool.parse_nmap_results(path)
+
+        phases = {
+            "iter_nmap_hosts": lambda: sum(1 for _ in toolkit.iter_nmap_hosts(path)),
+            "compact_devices": lambda: len(toolkit.CompactDevices.from_xml(path)),
+            "parse_nmap_results": lambda: len(parse_results()),
+        }
+        for name, func in phases.items():
+            parsed, timing = measure(func, runs)
+            report["phases"][name] = {
+                "parsed": parsed,
+                "timing": timing,
+                "hosts_per_s": rate(parsed, timing),
+                "mb_per_s": round(size / (1024 * 1024) / (timing["median_ms"] / 1000), 2) if timing["median_ms"] else None,
+                "peak_mb": peak_memory(func),
+            }
+        tool.logger.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=20000, help="عدد الأجهزة في التقرير الاصطناعي")
+    parser.add_argument("--ports", type=int, default=6, help="عدد المنافذ لكل جهاز")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+    emit(run(args.hosts, args.ports, args.runs), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
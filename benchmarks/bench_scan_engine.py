@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""قياس سرعة محرك المسح المدمج (AsyncScanEngine) على مجموعة أهداف محلية على واجهة loopback
+
+تُفتح منافذ استماع على عناوين 127.77.0.x (كل عناوين 127.0.0.0/8 تصل إلى واجهة lo على لينكس)
+ثم تُمسح مع منافذ مغلقة إضافية، ويُتحقق من أن جميع المنافذ المفتوحة اكتُشفت.
+مع --nmap يُقاس أيضاً nmap -sT على نفس الأهداف إذا كان مثبتاً.
+
+أمثلة:
+    python3 benchmarks/bench_scan_engine.py
+    python3 benchmarks/bench_scan_engine.py --hosts 64 --open-ports 4 --ports 64 --concurrency 512
+"""
+
+import argparse
+import os
+import selectors
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+
+from common import emit, load_toolkit, measure, rate
+
+BASE_PORT = 31000
+
+
+class TargetFarm:
+    """منافذ استماع على عدة عناوين loopback تقبل الاتصالات وتغلقها فوراً (في خيط منفصل)"""
+
+    def __init__(self, hosts, ports):
+        self.hosts = [f"127.77.{index >> 8 & 255}.{index & 255}" for index in range(1, hosts + 1)]
+        self.ports = list(ports)
+        self._selector = selectors.DefaultSelector()
+        self._sockets = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        for host in self.hosts:
+            for port in self.ports:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind((host, port))
+                sock.listen(128)
+                sock.setblocking(False)
+                self._selector.register(sock, selectors.EVENT_READ)
+                self._sockets.append(sock)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def _serve(self):
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                try:
+                    conn, _ = key.fileobj.accept()
+                    conn.close()
+                except OSError:
+                    continue
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        for sock in self._sockets:
+            self._selector.unregister(sock)
+            sock.close()
+        self._selector.close()
+
+
+def run(hosts, open_ports, ports, concurrency, runs, with_nmap):
+    toolkit = load_toolkit()
+    open_list = [BASE_PORT + index for index in range(open_ports)]
+    # المنافذ المغلقة بعد المفتوحة مباشرة (يرد عليها النظام بـ RST)
+    scan_ports = open_list + [BASE_PORT + open_ports + index for index in range(max(0, ports - open_ports))]
+    report = {"benchmark": "scan_engine", "python": sys.version.split()[0], "hosts": hosts, "open_ports": open_ports,
+              "ports": len(scan_ports), "concurrency": concurrency}
+    with TargetFarm(hosts, open_list) as farm:
+        target = " ".join(farm.hosts)
+        engine = toolkit.AsyncScanEngine(concurrency=concurrency, timeout=1.0, retries=0)
+        devices, timing = measure(lambda: engine.scan(target, scan_ports), runs)
+        found = sum(len(device['open_ports']) for device in devices)
+        probes = hosts * len(scan_ports)
+        report["native"] = {"timing": timing, "probes_per_s": rate(probes, timing), "hosts_found": len(devices),
+                            "open_found": found, "complete": found == hosts * open_ports}
+
+        if with_nmap and shutil.which("nmap"):
+            cmd = ["nmap", "-sT", "-n", "-Pn", "-T5", "-p", ",".join(map(str, scan_ports)), "-oX", os.devnull] + farm.hosts
+            _, timing = measure(lambda: subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), runs)
+            report["nmap"] = {"timing": timing, "probes_per_s": rate(probes, timing)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=32, help="عدد عناوين loopback في مجموعة الأهداف")
+    parser.add_argument("--open-ports", type=int, default=4, help="عدد المنافذ المفتوحة في كل عنوان")
+    parser.add_argument("--ports", type=int, default=32, help="عدد المنافذ الممسوحة لكل عنوان (المفتوحة والمغلقة)")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--nmap", action="store_true", help="قياس nmap -sT على نفس الأهداف أيضاً")
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+    report = run(args.hosts, args.open_ports, args.ports, args.concurrency, args.runs, args.nmap)
+    emit(report, args.output)
+    return 0 if report["native"]["complete"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""قياس زمن بدء تشغيل الأداة لاكتشاف أي تراجع في الأداء
+
+أمثلة:
+    python3 benchmarks/bench_startup.py --runs 20
+    python3 benchmarks/bench_startup.py --max-ms 250   # يفشل إذا تجاوز الوسيط الحد
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SCRIPT, emit, summarize
+
+# قياس داخل عملية جديدة: استيراد الوحدة ثم إنشاء AhmadToolkit ثم عرض الشعار
+IN_PROCESS = r"""
+import importlib.util, io, contextlib, json, sys, time
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("py_toolkit", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+t1 = time.perf_counter()
+tool = module.AhmadToolkit()
+t2 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    tool.print_banner()
+t3 = time.perf_counter()
+heavy = [name for name in ("requests", "tqdm", "tabulate", "netifaces", "asyncio") if name in sys.modules]
+try:
+    import resource
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    max_rss_mb = None
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "init_ms": (t2 - t1) * 1000,
+                  "banner_ms": (t3 - t2) * 1000, "heavy_modules_loaded": heavy, "max_rss_mb": max_rss_mb}))
+"""
+
+
+def run(runs, home):
+    env = dict(os.environ, HOME=home)
+    cli, phases = [], {"import_ms": [], "init_ms": [], "banner_ms": []}
+    heavy = set()
+    rss = []
+
+    # أمر كامل من سطر الأوامر بوضع الإخراج الآلي
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, "--json", "config", "get", "default_scan_type"],
+                       env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        cli.append((time.perf_counter() - start) * 1000)
+
+    # مراحل بدء التشغيل داخل العملية (الإخراج ليس طرفية فلا توجد رسوم متحركة)
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", IN_PROCESS, SCRIPT], env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, text=True)
+        sample = json.loads(result.stdout)
+        for key in phases:
+            phases[key].append(sample[key])
+        heavy.update(sample["heavy_modules_loaded"])
+        if sample["max_rss_mb"] is not None:
+            rss.append(sample["max_rss_mb"])
+
+    report = {"benchmark": "startup", "python": sys.version.split()[0], "cli": summarize(cli)}
+    report.update({key: summarize(values) for key, values in phases.items()})
+    report["heavy_modules_loaded"] = sorted(heavy)
+    report["peak_mb"] = round(max(rss), 2) if rss else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, help="الحد الأقصى المسموح لوسيط زمن أمر سطر الأوامر")
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+
+    # مجلد منزل مؤقت حتى لا تتأثر إعدادات المستخدم
+    with tempfile.TemporaryDirectory() as home:
+        report = run(args.runs, home)
+    emit(report, args.output)
+
+    if args.max_ms and report["cli"]["median_ms"] > args.max_ms:
+        print(f"[!] زمن بدء التشغيل {report['cli']['median_ms']}ms أكبر من الحد {args.max_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""قياس سرعة تحليل مخرجات iwlist و iw باستخدام المخرجات المسجلة في benchmarks/corpus
+
+كل ملف في المجموعة يُكرر حتى يصل عدد الخلايا إلى --cells (مع عناوين BSSID مختلفة) لمحاكاة
+البيئات المزدحمة، مع ملف اصطناعي بنفس العدد من generators.py، ثم يُقارن المحلل الحالي بالطريقة
+القديمة (re.split ثم سبع عمليات re.search لكل خلية) ويُقاس أقصى استخدام للذاكرة.
+
+المحللان يُشغلان بالتناوب ونسبة speedup من أقل زمن لكل منهما، لأن كل تشغيل يستغرق بضع
+مللي ثوانٍ فقط ويكفي توقف واحد من النظام لقلب النسبة عند قلة عدد التشغيلات.
+
+أمثلة:
+    python3 benchmarks/bench_wifi_parser.py
+    python3 benchmarks/bench_wifi_parser.py --cells 5000 --runs 20
+"""
+
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+from common import ROOT, emit, load_toolkit, measure, peak_memory, rate, summarize
+from generators import iwlist_text
+
+CORPUS = os.path.join(ROOT, "benchmarks", "corpus")
+
+
+def legacy_parse(scan_output):
+    """التحليل القديم في wireless_scan كما كان (للمقارنة فقط)"""
+    networks = []
+    cells = re.split(r'Cell \d+ -', scan_output)[1:]
+    for cell in cells:
+        ssid_match = re.search(r'ESSID:"([^"]*)"', cell)
+        bssid_match = re.search(r'Address: ([0-9A-F:]{17})', cell)
+        channel_match = re.search(r'Channel:(\d+)', cell)
+        frequency_match = re.search(r'Frequency:([\d.]+) GHz', cell)
+        quality_match = re.search(r'Quality=(\d+)/(\d+)', cell)
+        signal_match = re.search(r'Signal level=(-\d+) dBm', cell)
+        encryption_match = re.search(r'Encryption key:(on|off)', cell)
+        if ssid_match:
+            quality = "غير معروف"
+            if quality_match:
+                quality_val = int(quality_match.group(1))
+                quality_max = int(quality_match.group(2))
+                quality = f"{quality_val}/{quality_max} ({int(quality_val/quality_max*100)}%)"
+            networks.append({
+                'ssid': ssid_match.group(1),
+                'bssid': bssid_match.group(1) if bssid_match else "غير معروف",
+                'channel': channel_match.group(1) if channel_match else "غير معروف",
+                'frequency': frequency_match.group(1) if frequency_match else "غير معروف",
+                'quality': quality,
+                'signal': signal_match.group(1) if signal_match else "غير معروف",
+                'encryption': "مشفرة" if encryption_match and encryption_match.group(1) == "on" else "غير مشفرة"
+            })
+    return networks
+
+
+def amplify(text, cells):
+    """تكرار خلايا الملف حتى عدد الخلايا المطلوب مع تغيير عنوان BSSID لكل نسخة"""
+    header, marker = ("BSS ", "BSS ") if text.startswith("BSS ") else (text.split("\n", 1)[0] + "\n", "          Cell ")
+    blocks = [marker + block for block in text.split(marker)[1:]]
+    lines = [] if marker == "BSS " else [header]
+    for index in range(cells):
+        block = blocks[index % len(blocks)]
+        address = f"02:00:00:{index >> 16 & 255:02X}:{index >> 8 & 255:02X}:{index & 255:02X}"
+        block = re.sub(r"[0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5}", address, block, count=1)
+        if marker != "BSS ":
+            block = re.sub(r"Cell \d+", f"Cell {index + 1:02d}", block, count=1)
+        lines.append(block)
+    return "".join(lines)
+
+
+def measure_pair(current, legacy, runs):
+    """قياس المحلل الحالي والقديم بالتناوب حتى يتعرضا لنفس حالة الجهاز
+
+    تُرجع (نتيجة الحالي، ملخص أزمنته، نتيجة القديم، ملخص أزمنته).
+    """
+    results = [None, None]
+    samples = ([], [])
+    for _ in range(runs):
+        for index, func in enumerate((current, legacy)):
+            start = time.perf_counter()
+            results[index] = func()
+            samples[index].append((time.perf_counter() - start) * 1000)
+    return results[0], summarize(samples[0]), results[1], summarize(samples[1])
+
+
+def run(cells, runs):
+    toolkit = load_toolkit()
+    report = {"benchmark": "wifi_parser", "python": sys.version.split()[0], "cells": cells, "files": {}}
+    sources = []
+    for path in sorted(glob.glob(os.path.join(CORPUS, "*.txt"))):
+        with open(path) as f:
+            sources.append((os.path.basename(path), amplify(f.read(), cells)))
+    # خلايا اصطناعية إضافة إلى المخرجات المسجلة
+    sources.append(("synthetic_iwlist", iwlist_text(cells)))
+    for name, text in sources:
+        parser = toolkit.iter_iw_cells if name.startswith("iw_") else toolkit.iter_iwlist_cells
+        # القراءة من كائن ملف تحاكي أنبوب Popen في run_iwlist_scan
+        stream = lambda: list(parser(io.StringIO(text)))
+        if name.startswith("iw_"):
+            parsed, current = measure(stream, runs)
+        else:
+            parsed, current, legacy, baseline = measure_pair(stream, lambda: legacy_parse(text), runs)
+        entry = {"parsed": len(parsed), "stream": current, "cells_per_s": rate(len(parsed), current),
+                 "peak_mb": peak_memory(stream)}
+        if not name.startswith("iw_"):
+            entry["legacy"] = baseline
+            entry["legacy_parsed"] = len(legacy)
+            entry["speedup"] = round(baseline["min_ms"] / current["min_ms"], 2) if current["min_ms"] else None
+        report["files"][name] = entry
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, default=2000, help="عدد الخلايا في كل ملف بعد التكرار")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+    emit(run(args.cells, args.runs), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
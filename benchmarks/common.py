@@ -0,0 +1,70 @@
+"""أدوات مشتركة لاختبارات الأداء الخاصة بـ py-toolkit"""
+
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "py-toolkit.py")
+
+
+def load_toolkit():
+    """تحميل py-toolkit.py كوحدة بايثون (اسم الملف يحتوي على شرطة فلا يمكن استيراده مباشرة)"""
+    if "py_toolkit" in sys.modules:
+        return sys.modules["py_toolkit"]
+    spec = importlib.util.spec_from_file_location("py_toolkit", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["py_toolkit"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def summarize(samples):
+    """ملخص إحصائي لقائمة قياسات بالمللي ثانية"""
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0], 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "max_ms": round(samples[-1], 2),
+    }
+
+
+def measure(func, runs):
+    """تشغيل func عدة مرات وإرجاع (آخر نتيجة، ملخص الأزمنة)"""
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, summarize(samples)
+
+
+def peak_memory(func):
+    """أقصى ذاكرة بايثون مخصصة أثناء تشغيل func بالميجابايت (تشغيل منفصل لأن tracemalloc يبطئ التنفيذ)"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def rate(count, timing):
+    """عدد العناصر في الثانية حسب الوسيط"""
+    return int(count / (timing["median_ms"] / 1000)) if timing["median_ms"] else None
+
+
+def emit(report, output=None):
+    """طباعة تقرير الأداء بصيغة JSON أو حفظه في ملف"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
@@ -0,0 +1,107 @@
+"""مولدات بيانات اصطناعية لاختبارات الأداء: تقارير nmap وخلايا iwlist وسجلات النشاط
+
+جميع المولدات حتمية (seed ثابت) حتى تكون النتائج قابلة للمقارنة بين الإصدارات.
+"""
+
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+SERVICES = ("ssh", "http", "https", "domain", "smtp", "microsoft-ds", "netbios-ssn", "rdp", "mysql", "postgresql")
+PORTS = (21, 22, 25, 53, 80, 110, 139, 143, 443, 445, 993, 3306, 3389, 5432, 8080, 8443)
+EVENTS = ("scan_started", "scan_finished", "scan_failed", "wifi_started", "wifi_finished", "message", "batch_started")
+
+
+def nmap_xml(path, hosts, ports_per_host=6, open_ratio=0.5, seed=1):
+    """كتابة تقرير nmap بصيغة XML بعدد hosts جهاز (عناوين متتالية من 10.0.0.0/8) وإرجاع حجمه بالبايت"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<nmaprun scanner="nmap" args="nmap -sV -oX {path} 10.0.0.0/8" start="{int(time.time())}" version="7.94">\n')
+        for index in range(hosts):
+            ip = f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+            f.write('<host starttime="1700000000" endtime="1700000005"><status state="up" reason="arp-response"/>\n')
+            f.write(f'<address addr="{ip}" addrtype="ipv4"/>\n')
+            if index % 3:
+                f.write(f'<address addr="02:00:{index >> 24 & 255:02X}:{index >> 16 & 255:02X}:{index >> 8 & 255:02X}:{index & 255:02X}" '
+                        f'addrtype="mac" vendor="Synthetic"/>\n')
+            if index % 7 == 0:
+                f.write(f'<hostnames><hostname name="host{index}.lan" type="PTR"/></hostnames>\n')
+            else:
+                f.write('<hostnames/>\n')
+            f.write('<ports>')
+            for port in rng.sample(PORTS, ports_per_host):
+                state = "open" if rng.random() < open_ratio else "closed"
+                service = rng.choice(SERVICES)
+                f.write(f'<port protocol="tcp" portid="{port}"><state state="{state}" reason="syn-ack"/>'
+                        f'<service name="{service}" product="Synthetic {service}" version="1.{port % 10}" method="probed" conf="10"/></port>\n')
+            f.write('</ports>\n</host>\n')
+        f.write(f'<runstats><finished time="{int(time.time())}"/><hosts up="{hosts}" down="0" total="{hosts}"/></runstats>\n')
+        f.write('</nmaprun>\n')
+    return os.path.getsize(path)
+
+
+def iwlist_text(cells, seed=1):
+    """مخرجات iwlist <iface> scan بعدد cells خلية"""
+    rng = random.Random(seed)
+    lines = ["wlan0     Scan completed :\n"]
+    for index in range(cells):
+        channel = rng.choice((1, 6, 11, 36, 40, 44, 149))
+        frequency = 2.412 + (channel - 1) * 0.005 if channel < 14 else 5.18 + (channel - 36) * 0.005
+        quality = rng.randint(10, 70)
+        encrypted = rng.random() < 0.8
+        lines.append(
+            f"          Cell {index + 1:02d} - Address: 02:00:00:{index >> 16 & 255:02X}:{index >> 8 & 255:02X}:{index & 255:02X}\n"
+            f"                    Channel:{channel}\n"
+            f"                    Frequency:{frequency:.3f} GHz (Channel {channel})\n"
+            f"                    Quality={quality}/70  Signal level={quality - 110} dBm  \n"
+            f"                    Encryption key:{'on' if encrypted else 'off'}\n"
+            f"                    ESSID:\"net-{index}\"\n"
+            f"                    Bit Rates:1 Mb/s; 2 Mb/s; 5.5 Mb/s; 11 Mb/s; 6 Mb/s\n"
+            f"                              9 Mb/s; 12 Mb/s; 18 Mb/s\n"
+            f"                    Mode:Master\n"
+            f"                    Extra:tsf=0000000000000000\n"
+            f"                    Extra: Last beacon: 40ms ago\n"
+        )
+        if encrypted:
+            lines.append("                    IE: IEEE 802.11i/WPA2 Version 1\n"
+                         "                        Group Cipher : CCMP\n"
+                         "                        Pairwise Ciphers (1) : CCMP\n"
+                         "                        Authentication Suites (1) : PSK\n")
+    return "".join(lines)
+
+
+def history_log(path, size_mb, block_lines=256, seed=1, start=None):
+    """كتابة سجل نشاط JSONL بحجم size_mb تقريباً مع فهرسه الجانبي (<path>.idx) بنفس صيغة ActivityLogger
+
+    الأحداث بفاصل ثانية واحدة تنتهي عند الوقت الحالي. تُرجع عدد الأحداث المكتوبة.
+    """
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    # تقدير عدد الأحداث من متوسط طول السطر (حوالي 230 بايت)
+    total = max(1, target // 230)
+    ts = (start if start is not None else time.time()) - total
+    written = 0
+    count = 0
+    with open(path, "wb") as f, open(path + ".idx", "w") as index:
+        while written < target:
+            lines = []
+            events = set()
+            first = ts
+            for _ in range(block_lines):
+                event = rng.choice(EVENTS)
+                events.add(event)
+                record = {'ts': round(ts, 3), 'time': datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), 'event': event,
+                          'message': f"حدث اصطناعي رقم {count}", 'target': f"10.{count >> 8 & 255}.{count & 255}.0/24",
+                          'scan_type': "basic", 'duration': round(rng.random() * 60, 3), 'exit_code': 0}
+                lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+                ts += 1
+                count += 1
+            data = "".join(lines).encode("utf-8")
+            index.write(json.dumps({'first_ts': round(first, 3), 'last_ts': round(ts - 1, 3), 'events': sorted(events),
+                                    'length': len(data), 'offset': written}) + "\n")
+            f.write(data)
+            written += len(data)
+    return count
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""تشغيل جميع اختبارات الأداء وحفظ تقرير JSON واحد ومقارنته بتقرير سابق لاكتشاف التراجع
+
+كل اختبار يعمل في عملية منفصلة حتى لا يؤثر استخدام الذاكرة في أحدها على قياسات الآخر.
+
+أمثلة:
+    python3 benchmarks/run_all.py -o bench-2.1.json
+    python3 benchmarks/run_all.py --quick --baseline bench-2.0.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, emit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# الاختبارات وخياراتها: (الكامل، السريع)
+BENCHMARKS = {
+    "startup": ("bench_startup.py", ["--runs", "10"], ["--runs", "3"]),
+    "wifi_parser": ("bench_wifi_parser.py", ["--cells", "5000", "--runs", "5"], ["--cells", "1000", "--runs", "7"]),
+    "nmap_parser": ("bench_nmap_parser.py", ["--hosts", "50000", "--runs", "3"], ["--hosts", "5000", "--runs", "2"]),
+    "logging": ("bench_logging.py", ["--events", "200000", "--log-mb", "200", "--runs", "3"],
+                ["--events", "20000", "--log-mb", "20", "--runs", "2"]),
+    "scan_engine": ("bench_scan_engine.py", ["--hosts", "64", "--ports", "64", "--runs", "3"], ["--runs", "2"]),
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(report, prefix=""):
+    """المقاييس الرقمية القابلة للمقارنة: {المسار: القيمة}"""
+    metrics = {}
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key in ("median_ms", "peak_mb") or key.endswith("_per_s"):
+                metrics[path] = value
+    return metrics
+
+
+def compare(current, baseline, tolerance):
+    """المقاييس التي ساءت بأكثر من tolerance (نسبة): الأزمنة والذاكرة للأعلى والسرعة للأسفل"""
+    regressions = []
+    old = flatten(baseline.get("benchmarks", {}))
+    for path, value in flatten(current["benchmarks"]).items():
+        before = old.get(path)
+        if not before:
+            continue
+        change = (value - before) / before
+        worse = change < -tolerance if path.endswith("_per_s") else change > tolerance
+        if worse:
+            regressions.append({"metric": path, "baseline": before, "current": value, "change": round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="أحجام صغيرة للتحقق السريع")
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS), help="تشغيل اختبار محدد (يمكن تكراره)")
+    parser.add_argument("--baseline", help="تقرير سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="نسبة التراجع المسموحة قبل اعتباره تراجعاً")
+    parser.add_argument("-o", "--output", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args()
+
+    report = {"git": git_revision(), "python": sys.version.split()[0], "platform": platform.platform(),
+              "timestamp": int(time.time()), "quick": args.quick, "benchmarks": {}, "failed": []}
+    for name, (script, full, quick) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"[*] {name}...", file=sys.stderr)
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            result = subprocess.run([sys.executable, os.path.join(HERE, script)] + (quick if args.quick else full)
+                                    + ["-o", output.name], stdout=subprocess.DEVNULL, cwd=HERE)
+            try:
+                with open(output.name) as f:
+                    report["benchmarks"][name] = json.load(f)
+            except ValueError:
+                report["benchmarks"][name] = None
+        if result.returncode != 0:
+            report["failed"].append(name)
+
+    status = 1 if report["failed"] else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        for regression in report["regressions"]:
+            print(f"[!] تراجع في {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change']:+.0%})", file=sys.stderr)
+        if report["regressions"]:
+            status = 1
+    emit(report, args.output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
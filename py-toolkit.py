@@ -1,1015 +1,5768 @@
-#!/usr/bin/env python3
-# Ahmad Toolkit - أداة شبكات متعددة الوظائف محسنة
-# تطوير بواسطة: Ahmad & المطورين المساهمين
-
-import os
-import sys
-import subprocess
-import platform
-import ipaddress
-import socket
-import re
-import argparse
-import time
-import json
-import random
-import threading
-import requests
-from datetime import datetime
-try:
-    from colorama import Fore, Back, Style, init
-    from tabulate import tabulate
-    from tqdm import tqdm
-    import netifaces
-except ImportError:
-    print("[!] المكتبات المطلوبة غير متوفرة. جاري تثبيتها...")
-    subprocess.run([sys.executable, "-m", "pip", "install", "colorama", "tabulate", "tqdm", "netifaces", "requests"])
-    from colorama import Fore, Back, Style, init
-    from tabulate import tabulate
-    from tqdm import tqdm
-    import netifaces
-
-# تهيئة colorama للألوان
-init()
-
-# ألوان متعددة للشعار
-colors = [Fore.GREEN, Fore.CYAN, Fore.BLUE, Fore.MAGENTA, Fore.RED, Fore.YELLOW]
-
-class AhmadToolkit:
-    def __init__(self):
-        # تعريف شعار متحرك بألوان متعددة
-        self.banner = f"""
-{random.choice(colors)}
-     ▄▄▄      ██░ ██  ███▄ ▄███▓ ▄▄▄      ▓█████▄     
-    ▒████▄    ▓██░ ██▒▓██▒▀█▀ ██▒▒████▄    ▒██▀ ██▌    
-    ▒██  ▀█▄  ▒██▀▀██░▓██    ▓██░▒██  ▀█▄  ░██   █▌    
-    ░██▄▄▄▄██ ░▓█ ░██ ▒██    ▒██ ░██▄▄▄▄██ ░▓█▄   ▌    
-     ▓█   ▓██▒░▓█▒░██▓▒██▒   ░██▒ ▓█   ▓██▒░▒████▓     
-     ▒▒   ▓▒█░ ▒ ░░▒░▒░ ▒░   ░  ░ ▒▒   ▓▒█░ ▒▒▓  ▒     
-      ▒   ▒▒ ░ ▒ ░▒░ ░░  ░      ░  ▒   ▒▒ ░ ░ ▒  ▒     
-      ░   ▒    ░  ░░ ░░      ░     ░   ▒    ░ ░  ░     
-          ░  ░ ░  ░  ░       ░         ░  ░   ░        
-                                            ░          
-{random.choice(colors)}    _______ ____   ____  _     _  _____ _______ 
-{random.choice(colors)}   |__   __/ __ \\ / __ \\| |   | |/ ____|__   __|
-{random.choice(colors)}      | | | |  | | |  | | |   | | |  __   | |   
-{random.choice(colors)}      | | | |  | | |  | | |   | | | |_ |  | |   
-{random.choice(colors)}      | | | |__| | |__| | |___| | |__| |  | |   
-{random.choice(colors)}      |_|  \\____/ \\____/ \\_____/ \\_____|  |_|   
-                                                        
-{Fore.YELLOW}[+] تم التطوير بواسطة Ahmad | v2.0.0
-{Fore.CYAN}[+] https://github.com/ahmad/toolkit
-{Style.RESET_ALL}
-        """
-        self.os_type = platform.system()
-        self.is_root = os.geteuid() == 0 if self.os_type == "Linux" else False
-        self.tools_path = os.path.join(os.path.expanduser("~"), ".ahmad_toolkit")
-        self.config_file = os.path.join(self.tools_path, "config.json")
-        self.logs_dir = os.path.join(self.tools_path, "logs")
-        self.history_file = os.path.join(self.logs_dir, "history.log")
-        self.scan_results = os.path.join(self.logs_dir, "scan_results")
-        
-        # إنشاء المجلدات اللازمة إذا لم تكن موجودة
-        self.setup_directories()
-        
-        # تحميل الإعدادات
-        self.load_config()
-        
-    def setup_directories(self):
-        """إنشاء المجلدات اللازمة للأداة"""
-        try:
-            if not os.path.exists(self.tools_path):
-                os.makedirs(self.tools_path)
-            if not os.path.exists(self.logs_dir):
-                os.makedirs(self.logs_dir)
-            if not os.path.exists(self.scan_results):
-                os.makedirs(self.scan_results)
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ في إنشاء المجلدات: {str(e)}{Style.RESET_ALL}")
-            
-    def load_config(self):
-        """تحميل إعدادات الأداة"""
-        default_config = {
-            "auto_check_updates": True,
-            "default_scan_type": "quick",
-            "enable_logging": True,
-            "terminal_theme": "dark",
-            "max_log_size": 10,  # بالميجابايت
-            "preferred_browser": "firefox",
-            "show_animations": True,
-            "last_update_check": None
-        }
-        
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
-            else:
-                self.config = default_config
-                with open(self.config_file, 'w') as f:
-                    json.dump(self.config, f, indent=4)
-        except Exception as e:
-            print(f"{Fore.YELLOW}[!] تعذر تحميل الإعدادات: {str(e)}. استخدام الإعدادات الافتراضية.{Style.RESET_ALL}")
-            self.config = default_config
-            
-    def save_config(self):
-        """حفظ إعدادات الأداة"""
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-            print(f"{Fore.GREEN}[+] تم حفظ الإعدادات بنجاح{Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ في حفظ الإعدادات: {str(e)}{Style.RESET_ALL}")
-            
-    def log_activity(self, activity):
-        """تسجيل النشاط في ملف السجل"""
-        if not self.config.get("enable_logging", True):
-            return
-            
-        try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            log_entry = f"[{timestamp}] {activity}\n"
-            
-            with open(self.history_file, 'a') as f:
-                f.write(log_entry)
-                
-            # التحقق من حجم ملف السجل والتقليص إذا لزم الأمر
-            if os.path.getsize(self.history_file) > (self.config.get("max_log_size", 10) * 1024 * 1024):
-                self.truncate_log_file()
-        except Exception as e:
-            print(f"{Fore.YELLOW}[!] خطأ في تسجيل النشاط: {str(e)}{Style.RESET_ALL}")
-                
-    def truncate_log_file(self):
-        """تقليص حجم ملف السجل عند تجاوزه الحد المسموح"""
-        try:
-            with open(self.history_file, 'r') as f:
-                lines = f.readlines()
-                
-            # الاحتفاظ بآخر 1000 سطر فقط
-            with open(self.history_file, 'w') as f:
-                f.writelines(lines[-1000:])
-        except Exception as e:
-            print(f"{Fore.YELLOW}[!] خطأ في تقليص ملف السجل: {str(e)}{Style.RESET_ALL}")
-            
-    def animate_text(self, text):
-        """عرض نص متحرك"""
-        if not self.config.get("show_animations", True):
-            print(text)
-            return
-            
-        for char in text:
-            print(char, end='', flush=True)
-            time.sleep(0.01)
-        print()
-        
-    def print_banner(self):
-        """عرض شعار الأداة مع تأثير متحرك"""
-        if self.config.get("show_animations", True):
-            for line in self.banner.split('\n'):
-                print(line)
-                time.sleep(0.05)
-        else:
-            print(self.banner)
-            
-        # التحقق من وجود تحديثات إذا كان مفعلاً
-        if self.config.get("auto_check_updates", True):
-            self.check_for_updates()
-        
-    def check_for_updates(self):
-        """التحقق من وجود تحديثات للأداة"""
-        # وقت آخر تحقق من التحديثات
-        last_check = self.config.get("last_update_check")
-        
-        # التحقق من التحديثات مرة واحدة يومياً فقط
-        if last_check and (datetime.now() - datetime.fromisoformat(last_check)).days < 1:
-            return
-            
-        try:
-            print(f"{Fore.CYAN}[*] جاري التحقق من وجود تحديثات...{Style.RESET_ALL}")
-            
-            # هذا محاكاة فقط للتحقق من وجود تحديثات - في التطبيق الحقيقي سيتم الاتصال بخادم التحديثات
-            time.sleep(1)
-            
-            # تحديث وقت آخر فحص
-            self.config["last_update_check"] = datetime.now().isoformat()
-            self.save_config()
-            
-            # تحقق وهمي من وجود تحديثات
-            if random.choice([True, False]):
-                print(f"{Fore.GREEN}[+] الإصدار الحالي هو الأحدث.{Style.RESET_ALL}")
-            else:
-                print(f"{Fore.YELLOW}[!] هناك تحديث جديد متاح! يمكنك تحديث الأداة باستخدام الأمر: git pull{Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.YELLOW}[!] خطأ في التحقق من التحديثات: {str(e)}{Style.RESET_ALL}")
-            
-    def check_root(self):
-        """التحقق من صلاحيات الجذر"""
-        if self.os_type == "Linux" and not self.is_root:
-            print(f"{Fore.RED}[!] يجب تشغيل الأداة بصلاحيات الجذر (root) للحصول على جميع الميزات{Style.RESET_ALL}")
-            print(f"{Fore.YELLOW}[*] جرب تشغيل الأمر: sudo {' '.join(sys.argv)}{Style.RESET_ALL}")
-            
-            # السؤال عما إذا كان يرغب المستخدم في المتابعة بدون صلاحيات الجذر
-            continue_anyway = input(f"{Fore.YELLOW}هل ترغب في المتابعة بدون صلاحيات الجذر؟ (بعض الميزات لن تعمل) [y/N]: {Style.RESET_ALL}")
-            if continue_anyway.lower() != 'y':
-                sys.exit(1)
-                
-    def check_dependencies(self):
-        """التحقق من وجود البرامج والمكتبات المطلوبة"""
-        print(f"{Fore.CYAN}[*] جاري التحقق من المتطلبات...{Style.RESET_ALL}")
-        
-        dependencies = {
-            "programs": ["nmap", "bettercap", "wireshark", "metasploit", "sqlmap"],
-            "pip_packages": ["colorama", "tabulate", "tqdm", "netifaces", "requests"]
-        }
-        
-        # التحقق من وجود البرامج
-        missing_programs = []
-        for program in dependencies["programs"]:
-            try:
-                with open(os.devnull, 'w') as devnull:
-                    subprocess.run(["which", program], check=True, stdout=devnull, stderr=devnull)
-            except subprocess.CalledProcessError:
-                missing_programs.append(program)
-                
-        # التحقق من وجود حزم بايثون
-        missing_packages = []
-        for package in dependencies["pip_packages"]:
-            try:
-                __import__(package.lower())
-            except ImportError:
-                missing_packages.append(package)
-                
-        if missing_programs:
-            print(f"{Fore.YELLOW}[!] البرامج التالية غير مثبتة: {', '.join(missing_programs)}{Style.RESET_ALL}")
-        else:
-            print(f"{Fore.GREEN}[+] جميع البرامج المطلوبة متوفرة{Style.RESET_ALL}")
-            
-        if missing_packages:
-            print(f"{Fore.YELLOW}[!] حزم بايثون التالية غير مثبتة: {', '.join(missing_packages)}{Style.RESET_ALL}")
-            try:
-                install_packages = input(f"{Fore.YELLOW}هل ترغب في تثبيت حزم بايثون المفقودة؟ [Y/n]: {Style.RESET_ALL}")
-                if install_packages.lower() != 'n':
-                    for package in missing_packages:
-                        print(f"{Fore.CYAN}[*] جاري تثبيت {package}...{Style.RESET_ALL}")
-                        subprocess.run([sys.executable, "-m", "pip", "install", package])
-                    # تحديث قائمة الحزم المفقودة بعد التثبيت
-                    missing_packages = []
-            except Exception as e:
-                print(f"{Fore.RED}[!] خطأ في تثبيت الحزم: {str(e)}{Style.RESET_ALL}")
-        else:
-            print(f"{Fore.GREEN}[+] جميع حزم بايثون المطلوبة متوفرة{Style.RESET_ALL}")
-            
-        return {"programs": missing_programs, "packages": missing_packages}
-    
-    def install_tools(self, tool_name=None):
-        """تثبيت الأدوات المطلوبة"""
-        self.check_root()
-        
-        tools = {
-            "bettercap": self.install_bettercap,
-            "nmap": self.install_nmap,
-            "wireshark": self.install_wireshark,
-            "metasploit": self.install_metasploit,
-            "sqlmap": self.install_sqlmap,
-            "all": None  # ستستخدم لتثبيت جميع الأدوات
-        }
-        
-        if tool_name:
-            # تثبيت أداة محددة
-            if tool_name == "all":
-                for name, func in tools.items():
-                    if name != "all" and func:
-                        func()
-            elif tool_name in tools and tools[tool_name]:
-                tools[tool_name]()
-            else:
-                print(f"{Fore.RED}[!] الأداة '{tool_name}' غير معتمدة أو غير موجودة{Style.RESET_ALL}")
-        else:
-            # عرض قائمة بالأدوات المتاحة للتثبيت
-            print(f"{Fore.CYAN}[*] الأدوات المتاحة للتثبيت:{Style.RESET_ALL}")
-            for i, name in enumerate(tools.keys()):
-                if name != "all":
-                    print(f"  {i+1}. {name}")
-            print(f"  {len(tools)}. all (جميع الأدوات)")
-            
-            try:
-                choice = input(f"{Fore.YELLOW}اختر رقم الأداة للتثبيت (0 للإلغاء): {Style.RESET_ALL}")
-                if choice == "0":
-                    return
-                    
-                choice = int(choice)
-                if 1 <= choice <= len(tools):
-                    tool_names = list(tools.keys())
-                    selected_tool = tool_names[choice-1]
-                    
-                    if selected_tool == "all":
-                        for name, func in tools.items():
-                            if name != "all" and func:
-                                func()
-                    elif tools[selected_tool]:
-                        tools[selected_tool]()
-                else:
-                    print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
-            except ValueError:
-                print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
-    
-    def install_bettercap(self):
-        """تثبيت Bettercap حسب نوع نظام التشغيل"""
-        print(f"{Fore.CYAN}[*] جاري تثبيت Bettercap...{Style.RESET_ALL}")
-        self.log_activity("محاولة تثبيت Bettercap")
-        
-        try:
-            if "kali" in platform.platform().lower():
-                # تثبيت على كالي لينكس
-                cmds = [
-                    ["apt-get", "update", "-y"],
-                    ["apt-get", "install", "bettercap", "-y"]
-                ]
-            elif "ubuntu" in platform.platform().lower() or "debian" in platform.platform().lower():
-                # تثبيت على أوبونتو/ديبيان
-                cmds = [
-                    ["apt-get", "update", "-y"],
-                    ["apt-get", "install", "build-essential", "libpcap-dev", "libusb-1.0-0-dev", "libnetfilter-queue-dev", "-y"],
-                    ["apt-get", "install", "bettercap", "-y"]
-                ]
-            elif "arch" in platform.platform().lower():
-                # تثبيت على آرتش لينكس
-                cmds = [
-                    ["pacman", "-Sy"],
-                    ["pacman", "-S", "bettercap", "--noconfirm"]
-                ]
-            elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower() or "rhel" in platform.platform().lower():
-                # تثبيت على فيدورا/سنتوس
-                cmds = [
-                    ["dnf", "install", "-y", "libpcap-devel", "libusb-devel", "make", "gcc", "git"],
-                    ["git", "clone", "https://github.com/bettercap/bettercap", "/tmp/bettercap"],
-                    ["cd", "/tmp/bettercap", "&&", "make", "build", "&&", "make", "install"]
-                ]
-            else:
-                # تثبيت على توزيعات لينكس الأخرى أو أنظمة أخرى
-                print(f"{Fore.YELLOW}[*] جاري محاولة التثبيت من المصدر...{Style.RESET_ALL}")
-                cmds = [
-                    ["git", "clone", "https://github.com/bettercap/bettercap", "/tmp/bettercap"],
-                    ["cd", "/tmp/bettercap", "&&", "make", "build", "&&", "make", "install"]
-                ]
-            
-            for cmd in cmds:
-                process = subprocess.Popen(" ".join(cmd), shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {' '.join(cmd)}{Style.RESET_ALL}")
-                    print(f"{Fore.RED}الخطأ: {stderr.decode()}{Style.RESET_ALL}")
-                    break
-            
-            # التحقق من نجاح التثبيت
-            try:
-                subprocess.run(["which", "bettercap"], check=True, stdout=subprocess.DEVNULL)
-                print(f"{Fore.GREEN}[+] تم تثبيت Bettercap بنجاح{Style.RESET_ALL}")
-                self.log_activity("تم تثبيت Bettercap بنجاح")
-                return True
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت Bettercap يدوياً من https://github.com/bettercap/bettercap{Style.RESET_ALL}")
-                self.log_activity("فشل تثبيت Bettercap")
-                return False
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء تثبيت Bettercap: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في تثبيت Bettercap: {str(e)}")
-            return False
-            
-    def install_nmap(self):
-        """تثبيت Nmap"""
-        print(f"{Fore.CYAN}[*] جاري تثبيت Nmap...{Style.RESET_ALL}")
-        self.log_activity("محاولة تثبيت Nmap")
-        
-        try:
-            if self.os_type == "Linux":
-                if "ubuntu" in platform.platform().lower() or "debian" in platform.platform().lower() or "kali" in platform.platform().lower():
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "nmap", "-y"]
-                    ]
-                elif "arch" in platform.platform().lower():
-                    cmds = [
-                        ["pacman", "-Sy"],
-                        ["pacman", "-S", "nmap", "--noconfirm"]
-                    ]
-                elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower() or "rhel" in platform.platform().lower():
-                    cmds = [
-                        ["dnf", "install", "-y", "nmap"]
-                    ]
-                else:
-                    print(f"{Fore.YELLOW}[*] نظام التشغيل غير معروف. جاري محاولة استخدام apt...{Style.RESET_ALL}")
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "nmap", "-y"]
-                    ]
-            elif self.os_type == "Darwin":  # macOS
-                cmds = [
-                    ["brew", "install", "nmap"]
-                ]
-            else:
-                print(f"{Fore.RED}[!] نظام التشغيل غير مدعوم. يرجى تثبيت Nmap يدوياً.{Style.RESET_ALL}")
-                return False
-                
-            for cmd in cmds:
-                process = subprocess.Popen(" ".join(cmd), shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {' '.join(cmd)}{Style.RESET_ALL}")
-                    print(f"{Fore.RED}الخطأ: {stderr.decode()}{Style.RESET_ALL}")
-                    break
-            
-            # التحقق من نجاح التثبيت
-            try:
-                subprocess.run(["which", "nmap"], check=True, stdout=subprocess.DEVNULL)
-                print(f"{Fore.GREEN}[+] تم تثبيت Nmap بنجاح{Style.RESET_ALL}")
-                self.log_activity("تم تثبيت Nmap بنجاح")
-                return True
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت Nmap يدوياً من https://nmap.org/download.html{Style.RESET_ALL}")
-                self.log_activity("فشل تثبيت Nmap")
-                return False
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء تثبيت Nmap: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في تثبيت Nmap: {str(e)}")
-            return False
-            
-    def install_wireshark(self):
-        """تثبيت Wireshark"""
-        print(f"{Fore.CYAN}[*] جاري تثبيت Wireshark...{Style.RESET_ALL}")
-        self.log_activity("محاولة تثبيت Wireshark")
-        
-        try:
-            if self.os_type == "Linux":
-                if "ubuntu" in platform.platform().lower() or "debian" in platform.platform().lower() or "kali" in platform.platform().lower():
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "wireshark", "-y"]
-                    ]
-                elif "arch" in platform.platform().lower():
-                    cmds = [
-                        ["pacman", "-Sy"],
-                        ["pacman", "-S", "wireshark-qt", "--noconfirm"]
-                    ]
-                elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower() or "rhel" in platform.platform().lower():
-                    cmds = [
-                        ["dnf", "install", "-y", "wireshark"]
-                    ]
-                else:
-                    print(f"{Fore.YELLOW}[*] نظام التشغيل غير معروف. جاري محاولة استخدام apt...{Style.RESET_ALL}")
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "wireshark", "-y"]
-                    ]
-            elif self.os_type == "Darwin":  # macOS
-                cmds = [
-                    ["brew", "install", "wireshark"]
-                ]
-            else:
-                print(f"{Fore.RED}[!] نظام التشغيل غير مدعوم. يرجى تثبيت Wireshark يدوياً.{Style.RESET_ALL}")
-                return False
-                
-            for cmd in cmds:
-                process = subprocess.Popen(" ".join(cmd), shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {' '.join(cmd)}{Style.RESET_ALL}")
-                    print(f"{Fore.RED}الخطأ: {stderr.decode()}{Style.RESET_ALL}")
-                    break
-            
-            # التحقق من نجاح التثبيت
-            try:
-                subprocess.run(["which", "wireshark"], check=True, stdout=subprocess.DEVNULL)
-                print(f"{Fore.GREEN}[+] تم تثبيت Wireshark بنجاح{Style.RESET_ALL}")
-                self.log_activity("تم تثبيت Wireshark بنجاح")
-                return True
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت Wireshark يدوياً من https://www.wireshark.org/download.html{Style.RESET_ALL}")
-                self.log_activity("فشل تثبيت Wireshark")
-                return False
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء تثبيت Wireshark: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في تثبيت Wireshark: {str(e)}")
-            return False
-            
-    def install_metasploit(self):
-        """تثبيت Metasploit Framework"""
-        print(f"{Fore.CYAN}[*] جاري تثبيت Metasploit Framework...{Style.RESET_ALL}")
-        self.log_activity("محاولة تثبيت Metasploit Framework")
-        
-        try:
-            if self.os_type == "Linux":
-                if "kali" in platform.platform().lower():
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "metasploit-framework", "-y"]
-                    ]
-                elif "ubuntu" in platform.platform().lower() or "debian" in platform.platform().lower():
-                    # تثبيت على أوبونتو/ديبيان
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "curl", "gnupg2", "-y"],
-                        ["curl", "https://raw.githubusercontent.com/rapid7/metasploit-omnibus/master/config/templates/metasploit-framework-wrappers/msfupdate.erb", ">", "msfinstall"],
-                        ["chmod", "+x", "msfinstall"],
-                        ["./msfinstall"]
-                    ]
-                elif "arch" in platform.platform().lower():
-                    # تثبيت على آرتش لينكس
-                    cmds = [
-                        ["pacman", "-Sy"],
-                        ["pacman", "-S", "metasploit", "--noconfirm"]
-                    ]
-                elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower() or "rhel" in platform.platform().lower():
-                    # تثبيت على فيدورا/سنتوس
-                    cmds = [
-                        ["dnf", "install", "-y", "curl"],
-                        ["curl", "https://raw.githubusercontent.com/rapid7/metasploit-omnibus/master/config/templates/metasploit-framework-wrappers/msfupdate.erb", ">", "msfinstall"],
-                        ["chmod", "+x", "msfinstall"],
-                        ["./msfinstall"]
-                    ]
-                else:
-                    print(f"{Fore.YELLOW}[*] نظام التشغيل غير معروف. جاري استخدام النص البرمجي الرسمي للتثبيت...{Style.RESET_ALL}")
-                    cmds = [
-                        ["curl", "https://raw.githubusercontent.com/rapid7/metasploit-omnibus/master/config/templates/metasploit-framework-wrappers/msfupdate.erb", ">", "msfinstall"],
-                        ["chmod", "+x", "msfinstall"],
-                        ["./msfinstall"]
-                    ]
-            else:
-                print(f"{Fore.RED}[!] نظام التشغيل غير مدعوم. يرجى تثبيت Metasploit يدوياً من https://github.com/rapid7/metasploit-framework/wiki/Nightly-Installers{Style.RESET_ALL}")
-                return False
-                
-            for cmd in cmds:
-                process = subprocess.Popen(" ".join(cmd), shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {' '.join(cmd)}{Style.RESET_ALL}")
-                    print(f"{Fore.RED}الخطأ: {stderr.decode()}{Style.RESET_ALL}")
-                    break
-            
-            # التحقق من نجاح التثبيت
-            try:
-                subprocess.run(["which", "msfconsole"], check=True, stdout=subprocess.DEVNULL)
-                print(f"{Fore.GREEN}[+] تم تثبيت Metasploit Framework بنجاح{Style.RESET_ALL}")
-                self.log_activity("تم تثبيت Metasploit Framework بنجاح")
-                return True
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت Metasploit Framework يدوياً من https://github.com/rapid7/metasploit-framework/wiki/Nightly-Installers{Style.RESET_ALL}")
-                self.log_activity("فشل تثبيت Metasploit Framework")
-                return False
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء تثبيت Metasploit Framework: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في تثبيت Metasploit Framework: {str(e)}")
-            return False
-            
-    def install_sqlmap(self):
-        """تثبيت SQLMap"""
-        print(f"{Fore.CYAN}[*] جاري تثبيت SQLMap...{Style.RESET_ALL}")
-        self.log_activity("محاولة تثبيت SQLMap")
-        
-        try:
-            if self.os_type == "Linux":
-                if "ubuntu" in platform.platform().lower() or "debian" in platform.platform().lower() or "kali" in platform.platform().lower():
-                    cmds = [
-                        ["apt-get", "update", "-y"],
-                        ["apt-get", "install", "sqlmap", "-y"]
-                    ]
-                elif "arch" in platform.platform().lower():
-                    cmds = [
-                        ["pacman", "-Sy"],
-                        ["pacman", "-S", "sqlmap", "--noconfirm"]
-                    ]
-                elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower() or "rhel" in platform.platform().lower():
-                    cmds = [
-                        ["dnf", "install", "-y", "sqlmap"]
-                    ]
-                else:
-                    print(f"{Fore.YELLOW}[*] نظام التشغيل غير معروف. جاري تثبيت SQLMap من المصدر...{Style.RESET_ALL}")
-                    cmds = [
-                        ["git", "clone", "--depth", "1", "https://github.com/sqlmapproject/sqlmap.git", "/opt/sqlmap"],
-                        ["ln", "-sf", "/opt/sqlmap/sqlmap.py", "/usr/local/bin/sqlmap"]
-                    ]
-            elif self.os_type == "Darwin":  # macOS
-                cmds = [
-                    ["brew", "install", "sqlmap"]
-                ]
-            else:
-                print(f"{Fore.RED}[!] نظام التشغيل غير مدعوم. يرجى تثبيت SQLMap يدوياً من https://github.com/sqlmapproject/sqlmap{Style.RESET_ALL}")
-                return False
-                
-            for cmd in cmds:
-                process = subprocess.Popen(" ".join(cmd), shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {' '.join(cmd)}{Style.RESET_ALL}")
-                    print(f"{Fore.RED}الخطأ: {stderr.decode()}{Style.RESET_ALL}")
-                    break
-            
-            # التحقق من نجاح التثبيت
-            try:
-                subprocess.run(["which", "sqlmap"], check=True, stdout=subprocess.DEVNULL)
-                print(f"{Fore.GREEN}[+] تم تثبيت SQLMap بنجاح{Style.RESET_ALL}")
-                self.log_activity("تم تثبيت SQLMap بنجاح")
-                return True
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت SQLMap يدوياً من https://github.com/sqlmapproject/sqlmap{Style.RESET_ALL}")
-                self.log_activity("فشل تثبيت SQLMap")
-                return False
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء تثبيت SQLMap: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في تثبيت SQLMap: {str(e)}")
-            return False
-    
-    def get_network_interfaces(self):
-        """الحصول على قائمة واجهات الشبكة المتاحة"""
-        interfaces = []
-        try:
-            # الحصول على جميع واجهات الشبكة باستخدام netifaces
-            ifaces = netifaces.interfaces()
-            
-            for iface in ifaces:
-                # تجاهل واجهات loopback
-                if iface == "lo" or "loop" in iface.lower():
-                    continue
-                    
-                # الحصول على معلومات الواجهة
-                addrs = netifaces.ifaddresses(iface)
-                mac = addrs.get(netifaces.AF_LINK, [{'addr': 'غير معروف'}])[0]['addr']
-                ip = addrs.get(netifaces.AF_INET, [{'addr': 'غير معروف'}])[0]['addr'] if netifaces.AF_INET in addrs else 'غير معروف'
-                
-                # إضافة معلومات الواجهة إلى القائمة
-                interfaces.append({
-                    'name': iface,
-                    'mac': mac,
-                    'ip': ip
-                })
-                
-            return interfaces
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ في الحصول على واجهات الشبكة: {str(e)}{Style.RESET_ALL}")
-            return []
-            
-    def network_scan(self, target=None, scan_type="quick"):
-        """إجراء مسح للشبكة باستخدام nmap"""
-        print(f"{Fore.CYAN}[*] جاري بدء المسح الشبكي...{Style.RESET_ALL}")
-        self.log_activity(f"بدء مسح الشبكة نوع: {scan_type}, هدف: {target}")
-        
-        if not target:
-            # الحصول على عنوان IP للشبكة المحلية
-            interfaces = self.get_network_interfaces()
-            if not interfaces:
-                print(f"{Fore.RED}[!] لم يتم العثور على واجهات شبكة نشطة{Style.RESET_ALL}")
-                return
-                
-            # عرض الواجهات المتاحة للمستخدم للاختيار
-            print(f"{Fore.CYAN}[*] واجهات الشبكة المتاحة:{Style.RESET_ALL}")
-            for i, iface in enumerate(interfaces):
-                print(f"  {i+1}. {iface['name']} - IP: {iface['ip']}, MAC: {iface['mac']}")
-                
-            try:
-                choice = int(input(f"{Fore.YELLOW}اختر واجهة للمسح (0 للإلغاء): {Style.RESET_ALL}"))
-                if choice == 0:
-                    return
-                    
-                if 1 <= choice <= len(interfaces):
-                    selected_iface = interfaces[choice-1]
-                    ip_parts = selected_iface['ip'].split('.')
-                    if len(ip_parts) == 4 and selected_iface['ip'] != 'غير معروف':
-                        target = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.0/24"
-                    else:
-                        print(f"{Fore.RED}[!] عنوان IP غير صالح للواجهة المحددة{Style.RESET_ALL}")
-                        target = input(f"{Fore.YELLOW}أدخل هدف المسح (مثال: 192.168.1.0/24): {Style.RESET_ALL}")
-                else:
-                    print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
-                    return
-            except ValueError:
-                print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
-                return
-                
-        # التحقق من وجود أداة nmap
-        try:
-            subprocess.run(["which", "nmap"], check=True, stdout=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            print(f"{Fore.RED}[!] أداة nmap غير مثبتة. جاري محاولة التثبيت...{Style.RESET_ALL}")
-            if not self.install_nmap():
-                return
-                
-        # تحديد نوع المسح
-        scan_options = {
-            "quick": "-sn",  # مسح سريع لاكتشاف الأجهزة فقط
-            "basic": "-sV -O --osscan-limit",  # مسح أساسي لاكتشاف الخدمات ونظام التشغيل
-            "full": "-sS -sV -O -A",  # مسح كامل مع اكتشاف متقدم
-            "vuln": "-sV --script=vuln"  # مسح للثغرات الأمنية
-        }
-        
-        if scan_type not in scan_options:
-            scan_type = "quick"
-            
-        scan_opt = scan_options[scan_type]
-        
-        # إنشاء اسم ملف التقرير
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(self.scan_results, f"scan_{timestamp}.xml")
-        
-        # بناء أمر المسح
-        command = f"nmap {scan_opt} -oX {output_file} {target}"
-        
-        print(f"{Fore.CYAN}[*] جاري تنفيذ المسح: {command}{Style.RESET_ALL}")
-        
-        try:
-            # تشغيل المسح
-            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-            
-            # عرض تقدم المسح
-            if self.config.get("show_animations", True):
-                with tqdm(total=100, desc="تقدم المسح", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}") as pbar:
-                    while process.poll() is None:
-                        # تحديث شريط التقدم ببطء أثناء المسح
-                        progress = min(pbar.n + 1, 95)  # الحد الأقصى هو 95% حتى ينتهي المسح فعلياً
-                        pbar.update(progress - pbar.n)
-                        time.sleep(0.5)
-                    pbar.update(100 - pbar.n)  # إكمال شريط التقدم
-            else:
-                stdout, stderr = process.communicate()
-                if stdout:
-                    print(stdout)
-                if stderr:
-                    print(f"{Fore.RED}[!] أخطاء أثناء المسح: {stderr}{Style.RESET_ALL}")
-                    
-            # التحقق من نتيجة المسح
-            if process.returncode == 0:
-                print(f"{Fore.GREEN}[+] اكتمل المسح بنجاح. تم حفظ النتائج في: {output_file}{Style.RESET_ALL}")
-                self.log_activity(f"اكتمل المسح بنجاح. ملف التقرير: {output_file}")
-                
-                # عرض نتائج المسح
-                self.parse_nmap_results(output_file)
-                
-                return output_file
-            else:
-                print(f"{Fore.RED}[!] فشل المسح. تحقق من الاتصال والصلاحيات.{Style.RESET_ALL}")
-                self.log_activity("فشل مسح الشبكة")
-                return None
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء المسح: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في مسح الشبكة: {str(e)}")
-            return None
-            
-    def parse_nmap_results(self, xml_file):
-        """تحليل نتائج مسح nmap وعرضها بتنسيق مناسب"""
-        try:
-            if not os.path.exists(xml_file):
-                print(f"{Fore.RED}[!] ملف نتائج المسح غير موجود: {xml_file}{Style.RESET_ALL}")
-                return
-                
-            # قراءة ملف XML
-            with open(xml_file, 'r') as f:
-                xml_content = f.read()
-                
-            # البحث عن الأجهزة النشطة
-            hosts = re.findall(r'<host.*?</host>', xml_content, re.DOTALL)
-            
-            if not hosts:
-                print(f"{Fore.YELLOW}[*] لم يتم العثور على أجهزة نشطة في نطاق المسح{Style.RESET_ALL}")
-                return
-                
-            # جمع معلومات الأجهزة
-            devices = []
-            for host in hosts:
-                # الحصول على عنوان IP
-                ip_match = re.search(r'<address addr="([^"]+)" addrtype="ipv4"', host)
-                if not ip_match:
-                    continue
-                    
-                ip = ip_match.group(1)
-                
-                # الحصول على عنوان MAC إذا كان متاحاً
-                mac_match = re.search(r'<address addr="([^"]+)" addrtype="mac"', host)
-                mac = mac_match.group(1) if mac_match else "غير معروف"
-                
-                # الحصول على اسم الجهاز إذا كان متاحاً
-                hostname_match = re.search(r'<hostname name="([^"]+)"', host)
-                hostname = hostname_match.group(1) if hostname_match else "غير معروف"
-                
-                # الحصول على حالة الجهاز (مفتوح أم لا)
-                status_match = re.search(r'<status state="([^"]+)"', host)
-                status = status_match.group(1) if status_match else "غير معروف"
-                
-                # الحصول على المنافذ المفتوحة
-                ports_match = re.findall(r'<port protocol="([^"]+)" portid="([^"]+)">.*?<state state="([^"]+)".*?<service name="([^"]+)".*?</port>', host, re.DOTALL)
-                
-                open_ports = []
-                for port in ports_match:
-                    if port[2] == "open":
-                        open_ports.append({
-                            'protocol': port[0],
-                            'port': port[1],
-                            'service': port[3]
-                        })
-                
-                # إضافة معلومات الجهاز إلى القائمة
-                devices.append({
-                    'ip': ip,
-                    'mac': mac,
-                    'hostname': hostname,
-                    'status': status,
-                    'open_ports': open_ports
-                })
-                
-            # عرض الأجهزة المكتشفة
-            print(f"{Fore.GREEN}[+] تم اكتشاف {len(devices)} جهاز نشط:{Style.RESET_ALL}")
-            
-            table_data = []
-            for device in devices:
-                ports_str = ", ".join([f"{p['port']}/{p['protocol']} ({p['service']})" for p in device['open_ports']])
-                table_data.append([
-                    device['ip'],
-                    device['mac'],
-                    device['hostname'],
-                    ports_str if device['open_ports'] else "لا توجد منافذ مفتوحة"
-                ])
-                
-            # عرض النتائج في جدول
-            headers = ["عنوان IP", "عنوان MAC", "اسم الجهاز", "المنافذ المفتوحة"]
-            print(tabulate(table_data, headers=headers, tablefmt="grid"))
-            
-            return devices
-            
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ في تحليل نتائج المسح: {str(e)}{Style.RESET_ALL}")
-            return None
-    
-    def wireless_scan(self):
-        """مسح للشبكات اللاسلكية المتاحة"""
-        print(f"{Fore.CYAN}[*] جاري البحث عن الشبكات اللاسلكية المتاحة...{Style.RESET_ALL}")
-        self.log_activity("بدء مسح الشبكات اللاسلكية")
-        
-        # التحقق من نوع نظام التشغيل
-        if self.os_type != "Linux":
-            print(f"{Fore.RED}[!] هذه الميزة متاحة فقط على أنظمة لينكس{Style.RESET_ALL}")
-            return None
-            
-        # التحقق من وجود الأدوات المطلوبة
-        try:
-            subprocess.run(["which", "iwlist"], check=True, stdout=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            print(f"{Fore.RED}[!] الأداة iwlist غير مثبتة. جاري التثبيت...{Style.RESET_ALL}")
-            try:
-                if "debian" in platform.platform().lower() or "ubuntu" in platform.platform().lower() or "kali" in platform.platform().lower():
-                    subprocess.run(["apt-get", "install", "-y", "wireless-tools"], check=True)
-                elif "arch" in platform.platform().lower():
-                    subprocess.run(["pacman", "-S", "--noconfirm", "wireless_tools"], check=True)
-                elif "fedora" in platform.platform().lower() or "centos" in platform.platform().lower():
-                    subprocess.run(["dnf", "install", "-y", "wireless-tools"], check=True)
-                else:
-                    print(f"{Fore.RED}[!] لا يمكن تثبيت الأدوات المطلوبة تلقائياً. يرجى تثبيت حزمة wireless-tools يدوياً.{Style.RESET_ALL}")
-                    return None
-            except subprocess.CalledProcessError:
-                print(f"{Fore.RED}[!] فشل تثبيت الأدوات المطلوبة{Style.RESET_ALL}")
-                return None
-                
-        # الحصول على واجهات الشبكة اللاسلكية
-        wireless_interfaces = []
-        ifaces = self.get_network_interfaces()
-        
-        for iface in ifaces:
-            # التحقق مما إذا كانت واجهة لاسلكية
-            try:
-                result = subprocess.run(["iwconfig", iface['name']], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if "no wireless extensions" not in result.stdout.decode() and "no wireless extensions" not in result.stderr.decode():
-                    wireless_interfaces.append(iface['name'])
-            except Exception:
-                continue
-                
-        if not wireless_interfaces:
-            print(f"{Fore.RED}[!] لم يتم العثور على واجهات شبكة لاسلكية{Style.RESET_ALL}")
-            return None
-            
-        # عرض الواجهات اللاسلكية المتاحة
-        print(f"{Fore.CYAN}[*] واجهات الشبكة اللاسلكية المتاحة:{Style.RESET_ALL}")
-        for i, iface in enumerate(wireless_interfaces):
-            print(f"  {i+1}. {iface}")
-            
-        # اختيار الواجهة للمسح
-        try:
-            choice = int(input(f"{Fore.YELLOW}اختر واجهة للمسح (0 للإلغاء): {Style.RESET_ALL}"))
-            if choice == 0:
-                return None
-                
-            if 1 <= choice <= len(wireless_interfaces):
-                selected_iface = wireless_interfaces[choice-1]
-            else:
-                print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
-                return None
-        except ValueError:
-            print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
-            return None
-            
-        # تنفيذ المسح اللاسلكي
-        try:
-            # تفعيل وضع المسح للواجهة
-            if self.is_root:
-                subprocess.run(["ifconfig", selected_iface, "up"], check=True)
-                
-            # إجراء المسح
-            print(f"{Fore.CYAN}[*] جاري مسح الشبكات اللاسلكية باستخدام {selected_iface}...{Style.RESET_ALL}")
-            scan_result = subprocess.run(["iwlist", selected_iface, "scan"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            if scan_result.returncode != 0:
-                print(f"{Fore.RED}[!] فشل المسح: {scan_result.stderr}{Style.RESET_ALL}")
-                return None
-                
-            # تحليل نتائج المسح
-            scan_output = scan_result.stdout
-            
-            # استخراج المعلومات من النتائج
-            networks = []
-            cells = re.split(r'Cell \d+ -', scan_output)[1:]  # تقسيم النتائج إلى خلايا شبكات
-            
-            for cell in cells:
-                # استخراج معلومات الشبكة
-                ssid_match = re.search(r'ESSID:"([^"]*)"', cell)
-                bssid_match = re.search(r'Address: ([0-9A-F:]{17})', cell)
-                channel_match = re.search(r'Channel:(\d+)', cell)
-                frequency_match = re.search(r'Frequency:([\d.]+) GHz', cell)
-                quality_match = re.search(r'Quality=(\d+)/(\d+)', cell)
-                signal_match = re.search(r'Signal level=(-\d+) dBm', cell)
-                encryption_match = re.search(r'Encryption key:(on|off)', cell)
-                
-                if ssid_match:
-                    ssid = ssid_match.group(1)
-                    bssid = bssid_match.group(1) if bssid_match else "غير معروف"
-                    channel = channel_match.group(1) if channel_match else "غير معروف"
-                    frequency = frequency_match.group(1) if frequency_match else "غير معروف"
-                    
-                    quality = "غير معروف"
-                    if quality_match:
-                        quality_val = int(quality_match.group(1))
-                        quality_max = int(quality_match.group(2))
-                        quality = f"{quality_val}/{quality_max} ({int(quality_val/quality_max*100)}%)"
-                        
-                    signal = signal_match.group(1) if signal_match else "غير معروف"
-                    encryption = "مشفرة" if encryption_match and encryption_match.group(1) == "on" else "غير مشفرة"
-                    
-                    networks.append({
-                        'ssid': ssid,
-                        'bssid': bssid,
-                        'channel': channel,
-                        'frequency': frequency,
-                        'quality': quality,
-                        'signal': signal,
-                        'encryption': encryption
-                    })
-                    
-            # عرض النتائج
-            if networks:
-                print(f"{Fore.GREEN}[+] تم العثور على {len(networks)} شبكة لاسلكية:{Style.RESET_ALL}")
-                
-                table_data = []
-                for network in networks:
-                    table_data.append([
-                        network['ssid'],
-                        network['bssid'],
-                        network['channel'],
-                        network['signal'] + " dBm",
-                        network['quality'],
-                        network['encryption']
-                    ])
-                    
-                headers = ["اسم الشبكة", "عنوان BSSID", "القناة", "قوة الإشارة", "الجودة", "التشفير"]
-                print(tabulate(table_data, headers=headers, tablefmt="grid"))
-                
-                # حفظ النتائج في ملف
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = os.path.join(self.scan_results, f"wifi_scan_{timestamp}.json")
-                
-                with open(output_file, 'w') as f:
-                    json.dump(networks, f, indent=4)
-                    
-                print(f"{Fore.GREEN}[+] تم حفظ نتائج المسح في: {output_file}{Style.RESET_ALL}")
-                self.log_activity(f"اكتمل مسح الشبكات اللاسلكية. ملف النتائج: {output_file}")
-                
-                return networks
-            else:
-                print(f"{Fore.YELLOW}[*] لم يتم العثور على شبكات لاسلكية{Style.RESET_ALL}")
-                return []
-                
-        except Exception as e:
-            print(f"{Fore.RED}[!] خطأ أثناء المسح اللاسلكي: {str(e)}{Style.RESET_ALL}")
-            self.log_activity(f"خطأ في مسح الشبكات اللاسلكية: {str(e)}")
-            return None
-
-if __name__ == "__main__":
-    tool = AhmadToolkit()
-    tool.print_banner()
-    tool.check_root()
-    tool.check_dependencies()
\ No newline at end of file
+#!/usr/bin/env python3
+# Ahmad Toolkit - أداة شبكات متعددة الوظائف محسنة
+# تطوير بواسطة: Ahmad & المطورين المساهمين
+
+import os
+import sys
+import subprocess
+import platform
+import ipaddress
+import socket
+import struct
+import zlib
+import array
+import re
+import argparse
+import time
+import json
+import contextlib
+import importlib
+import random
+import threading
+import contextvars
+import queue
+import shutil
+import tempfile
+import gzip
+import hashlib
+import atexit
+import bisect
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from datetime import datetime
+try:
+    from colorama import Fore, Back, Style, init
+except ImportError:
+    print("[!] المكتبات المطلوبة غير متوفرة. جاري تثبيتها...")
+    subprocess.run([sys.executable, "-m", "pip", "install", "colorama", "tabulate", "tqdm", "netifaces", "requests"])
+    from colorama import Fore, Back, Style, init
+try:
+    import fcntl
+except ImportError:
+    # غير متوفر على ويندوز
+    fcntl = None
+
+
+class _LazyModule:
+    """وكيل يؤجل استيراد المكتبة حتى أول استخدام لها لتسريع بدء تشغيل الأداة"""
+
+    def __init__(self, name, pip_package=None):
+        self._name = name
+        # اسم حزمة pip لتثبيتها تلقائياً إذا كانت غير متوفرة (None للمكتبات القياسية)
+        self._pip_package = pip_package
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                if not self._pip_package:
+                    raise
+                print(f"[!] المكتبة {self._name} غير متوفرة. جاري تثبيتها...")
+                subprocess.run([sys.executable, "-m", "pip", "install", self._pip_package])
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+# المكتبات الثقيلة تُحمل عند أول استخدام فقط
+asyncio = _LazyModule("asyncio")
+sqlite3 = _LazyModule("sqlite3")
+requests = _LazyModule("requests", "requests")
+netifaces = _LazyModule("netifaces", "netifaces")
+_tabulate = _LazyModule("tabulate", "tabulate")
+_tqdm = _LazyModule("tqdm", "tqdm")
+http_server = _LazyModule("http.server")
+urllib_parse = _LazyModule("urllib.parse")
+secrets = _LazyModule("secrets")
+
+
+def tabulate(*args, **kwargs):
+    """عرض جدول باستخدام مكتبة tabulate (تُحمل عند أول استخدام)"""
+    return _tabulate.tabulate(*args, **kwargs)
+
+
+def tqdm(*args, **kwargs):
+    """إنشاء شريط تقدم باستخدام مكتبة tqdm (تُحمل عند أول استخدام)"""
+    return _tqdm.tqdm(*args, **kwargs)
+
+
+# تهيئة colorama للألوان
+init()
+
+# ألوان متعددة للشعار
+colors = [Fore.GREEN, Fore.CYAN, Fore.BLUE, Fore.MAGENTA, Fore.RED, Fore.YELLOW]
+
+
+class ToolkitError(Exception):
+    """الخطأ الأساسي لواجهة المكتبة (سطر الأوامر يطبع رسالته بدلاً من أن تطبعها المكتبة)"""
+
+
+class TargetError(ToolkitError, ValueError):
+    """هدف مسح أو واجهة غير صالحة أو غير موجودة"""
+
+
+class ProfileError(ToolkitError, ValueError):
+    """ملف مسح غير موجود أو غير صالح، أو محرك مسح غير معروف"""
+
+
+# محركات المسح المتاحة (auto يختار nmap إن وجد)
+SCAN_ENGINES = ("auto", "nmap", "native")
+
+
+class UnsupportedPlatformError(ToolkitError):
+    """ميزة غير متاحة على نظام التشغيل الحالي"""
+
+
+class ToolNotFoundError(ToolkitError):
+    """أداة خارجية مطلوبة غير مثبتة (الاسم في tool)"""
+
+    def __init__(self, tool, message=None):
+        super().__init__(message or f"الأداة {tool} غير مثبتة")
+        self.tool = tool
+
+
+class ScanError(ToolkitError):
+    """فشل تنفيذ المسح (رمز الخروج ومخرجات الأخطاء إن وجدت)"""
+
+    def __init__(self, message, returncode=None, stderr=None):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class _NullTimer:
+    """مؤقت فارغ يُستخدم عند تعطيل القياس"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """مؤقت لكتلة with يسجل زمنها في مدرج زمني عند الخروج"""
+
+    __slots__ = ("_metrics", "_key", "_start")
+
+    def __init__(self, metrics, key):
+        self._metrics = metrics
+        self._key = key
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics._observe_key(self._key, time.perf_counter() - self._start)
+        return False
+
+
+class Metrics:
+    """عدادات ومدرجات زمنية (histograms) للمسارات الساخنة مع تصديرها بصيغة Prometheus النصية
+
+    معطلة افتراضياً: كل استدعاء يفحص enabled ويعود مباشرة، والمؤقت المعطل كائن فارغ مشترك.
+    الأزمنة بالثواني، والمفتاح هو اسم المقياس مع التسميات (labels).
+    """
+
+    # حدود فئات المدرجات بالثواني (من أجزاء الملي ثانية للتحليل إلى الدقائق لعمليات nmap والتثبيت)
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+    HELP = {
+        "toolkit_operation_seconds": "Wall time of a whole operation (network_scan, wireless_scan, install)",
+        "toolkit_phase_seconds": "Wall time of one phase of an operation (spawn, nmap, parse, render, store...)",
+        "toolkit_operations_total": "Finished operations by status",
+        "toolkit_processes_total": "External processes run by program and status",
+        "toolkit_hosts_parsed_total": "Hosts parsed from scan reports",
+        "toolkit_ports_parsed_total": "Port records parsed from scan reports",
+        "toolkit_networks_parsed_total": "Wireless networks parsed from scan output",
+        "toolkit_bytes_parsed_total": "Bytes (characters for text output) read by the parsers",
+        "toolkit_install_steps_total": "Installer steps by status",
+        "toolkit_daemon_jobs_total": "Daemon jobs by kind and final status",
+    }
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        # المفتاح -> [عدد كل فئة، المجموع، العدد، الأقصى]
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """زيادة عداد"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """تسجيل زمن في مدرج زمني"""
+        if not self.enabled:
+            return
+        self._observe_key(self._key(name, labels), seconds)
+
+    def _observe_key(self, key, seconds):
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0, 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            histogram[3] = max(histogram[3], seconds)
+
+    def timer(self, name, **labels):
+        """مؤقت لكتلة with"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, self._key(name, labels))
+
+    def phase(self, operation, phase):
+        """مؤقت لمرحلة من عملية (toolkit_phase_seconds)"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, ("toolkit_phase_seconds", (("operation", operation), ("phase", phase))))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def summary(self):
+        """ملخص القيم الحالية: العدادات والأزمنة (العدد والمجموع والأقصى) كقوائم قواميس"""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            timings = [{'name': name, 'labels': dict(labels), 'count': count, 'sum': round(total, 6), 'max': round(peak, 6)}
+                       for (name, labels), (_, total, count, peak) in sorted(self._histograms.items())]
+        return {'counters': counters, 'timings': timings}
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def prometheus(self):
+        """المقاييس بصيغة Prometheus النصية (text exposition format 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(buckets), total, count)) for key, (buckets, total, count, _) in self._histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(self.BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """كتابة المقاييس إلى ملف بشكل ذري (مناسب لـ textfile collector في node_exporter)"""
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics_")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.prometheus())
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+
+
+# سجل المقاييس المشترك (يُفعل من الإعدادات أو --metrics أو في وضع الخدمة)
+metrics = Metrics()
+
+
+def _nmap_scripts(elem):
+    """استخراج مخرجات سكربتات NSE من عنصر XML"""
+    return [{'id': s.get('id'), 'output': s.get('output', '')} for s in elem.iter('script')]
+
+
+def _nmap_host_record(host):
+    """تحويل عنصر <host> إلى سجل منظم"""
+    status = host.find('status')
+    record = {
+        'status': status.get('state') if status is not None else None,
+        'reason': status.get('reason') if status is not None else None,
+        'starttime': int(host.get('starttime', 0) or 0),
+        'endtime': int(host.get('endtime', 0) or 0),
+        'addresses': [],
+        'ipv4': None,
+        'ipv6': None,
+        'mac': None,
+        'vendor': None,
+        'hostnames': [],
+        'ports': [],
+        'os_matches': [],
+        'scripts': [],
+    }
+
+    # العناوين (IPv4 و IPv6 و MAC)
+    for addr in host.findall('address'):
+        addrtype = addr.get('addrtype')
+        record['addresses'].append({'addr': addr.get('addr'), 'addrtype': addrtype, 'vendor': addr.get('vendor')})
+        if addrtype in ('ipv4', 'ipv6', 'mac') and record[addrtype] is None:
+            record[addrtype] = addr.get('addr')
+            if addrtype == 'mac':
+                record['vendor'] = addr.get('vendor')
+
+    # أسماء الأجهزة
+    for hostname in host.iterfind('hostnames/hostname'):
+        record['hostnames'].append({'name': hostname.get('name'), 'type': hostname.get('type')})
+
+    # المنافذ والخدمات
+    for port in host.iterfind('ports/port'):
+        state = port.find('state')
+        service = port.find('service')
+        record['ports'].append({
+            'protocol': port.get('protocol'),
+            'port': int(port.get('portid')),
+            'state': state.get('state') if state is not None else None,
+            'reason': state.get('reason') if state is not None else None,
+            'service': service.get('name') if service is not None else None,
+            'product': service.get('product') if service is not None else None,
+            'version': service.get('version') if service is not None else None,
+            'extrainfo': service.get('extrainfo') if service is not None else None,
+            'tunnel': service.get('tunnel') if service is not None else None,
+            'cpe': [c.text for c in service.findall('cpe')] if service is not None else [],
+            'scripts': _nmap_scripts(port),
+        })
+
+    # نظام التشغيل
+    for osmatch in host.iterfind('os/osmatch'):
+        record['os_matches'].append({
+            'name': osmatch.get('name'),
+            'accuracy': int(osmatch.get('accuracy', 0) or 0),
+            'classes': [dict(c.attrib) for c in osmatch.findall('osclass')],
+        })
+
+    # سكربتات مستوى الجهاز
+    hostscript = host.find('hostscript')
+    if hostscript is not None:
+        record['scripts'] = _nmap_scripts(hostscript)
+
+    return record
+
+
+def _iter_nmap_elements(xml_source, tags=("host",)):
+    """المرور على عناصر تقرير nmap المطلوبة مع تحرير كل عنصر بعد معالجته"""
+    context = ET.iterparse(xml_source, events=("start", "end"))
+    root = None
+    for event, elem in context:
+        if root is None:
+            # العنصر الجذر <nmaprun> (خصائصه متاحة عند بدايته)
+            root = elem
+            if elem.tag in tags:
+                yield elem.tag, elem
+            continue
+        if event == "end" and elem.tag in tags:
+            yield elem.tag, elem
+            # تحرير العناصر المحللة حتى لا تتراكم في الذاكرة
+            elem.clear()
+            root.clear()
+
+
+def iter_nmap_hosts(xml_source):
+    """تحليل تدريجي لتقرير nmap بصيغة XML وإرجاع سجلات الأجهزة واحداً تلو الآخر بذاكرة ثابتة"""
+    if not metrics.enabled:
+        for _, elem in _iter_nmap_elements(xml_source):
+            yield _nmap_host_record(elem)
+        return
+
+    # مع تفعيل القياس: عد الأجهزة والمنافذ والبايتات (حتى لو لم يُستهلك التقرير كاملاً)
+    hosts = ports = 0
+    try:
+        for _, elem in _iter_nmap_elements(xml_source):
+            record = _nmap_host_record(elem)
+            hosts += 1
+            ports += len(record['ports'])
+            yield record
+    finally:
+        metrics.inc("toolkit_hosts_parsed_total", hosts, parser="nmap_xml")
+        metrics.inc("toolkit_ports_parsed_total", ports, parser="nmap_xml")
+        with contextlib.suppress(OSError, AttributeError):
+            size = os.path.getsize(xml_source) if isinstance(xml_source, str) else xml_source.tell()
+            metrics.inc("toolkit_bytes_parsed_total", size, parser="nmap_xml")
+
+
+def parse_scan_targets(target):
+    """تحليل هدف المسح إلى شبكات ipaddress، مع إرجاع أسماء الأجهزة وصيغ nmap الأخرى كنصوص"""
+    for token in re.split(r'[\s,]+', target.strip()):
+        if not token:
+            continue
+        try:
+            if '/' in token:
+                yield ipaddress.ip_network(token, strict=False)
+            elif '-' in token:
+                start, end = token.split('-', 1)
+                first = ipaddress.ip_address(start)
+                if end.isdigit() and first.version == 4:
+                    # صيغة nmap المختصرة: 192.168.1.10-50
+                    last = ipaddress.ip_address(start.rsplit('.', 1)[0] + '.' + end)
+                else:
+                    last = ipaddress.ip_address(end)
+                yield from ipaddress.summarize_address_range(first, last)
+            else:
+                yield ipaddress.ip_network(token)
+        except ValueError:
+            # أسماء الأجهزة وصيغ nmap الأخرى تُمرر كما هي
+            yield token
+
+
+def iter_target_addresses(target):
+    """المرور على جميع عناوين IP الموجودة في هدف المسح مع حل أسماء الأجهزة"""
+    for item in parse_scan_targets(target):
+        if isinstance(item, str):
+            try:
+                yield ipaddress.ip_address(socket.gethostbyname(item))
+            except (OSError, ValueError):
+                continue
+        else:
+            addresses = item if item.num_addresses <= 2 else item.hosts()
+            scope = getattr(item.network_address, "scope_id", None)
+            if scope:
+                # عناوين link-local تحتاج اسم الواجهة (%iface) للاتصال بها، وعناصر الشبكة لا تحمله
+                addresses = (ipaddress.ip_address(f"{address}%{scope}") for address in addresses)
+            yield from addresses
+
+
+def split_scan_targets(target, chunk_size=256, max_shards=4096):
+    """تقسيم هدف المسح (شبكات CIDR ونطاقات وقوائم أجهزة) إلى أجزاء بحجم chunk_size تقريباً
+
+    شبكة IPv4 تحتاج أكثر من max_shards جزء تُقسم إلى max_shards جزء أكبر، وشبكات IPv6 الأكبر من
+    الجزء لا تُعدد (‎/64 فيها 2^64 عنوان) وتُمرر إلى nmap كجزء واحد.
+    """
+    chunk_size = max(1, int(chunk_size))
+    # أكبر شبكة فرعية لا يتجاوز حجمها حجم الجزء
+    block_bits = chunk_size.bit_length() - 1
+    shard_bits = max(1, int(max_shards)).bit_length() - 1
+
+    shards = []
+    current = []
+    current_size = 0
+
+    def add(item, size):
+        nonlocal current, current_size
+        if current and current_size + size > chunk_size:
+            shards.append(current)
+            current, current_size = [], 0
+        current.append(item)
+        current_size += size
+
+    for item in parse_scan_targets(target):
+        if isinstance(item, str):
+            add(item, 1)
+        elif item.num_addresses == 1:
+            add(str(item.network_address), 1)
+        elif item.max_prefixlen - item.prefixlen <= block_bits:
+            add(str(item), item.num_addresses)
+        elif item.version == 6:
+            add(str(item), chunk_size)
+        else:
+            bits = max(block_bits, item.max_prefixlen - item.prefixlen - shard_bits)
+            for subnet in item.subnets(new_prefix=item.max_prefixlen - bits):
+                add(str(subnet), subnet.num_addresses)
+
+    if current:
+        shards.append(current)
+    return shards
+
+
+def target_subnet(target):
+    """مفتاح الشبكة الفرعية للهدف المستخدم في حدود المعدل (/24 لـ IPv4 و /64 لـ IPv6)"""
+    for item in parse_scan_targets(target):
+        if isinstance(item, str):
+            return f"host:{item.lower()}"
+        new_prefix = 24 if item.version == 4 else 64
+        if item.prefixlen > new_prefix:
+            item = item.supernet(new_prefix=new_prefix)
+        return str(item)
+    return target.strip()
+
+
+def derive_interface_targets(iface, ipv6_neighbors=(), min_prefix=16):
+    """اشتقاق أهداف المسح من جميع عناوين الواجهة باستخدام أقنعة الشبكة الفعلية
+
+    شبكات IPv4 تُحسب من طول البادئة الحقيقي (الشبكات الأكبر من min_prefix تُقلص حول عنوان الواجهة)
+    ثم تُدمج الشبكات المتداخلة. مسح شبكة IPv6 كاملة غير ممكن، لذلك تُستخدم عناوين الجيران المعروفة
+    (مع تفضيل العنوان العام على عنوان link-local لنفس الجهاز). تُرجع (أهداف IPv4، أهداف IPv6).
+    """
+    networks = []
+    ipv4 = iface.get('ipv4') or [{'addr': iface.get('ip'), 'prefixlen': None}]
+    for entry in ipv4:
+        try:
+            address = ipaddress.ip_address(entry['addr'])
+        except (TypeError, ValueError):
+            continue
+        if address.is_loopback or address.is_link_local:
+            continue
+        prefixlen = entry.get('prefixlen')
+        if prefixlen is None:
+            prefixlen = 24
+        networks.append(ipaddress.ip_interface(f"{address}/{max(prefixlen, min_prefix)}").network)
+    ipv4_targets = [str(network) for network in ipaddress.collapse_addresses(networks)]
+
+    own = set()
+    for entry in iface.get('ipv6', []):
+        try:
+            own.add(ipaddress.ip_address(entry['addr'].split('%')[0]))
+        except ValueError:
+            continue
+    hosts = {}
+    for neighbor in ipv6_neighbors:
+        try:
+            address = ipaddress.ip_address(neighbor['addr'].split('%')[0])
+        except ValueError:
+            continue
+        if address in own or address.is_multicast or address.is_unspecified:
+            continue
+        key = neighbor.get('mac') or str(address)
+        current = hosts.get(key)
+        # عنوان واحد لكل جهاز: العنوان العام أولى من link-local
+        if current is None or (current.is_link_local and not address.is_link_local):
+            hosts[key] = address
+    ipv6_targets = sorted(
+        {f"{address}%{iface['name']}" if address.is_link_local else str(address) for address in hosts.values()}
+    )
+    return ipv4_targets, ipv6_targets
+
+
+# أسماء الأجهزة وصيغ nmap للنطاقات (مثل 192.168.0-255.1-254 و 10.0.*.1) مع نطاق الواجهة والبادئة الاختيارية
+_TARGET_TOKEN_RE = re.compile(r"[0-9A-Za-z*][0-9A-Za-z.*_-]*(?:%[\w.-]+)?(?:/\d{1,3})?")
+
+
+def validate_scan_target(target):
+    """التحقق من كل جزء في هدف المسح (عنوان أو شبكة أو نطاق أو اسم جهاز) قبل تمريره إلى nmap
+
+    ترفع TargetError لأي جزء يبدأ بـ - (حتى لا يُفسر كخيار لـ nmap) أو يحتوي على رموز غير مقبولة.
+    """
+    for token in target.split():
+        if token.startswith("-"):
+            raise TargetError(f"هدف غير صالح (يبدأ بـ -): {token}")
+        for item in parse_scan_targets(token):
+            if isinstance(item, str) and not _TARGET_TOKEN_RE.fullmatch(item):
+                raise TargetError(f"هدف غير صالح: {item}")
+
+
+def split_target_families(target):
+    """تقسيم الهدف إلى أهداف IPv4 (مع أسماء الأجهزة) وأهداف IPv6 لأن nmap لا يجمعهما في تشغيل واحد"""
+    ipv4, ipv6 = [], []
+    for token in re.split(r'[\s,]+', target.strip()):
+        if token:
+            (ipv6 if ':' in token else ipv4).append(token)
+    return [" ".join(part) for part in (ipv4, ipv6) if part]
+
+
+def nmap_family_args(hosts):
+    """خيار -6 إذا كانت الأهداف IPv6"""
+    return ["-6"] if any(':' in host for host in hosts) else []
+
+
+def _submit_in_context(pool, fn, *args):
+    """pool.submit مع نسخة من متغيرات سياق الخيط الحالي (مثل المهمة الحالية في وضع الخدمة)"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def merge_nmap_xml(xml_files, output_file, args="", transform=None):
+    """دمج تقارير nmap الجزئية في تقرير XML واحد بشكل تدريجي
+
+    transform (اختياري) يستقبل كل عنصر <host> ويُرجعه بعد تعديله أو None لتجاهله، وفي هذه الحالة
+    تُحسب أعداد الأجهزة من الأجهزة المكتوبة فعلاً.
+    """
+    from xml.sax.saxutils import quoteattr
+
+    start = int(time.time())
+    merge_started = time.perf_counter()
+    up = down = total = 0
+    header_written = False
+
+    with open(output_file, 'w') as out:
+        for xml_file in xml_files:
+            for tag, elem in _iter_nmap_elements(xml_file, tags=("nmaprun", "host", "hosts")):
+                if tag == "nmaprun":
+                    if not header_written:
+                        attrs = dict(elem.attrib)
+                        attrs["args"] = args or attrs.get("args", "")
+                        start = int(attrs.get("start", start))
+                        out.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE nmaprun>\n')
+                        out.write("<nmaprun " + " ".join(f"{k}={quoteattr(v)}" for k, v in attrs.items()) + ">\n")
+                        header_written = True
+                elif tag == "host":
+                    if transform is not None:
+                        elem = transform(elem)
+                        if elem is None:
+                            continue
+                        status = elem.find('status')
+                        state = status.get('state') if status is not None else None
+                        up += state == "up"
+                        down += state == "down"
+                        total += 1
+                    out.write(ET.tostring(elem, encoding="unicode"))
+                elif tag == "hosts" and transform is None:
+                    up += int(elem.get("up", 0))
+                    down += int(elem.get("down", 0))
+                    total += int(elem.get("total", 0))
+
+        if not header_written:
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE nmaprun>\n')
+            out.write(f'<nmaprun scanner="nmap" args={quoteattr(args)} start="{start}">\n')
+
+        finished = int(time.time())
+        out.write(
+            f'<runstats><finished time="{finished}" elapsed="{finished - start}" exit="success"/>'
+            f'<hosts up="{up}" down="{down}" total="{total}"/></runstats>\n</nmaprun>\n'
+        )
+
+    metrics.observe("toolkit_phase_seconds", time.perf_counter() - merge_started, operation="network_scan", phase="merge")
+    return output_file
+
+
+# أسطر الإحصائيات التي يطبعها nmap عند استخدام --stats-every
+_NMAP_STATS_RE = re.compile(r'^Stats: (\d+:\d+:\d+) elapsed; (\d+) hosts completed \((\d+) up\), (\d+) undergoing (.+)$')
+_NMAP_TIMING_RE = re.compile(r'^(.+?) Timing: About ([\d.]+)% done(?:; ETC: (\d+:\d+) \((\d+:\d+:\d+) remaining\))?')
+_NMAP_DROP_RE = re.compile(r'^Increasing send delay for \S+ from \d+ to \d+ due to (\d+) out of (\d+) dropped probes')
+_NMAP_GIVEUP_RE = re.compile(r'giving up on port because retransmission cap hit')
+
+
+def parse_nmap_stats_line(line):
+    """استخراج معلومات التقدم من سطر إحصائيات nmap، أو None إذا لم يكن السطر سطر إحصائيات"""
+    match = _NMAP_TIMING_RE.match(line)
+    if match:
+        return {
+            'phase': match.group(1),
+            'percent': float(match.group(2)),
+            'etc': match.group(3),
+            'remaining': match.group(4)
+        }
+    match = _NMAP_STATS_RE.match(line)
+    if match:
+        return {
+            'elapsed': match.group(1),
+            'hosts_completed': int(match.group(2)),
+            'hosts_up': int(match.group(3)),
+            'hosts_undergoing': int(match.group(4)),
+            'phase': match.group(5)
+        }
+    return None
+
+
+def nmap_stage_args(args):
+    """تقسيم خيارات ملف المسح إلى (خيارات اكتشاف المنافذ فقط، الخيارات بدون اكتشاف الإصدارات، الخيارات الكاملة)
+
+    خيارات اختيار المنافذ (-p و -F و --top-ports و --port-ratio) تبقى في مرحلة الاكتشاف فقط، لأن المرحلة
+    الأخيرة تمسح المنافذ المفتوحة المكتشفة بـ -p خاص بها.
+    """
+    discovery, unversioned, versioned = [], [], []
+    tokens = iter(args)
+    for token in tokens:
+        # الخيارات التي تأخذ قيمتها في الكلمة التالية
+        value = [next(tokens, "")] if token in ("--script", "--script-args", "--script-args-file", "--version-intensity",
+                                                "-p", "--top-ports", "--port-ratio") else []
+        if token == "-F" or token.startswith(("-p", "--top-ports", "--port-ratio")):
+            discovery += [token] + value
+            continue
+        versioned += [token] + value
+        if token == "-sV" or token.startswith("--version-"):
+            continue
+        if token == "-A":
+            # -A تعني -sV -O -sC --traceroute
+            extra = [option for option in ("-O", "-sC", "--traceroute") if option not in unversioned]
+            unversioned += extra
+            continue
+        unversioned += [token] + value
+        if token in ("-O", "-sC", "--traceroute") or token.startswith(("--osscan", "--script")):
+            continue
+        discovery += [token] + value
+    return discovery, unversioned, versioned
+
+
+def nmap_port_spec(ports):
+    """قائمة (منفذ، بروتوكول) إلى صيغة -p في nmap مثل T:22,80,U:53"""
+    prefixes = {"tcp": "T", "udp": "U", "sctp": "S"}
+    by_protocol = {}
+    for port, protocol in ports:
+        by_protocol.setdefault(protocol, set()).add(port)
+    return ",".join(f"{prefixes.get(protocol, 'T')}:{','.join(map(str, sorted(numbers)))}"
+                    for protocol, numbers in sorted(by_protocol.items()))
+
+
+def parse_nmap_loss_line(line):
+    """استخراج الحزم المفقودة من رسائل nmap المفصلة (-v): (مفقودة، مرسلة، حالات تجاوز حد الإعادة) أو None"""
+    match = _NMAP_DROP_RE.search(line)
+    if match:
+        return int(match.group(1)), int(match.group(2)), 0
+    if _NMAP_GIVEUP_RE.search(line):
+        return 0, 0, 1
+    return None
+
+
+class ScanProfiles:
+    """ملفات المسح: المدمجة (SCAN_OPTIONS) والمعرفة في config.json تحت scan_profiles مع التحقق من صحتها
+
+    مثال لملف معرف:
+        "lan-fast": {"base": "basic", "timing": "aggressive", "min_rate": 500, "max_retries": 2,
+                     "host_timeout": "5m", "auto_tune": true, "max_rate": 5000}
+    """
+
+    TIMING_TEMPLATES = {"paranoid": 0, "sneaky": 1, "polite": 2, "normal": 3, "aggressive": 4, "insane": 5}
+
+    # خيارات عددية وأقل قيمة مسموحة لكل منها
+    INT_OPTIONS = {
+        "min_rate": ("--min-rate", 1),
+        "max_rate": ("--max-rate", 1),
+        "min_parallelism": ("--min-parallelism", 1),
+        "max_parallelism": ("--max-parallelism", 1),
+        "min_hostgroup": ("--min-hostgroup", 1),
+        "max_hostgroup": ("--max-hostgroup", 1),
+        "max_retries": ("--max-retries", 0),
+    }
+    TIME_OPTIONS = {"host_timeout": "--host-timeout", "scan_delay": "--scan-delay", "max_scan_delay": "--max-scan-delay"}
+    OTHER_KEYS = ("base", "args", "timing", "auto_tune", "description")
+
+    # خيارات تتحكم بها الأداة نفسها ولا يمكن وضعها في args
+    RESERVED_ARGS = ("-oX", "-oN", "-oG", "-oA", "-oS", "--stats-every", "-iL")
+
+    _TIME_RE = re.compile(r'^\d+(\.\d+)?(ms|s|m|h)?$')
+
+    def __init__(self, builtins, profiles=None):
+        self.builtins = dict(builtins)
+        self.profiles = dict(profiles or {})
+
+    def names(self):
+        return list(self.builtins) + [name for name in self.profiles if name not in self.builtins]
+
+    def validate(self, name, spec):
+        """قائمة أخطاء ملف المسح (فارغة إذا كان صالحاً)"""
+        if not isinstance(spec, dict):
+            return [f"{name}: يجب أن يكون ملف المسح كائن JSON"]
+        errors = []
+        known = set(self.INT_OPTIONS) | set(self.TIME_OPTIONS) | set(self.OTHER_KEYS)
+        for key in spec:
+            if key not in known:
+                errors.append(f"{name}: خيار غير معروف '{key}'")
+        base = spec.get("base", name if name in self.builtins else None)
+        if base not in self.builtins:
+            errors.append(f"{name}: base يجب أن يكون أحد الملفات المدمجة ({', '.join(self.builtins)})")
+        args = spec.get("args", "")
+        if not isinstance(args, str):
+            errors.append(f"{name}: args يجب أن يكون نصاً")
+        else:
+            for token in args.split():
+                if token.split("=")[0] in self.RESERVED_ARGS:
+                    errors.append(f"{name}: الخيار {token} تتحكم به الأداة ولا يمكن استخدامه في args")
+                if "timing" in spec and re.match(r'^-T\d$', token):
+                    errors.append(f"{name}: لا يمكن استخدام {token} مع timing")
+        timing = spec.get("timing")
+        valid_timing = (isinstance(timing, str) and timing in self.TIMING_TEMPLATES
+                        or isinstance(timing, int) and not isinstance(timing, bool) and 0 <= timing <= 5)
+        if timing is not None and not valid_timing:
+            errors.append(f"{name}: timing يجب أن يكون رقماً من 0 إلى 5 أو أحد: {', '.join(self.TIMING_TEMPLATES)}")
+        for key, (_, minimum) in self.INT_OPTIONS.items():
+            value = spec.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+                errors.append(f"{name}: {key} يجب أن يكون عدداً صحيحاً أكبر من أو يساوي {minimum}")
+        for low, high in (("min_rate", "max_rate"), ("min_parallelism", "max_parallelism"), ("min_hostgroup", "max_hostgroup")):
+            if isinstance(spec.get(low), int) and isinstance(spec.get(high), int) and spec[low] > spec[high]:
+                errors.append(f"{name}: {low} أكبر من {high}")
+        for key in self.TIME_OPTIONS:
+            value = spec.get(key)
+            if value is not None and not (isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+                                          or isinstance(value, str) and self._TIME_RE.match(value)):
+                errors.append(f"{name}: {key} يجب أن يكون عدد ثوانٍ أو مدة مثل 500ms أو 30s أو 5m")
+        if not isinstance(spec.get("auto_tune", False), bool):
+            errors.append(f"{name}: auto_tune يجب أن يكون true أو false")
+        return errors
+
+    def validate_all(self):
+        errors = []
+        for name, spec in self.profiles.items():
+            errors.extend(self.validate(name, spec))
+        return errors
+
+    def resolve(self, name):
+        """خيارات nmap النهائية للملف: {'name', 'base', 'args', 'auto_tune', 'min_rate', 'max_rate'}
+
+        يرفع ProfileError (من نوع ValueError) إذا كان الملف غير موجود أو غير صالح.
+        """
+        if name in self.profiles:
+            spec = self.profiles[name]
+        elif name in self.builtins:
+            spec = {}
+        else:
+            raise ProfileError(f"ملف المسح '{name}' غير موجود (المتاح: {', '.join(self.names())})")
+        errors = self.validate(name, spec)
+        if errors:
+            raise ProfileError("; ".join(errors))
+
+        base = spec.get("base", name if name in self.builtins else None)
+        args = self.builtins[base].split()
+        timing = spec.get("timing")
+        if timing is not None:
+            args = [token for token in args if not re.match(r'^-T\d$', token)]
+            args.append(f"-T{self.TIMING_TEMPLATES.get(timing, timing)}")
+        args += spec.get("args", "").split()
+        auto_tune = spec.get("auto_tune", False)
+        for key, (option, _) in self.INT_OPTIONS.items():
+            # في الضبط التلقائي الحدان للمعدل الإجمالي ويُحدد --max-rate لكل جزء على حدة من حصته
+            if key in spec and not (auto_tune and key in ("min_rate", "max_rate")):
+                args += [option, str(spec[key])]
+        for key, option in self.TIME_OPTIONS.items():
+            if key in spec:
+                value = spec[key]
+                args += [option, f"{value}s" if isinstance(value, (int, float)) else value]
+        if auto_tune and "-v" not in args:
+            # رسائل الحزم المفقودة تظهر في الوضع المفصل فقط
+            args.append("-v")
+        return {'name': name, 'base': base, 'args': args, 'auto_tune': auto_tune,
+                'min_rate': spec.get("min_rate"), 'max_rate': spec.get("max_rate")}
+
+
+class RateTuner:
+    """ضبط معدل الإرسال تلقائياً بين أجزاء المسح حسب نسبة الحزم المفقودة
+
+    نسبة فقد أعلى من high_loss تُخفض المعدل للنصف، وأقل من low_loss ترفعه بنسبة increase،
+    ضمن الحدين min_rate و max_rate. المعدل إجمالي لجميع عمليات nmap المتزامنة: كل عملية تحصل على
+    حصتها (share) بقسمته على عدد العمليات المحجوزة (reserve).
+    التحديث يتم عند انتهاء كل جزء فقط، فالدفعة الأولى من الأجزاء المتوازية تبدأ جميعها بالمعدل الابتدائي.
+    """
+
+    def __init__(self, rate=None, min_rate=None, max_rate=None, high_loss=0.05, low_loss=0.01, increase=1.25):
+        self.min_rate = min_rate or 10
+        self.max_rate = max_rate or 100000
+        self.rate = int(rate or (max_rate // 2 if max_rate else 1000))
+        self.rate = max(self.min_rate, min(self.rate, self.max_rate))
+        self.high_loss = high_loss
+        self.low_loss = low_loss
+        self.increase = increase
+        self.history = []
+        self.slots = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            return self.rate
+
+    @contextlib.contextmanager
+    def reserve(self, slots):
+        """حجز slots عملية nmap متزامنة تتقاسم المعدل طوال مدة السياق"""
+        with self._lock:
+            self.slots += slots
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.slots -= slots
+
+    def share(self):
+        """معدل عملية nmap واحدة (--max-rate): المعدل الحالي مقسوماً على العمليات المحجوزة"""
+        with self._lock:
+            return max(1, self.rate // max(1, self.slots))
+
+    def observe(self, dropped, sent, giveups=0):
+        """تحديث المعدل بعد انتهاء جزء وإرجاع المعدل الجديد"""
+        with self._lock:
+            loss = dropped / sent if sent else 0.0
+            if loss > self.high_loss or giveups:
+                self.rate = max(self.min_rate, int(self.rate / 2))
+            elif loss < self.low_loss:
+                self.rate = min(self.max_rate, int(self.rate * self.increase) or 1)
+            self.history.append({'loss': round(loss, 4), 'giveups': giveups, 'rate': self.rate})
+            return self.rate
+
+
+def nmap_host_to_device(record):
+    """تحويل سجل جهاز من iter_nmap_hosts إلى صيغة الجهاز المعروضة في parse_nmap_results"""
+    ip = record['ipv4'] or record['ipv6']
+    if not ip:
+        return None
+
+    open_ports = []
+    for port in record['ports']:
+        if port['state'] == "open":
+            open_ports.append({
+                'protocol': port['protocol'],
+                'port': str(port['port']),
+                'service': port['service'] or "غير معروف"
+            })
+
+    return {
+        'ip': ip,
+        'mac': record['mac'] or "غير معروف",
+        'hostname': record['hostnames'][0]['name'] if record['hostnames'] else "غير معروف",
+        'status': record['status'] or "غير معروف",
+        'open_ports': open_ports
+    }
+
+
+
+class CompactDevices(Sequence):
+    """حاوية مضغوطة لأجهزة parse_nmap_results تعرض نفس القائمة من القواميس (عرض للقراءة فقط)
+
+    الأعمدة مصفوفات array: عنوان IPv4 كعدد صحيح، MAC كعدد 48 بت، والمنافذ كـ (البروتوكول << 16 | المنفذ)
+    مع فهرس لخدمة مخزنة مرة واحدة. قاموس الجهاز يُنشأ فقط عند الوصول إليه،
+    فيكلف الجهاز حوالي 28 بايت والمنفذ 8 بايت بدلاً من قواميس ونصوص لكل حقل.
+    """
+
+    UNKNOWN = "غير معروف"
+    _MAC_RE = re.compile(r"[0-9A-F]{2}(?::[0-9A-F]{2}){5}")
+
+    def __init__(self):
+        self._ips = array.array('I')
+        self._macs = array.array('q')
+        self._hostnames = array.array('i')
+        self._statuses = array.array('i')
+        # بداية منافذ كل جهاز في أعمدة المنافذ (بعدد الأجهزة + 1)
+        self._port_offsets = array.array('Q', [0])
+        self._ports = array.array('I')
+        self._services = array.array('i')
+        # جداول النصوص المكررة (الخدمات والأسماء والحالات والبروتوكولات)
+        self._strings = []
+        self._string_ids = {}
+        self._protocols = []
+        self._protocol_ids = {}
+        # القيم التي لا تُضغط كأعداد (عناوين IPv6 و MAC غير القياسية) حسب رقم الجهاز
+        self._other_ips = {}
+        self._other_macs = {}
+
+    @classmethod
+    def from_xml(cls, xml_source, exporter=None):
+        """تحميل تقرير nmap تدريجياً (مع تصدير السجلات أثناء المرور إذا مُرر exporter)"""
+        devices = cls()
+        for record in iter_nmap_hosts(xml_source):
+            if exporter is not None:
+                exporter.write_host(record)
+            devices.append_record(record)
+        return devices
+
+    def _intern(self, value):
+        if value is None:
+            return -1
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def _protocol(self, name):
+        index = self._protocol_ids.get(name)
+        if index is None:
+            index = self._protocol_ids[name] = len(self._protocols)
+            self._protocols.append(name)
+        return index
+
+    def append_record(self, record):
+        """إضافة سجل من iter_nmap_hosts (يُتجاهل الجهاز بدون عنوان IP كما في nmap_host_to_device)"""
+        ip = record['ipv4'] or record['ipv6']
+        if not ip:
+            return False
+        index = len(self._ips)
+        packed = 0
+        try:
+            if record['ipv4']:
+                packed = int.from_bytes(socket.inet_aton(ip), "big")
+            else:
+                self._other_ips[index] = ip
+        except OSError:
+            self._other_ips[index] = ip
+        self._ips.append(packed)
+        mac = record['mac']
+        # فقط الصيغة القياسية (أحرف كبيرة مفصولة بـ :) تُعاد كما هي بعد الضغط، وغيرها يُحفظ كنص
+        packed = int(mac.replace(':', ''), 16) if mac and self._MAC_RE.fullmatch(mac) else -1
+        if mac and packed < 0:
+            self._other_macs[index] = mac
+        self._macs.append(packed)
+        self._hostnames.append(self._intern(record['hostnames'][0]['name'] if record['hostnames'] else None))
+        self._statuses.append(self._intern(record['status'] or None))
+        for port in record['ports']:
+            if port['state'] == "open":
+                self._ports.append(self._protocol(port['protocol']) << 16 | port['port'])
+                self._services.append(self._intern(port['service'] or None))
+        self._port_offsets.append(len(self._ports))
+        return True
+
+    def _string(self, index):
+        return self._strings[index] if index >= 0 else self.UNKNOWN
+
+    def _device(self, index):
+        if index in self._other_ips:
+            ip = self._other_ips[index]
+        else:
+            ip = socket.inet_ntoa(self._ips[index].to_bytes(4, "big"))
+        mac = self._macs[index]
+        if mac >= 0:
+            digits = f"{mac:012X}"
+            mac = ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+        else:
+            mac = self._other_macs.get(index, self.UNKNOWN)
+        open_ports = []
+        for position in range(self._port_offsets[index], self._port_offsets[index + 1]):
+            packed = self._ports[position]
+            open_ports.append({
+                'protocol': self._protocols[packed >> 16],
+                'port': str(packed & 0xFFFF),
+                'service': self._string(self._services[position])
+            })
+        return {
+            'ip': ip,
+            'mac': mac,
+            'hostname': self._string(self._hostnames[index]),
+            'status': self._string(self._statuses[index]),
+            'open_ports': open_ports
+        }
+
+    def __len__(self):
+        return len(self._ips)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._device(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("device index out of range")
+        return self._device(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._device(index)
+
+    def port_count(self):
+        return len(self._ports)
+
+    def nbytes(self):
+        """الحجم التقريبي للأعمدة بالبايت (بدون جداول النصوص)"""
+        return sum(column.itemsize * len(column) for column in (
+            self._ips, self._macs, self._hostnames, self._statuses, self._port_offsets, self._ports, self._services))
+
+    def __repr__(self):
+        return f"CompactDevices({len(self)} devices, {self.port_count()} open ports)"
+
+
+class PortResult:
+    """منفذ واحد في نتيجة مسح (واجهة المكتبة)"""
+
+    __slots__ = ("port", "protocol", "state", "service", "product", "version", "extrainfo")
+
+    def __init__(self, port, protocol, state=None, service=None, product=None, version=None, extrainfo=None):
+        self.port = port
+        self.protocol = protocol
+        self.state = state
+        self.service = service
+        self.product = product
+        self.version = version
+        self.extrainfo = extrainfo
+
+    @classmethod
+    def from_record(cls, port):
+        return cls(port['port'], port['protocol'], port['state'], port['service'], port['product'],
+                   port['version'], port['extrainfo'])
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"PortResult({self.port}/{self.protocol} {self.state} {self.service})"
+
+
+class HostResult:
+    """جهاز واحد في نتيجة مسح مع جميع منافذه (القيم المجهولة None وليست نصوص عرض)"""
+
+    __slots__ = ("ip", "mac", "vendor", "hostname", "status", "ports", "os_name")
+
+    def __init__(self, ip, mac=None, vendor=None, hostname=None, status=None, ports=(), os_name=None):
+        self.ip = ip
+        self.mac = mac
+        self.vendor = vendor
+        self.hostname = hostname
+        self.status = status
+        self.ports = list(ports)
+        self.os_name = os_name
+
+    @classmethod
+    def from_record(cls, record):
+        """من سجل iter_nmap_hosts (None إذا لم يكن للجهاز عنوان IP)"""
+        ip = record['ipv4'] or record['ipv6']
+        if not ip:
+            return None
+        return cls(ip, record['mac'], record['vendor'],
+                   record['hostnames'][0]['name'] if record['hostnames'] else None, record['status'],
+                   [PortResult.from_record(port) for port in record['ports']],
+                   record['os_matches'][0]['name'] if record['os_matches'] else None)
+
+    @property
+    def open_ports(self):
+        return [port for port in self.ports if port.state == "open"]
+
+    def to_dict(self):
+        return dict({field: getattr(self, field) for field in self.__slots__ if field != "ports"},
+                    ports=[port.to_dict() for port in self.ports])
+
+    def __repr__(self):
+        return f"HostResult({self.ip}, {len(self.ports)} ports)"
+
+
+class ScanResult:
+    """نتيجة عملية مسح: الأجهزة تُقرأ من ملف التقرير عند طلبها فقط (hosts) حتى لا تُحمل المسوح الكبيرة في الذاكرة"""
+
+    FIELDS = ("target", "scan_type", "engine", "output_file", "returncode", "duration", "diff")
+    __slots__ = FIELDS + ("_devices",)
+
+    def __init__(self, target, scan_type, engine=None, output_file=None, returncode=0, duration=None, diff=None):
+        self.target = target
+        self.scan_type = scan_type
+        self.engine = engine
+        self.output_file = output_file
+        self.returncode = returncode
+        self.duration = duration
+        # في المسح التفاضلي: {'added', 'removed', 'changed', 'unchanged', 'discovery_file'}
+        self.diff = diff
+        # الأجهزة المجمعة أثناء تحليل التقرير (عند حفظه في قاعدة البيانات) حتى لا يُحلل مرة أخرى
+        self._devices = None
+
+    def hosts(self):
+        """المرور على أجهزة التقرير كـ HostResult"""
+        if not self.output_file:
+            return
+        for record in iter_nmap_hosts(self.output_file):
+            host = HostResult.from_record(record)
+            if host:
+                yield host
+
+    def devices(self):
+        """أجهزة التقرير بصيغة parse_nmap_results في حاوية مضغوطة (يُحلل التقرير مرة واحدة فقط)"""
+        if self._devices is None:
+            with metrics.phase("network_scan", "parse"):
+                self._devices = CompactDevices.from_xml(self.output_file) if self.output_file else CompactDevices()
+        return self._devices
+
+    def to_dict(self, hosts=False):
+        result = {field: getattr(self, field) for field in self.FIELDS}
+        if hosts:
+            result['hosts'] = [host.to_dict() for host in self.hosts()]
+        return result
+
+    def __repr__(self):
+        return f"ScanResult({self.target!r}, {self.scan_type!r}, output_file={self.output_file!r})"
+
+
+class WirelessNetwork:
+    """شبكة لاسلكية واحدة (بنفس حقول iter_iwlist_cells)"""
+
+    __slots__ = ("ssid", "bssid", "channel", "frequency", "quality", "signal", "encryption", "security")
+
+    def __init__(self, ssid, bssid, channel=None, frequency=None, quality=None, signal=None, encryption=None, security=None):
+        self.ssid = ssid
+        self.bssid = bssid
+        self.channel = channel
+        self.frequency = frequency
+        self.quality = quality
+        self.signal = signal
+        self.encryption = encryption
+        self.security = security
+
+    @classmethod
+    def from_dict(cls, network):
+        return cls(**{field: network.get(field) for field in cls.__slots__})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"WirelessNetwork({self.ssid!r}, {self.bssid})"
+
+
+class WirelessScanResult:
+    """نتيجة مسح الشبكات اللاسلكية"""
+
+    __slots__ = ("interface", "networks", "output_file", "duration")
+
+    def __init__(self, interface, networks, output_file=None, duration=None):
+        self.interface = interface
+        self.networks = networks
+        self.output_file = output_file
+        self.duration = duration
+
+    def to_dict(self):
+        return {'interface': self.interface, 'networks': [network.to_dict() for network in self.networks],
+                'output_file': self.output_file, 'duration': self.duration}
+
+    def __repr__(self):
+        return f"WirelessScanResult({self.interface!r}, {len(self.networks)} networks)"
+
+
+def nmap_fingerprint(xml_file):
+    """بصمة المنافذ المفتوحة لكل جهاز نشط في تقرير nmap على شكل {ip: [port/protocol]}"""
+    fingerprint = {}
+    for record in iter_nmap_hosts(xml_file):
+        ip = record['ipv4'] or record['ipv6']
+        if ip and record['status'] == "up":
+            fingerprint[ip] = sorted(f"{p['port']}/{p['protocol']}" for p in record['ports'] if p['state'] == "open")
+    return fingerprint
+
+
+def diff_fingerprints(previous, current):
+    """مقارنة بصمتين للمنافذ وإرجاع الأجهزة المضافة والمحذوفة والمتغيرة"""
+    added = sorted(set(current) - set(previous), key=_ip_sort_key)
+    removed = sorted(set(previous) - set(current), key=_ip_sort_key)
+    changed = {}
+    unchanged = 0
+    for ip in sorted(set(current) & set(previous), key=_ip_sort_key):
+        new_ports, old_ports = set(current[ip]), set(previous[ip])
+        if new_ports != old_ports:
+            changed[ip] = {'added': sorted(new_ports - old_ports), 'removed': sorted(old_ports - new_ports)}
+        else:
+            unchanged += 1
+    return {'added': added, 'removed': removed, 'changed': changed, 'unchanged': unchanged}
+
+
+def _ip_sort_key(ip):
+    """مفتاح ترتيب العناوين (عناوين IP أولاً ثم أسماء الأجهزة)"""
+    try:
+        address = ipaddress.ip_address(ip)
+        return (address.version, int(address), "")
+    except ValueError:
+        return (7, 0, ip)
+
+
+def write_nmap_xml(devices, output_file, args=""):
+    """كتابة قائمة أجهزة بصيغة parse_nmap_results كتقرير XML متوافق مع nmap"""
+    from xml.sax.saxutils import quoteattr
+
+    now = int(time.time())
+    up = 0
+    with open(output_file, 'w') as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE nmaprun>\n')
+        out.write(f'<nmaprun scanner="ahmad-toolkit" args={quoteattr(args)} start="{now}" xmloutputversion="1.05">\n')
+        for device in devices:
+            up += device['status'] == "up"
+            addrtype = "ipv6" if ':' in device['ip'] else "ipv4"
+            out.write(f'<host><status state={quoteattr(device["status"])} reason="syn-ack"/>')
+            out.write(f'<address addr={quoteattr(device["ip"])} addrtype="{addrtype}"/>')
+            if device['mac'] != "غير معروف":
+                out.write(f'<address addr={quoteattr(device["mac"])} addrtype="mac"/>')
+            if device['hostname'] != "غير معروف":
+                out.write(f'<hostnames><hostname name={quoteattr(device["hostname"])} type="PTR"/></hostnames>')
+            out.write('<ports>')
+            for port in device['open_ports']:
+                out.write(f'<port protocol={quoteattr(port["protocol"])} portid="{port["port"]}"><state state="open" reason="syn-ack"/>')
+                if port['service'] != "غير معروف":
+                    out.write(f'<service name={quoteattr(port["service"])} method="table"/>')
+                out.write('</port>')
+            out.write('</ports></host>\n')
+        out.write(
+            f'<runstats><finished time="{int(time.time())}" elapsed="{int(time.time()) - now}" exit="success"/>'
+            f'<hosts up="{up}" down="0" total="{up}"/></runstats>\n</nmaprun>\n'
+        )
+    return output_file
+
+
+# أعمدة جرد المنافذ المصدرة (سطر لكل منفذ، أو سطر واحد للجهاز بدون منافذ)
+PORT_COLUMNS = (
+    ("ip", "str"), ("mac", "str"), ("vendor", "str"), ("hostname", "str"), ("status", "str"),
+    ("protocol", "str"), ("port", "int"), ("state", "str"), ("service", "str"), ("product", "str"), ("version", "str"),
+)
+
+
+def nmap_port_rows(record):
+    """تحويل سجل جهاز من iter_nmap_hosts إلى أسطر جرد المنافذ"""
+    host = (
+        record['ipv4'] or record['ipv6'],
+        record['mac'],
+        record['vendor'],
+        record['hostnames'][0]['name'] if record['hostnames'] else None,
+        record['status'],
+    )
+    if not record['ports']:
+        yield host + (None,) * 6
+        return
+    for port in record['ports']:
+        yield host + (port['protocol'], port['port'], port['state'], port['service'], port['product'], port['version'])
+
+
+class _CsvSink:
+    def __init__(self, f, columns):
+        import csv
+        self.writer = csv.writer(f)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        pass
+
+
+class _NdjsonSink:
+    def __init__(self, f, columns):
+        self.f = f
+        self.names = [name for name, _ in columns]
+
+    def write(self, row):
+        self.f.write(json.dumps(dict(zip(self.names, row)), ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class ColumnarWriter:
+    """صيغة عمودية ثنائية مضغوطة للجداول الكبيرة (ملفات .ptcol)
+
+    الأسطر تُجمع في مجموعات (group_size سطر) وكل عمود في المجموعة يُكتب كقطعة مضغوطة بـ zlib:
+    الأعمدة النصية بترميز القاموس (قائمة JSON بالقيم الفريدة + رموز uint32) والأعمدة الرقمية كمصفوفة int64.
+    في نهاية الملف فهرس JSON بمواقع القطع، فيمكن قراءة أعمدة محددة فقط بدون قراءة الملف كاملاً.
+    الذاكرة المستخدمة بحجم مجموعة واحدة.
+    """
+
+    MAGIC = b"PTCOL2\n\x00"
+    # الإصدار الأول كان يفصل قيم القاموس بـ \x00 فتفسد القيم التي تحتوي عليه، ويُقرأ للتوافق فقط
+    MAGIC_V1 = b"PTCOL1\n\x00"
+    NULL_CODE = 0xFFFFFFFF
+    NULL_INT = -(1 << 63)
+
+    def __init__(self, f, columns, group_size=65536):
+        self.f = f
+        self.columns = list(columns)
+        self.group_size = group_size
+        self.groups = []
+        self.rows = 0
+        self._buffer = [[] for _ in self.columns]
+        self.f.write(self.MAGIC)
+
+    def write(self, row):
+        for column, value in zip(self._buffer, row):
+            column.append(value)
+        if len(self._buffer[0]) >= self.group_size:
+            self._flush_group()
+
+    def _flush_group(self):
+        count = len(self._buffer[0])
+        if not count:
+            return
+        chunks = []
+        for (_, kind), values in zip(self.columns, self._buffer):
+            data = self._encode_int(values) if kind == "int" else self._encode_str(values)
+            chunks.append([self.f.tell(), len(data)])
+            self.f.write(data)
+        self.groups.append({'rows': count, 'chunks': chunks})
+        self.rows += count
+        self._buffer = [[] for _ in self.columns]
+
+    def _encode_int(self, values):
+        null = self.NULL_INT
+        packed = array.array('q', [null if v is None else v for v in values])
+        if sys.byteorder != "little":
+            packed.byteswap()
+        return zlib.compress(packed.tobytes(), 1)
+
+    def _encode_str(self, values):
+        codes = {}
+        null = self.NULL_CODE
+        packed = array.array('I', [null if v is None else codes.setdefault(v, len(codes)) for v in values])
+        if sys.byteorder != "little":
+            packed.byteswap()
+        dictionary = json.dumps(list(codes), ensure_ascii=False).encode("utf-8")
+        return zlib.compress(struct.pack("<II", len(codes), len(dictionary)) + dictionary + packed.tobytes(), 1)
+
+    def close(self):
+        self._flush_group()
+        footer = json.dumps({'columns': self.columns, 'rows': self.rows, 'groups': self.groups}).encode("utf-8")
+        self.f.write(footer + struct.pack("<Q", len(footer)) + self.MAGIC)
+
+
+def read_columnar(path, columns=None):
+    """قراءة ملف .ptcol وإرجاع قاموس {اسم العمود: قائمة القيم} للأعمدة المطلوبة فقط"""
+    magic = ColumnarWriter.MAGIC
+    with open(path, 'rb') as f:
+        f.seek(-(len(magic) + 8), os.SEEK_END)
+        tail = f.read()
+        if tail[8:] not in (magic, ColumnarWriter.MAGIC_V1):
+            raise ValueError(f"ليس ملفاً عمودياً صالحاً: {path}")
+        footer_size = struct.unpack("<Q", tail[:8])[0]
+        f.seek(-(len(magic) + 8 + footer_size), os.SEEK_END)
+        footer = json.loads(f.read(footer_size))
+        version = 1 if tail[8:] == ColumnarWriter.MAGIC_V1 else 2
+        schema = [tuple(column) for column in footer['columns']]
+        names = [name for name, _ in schema]
+        wanted = columns or names
+        result = {name: [] for name in wanted}
+        for name in wanted:
+            index = names.index(name)
+            kind = schema[index][1]
+            out = result[name]
+            for group in footer['groups']:
+                offset, size = group['chunks'][index]
+                f.seek(offset)
+                data = zlib.decompress(f.read(size))
+                if kind == "int":
+                    values = array.array('q')
+                    values.frombytes(data)
+                    if sys.byteorder != "little":
+                        values.byteswap()
+                    null = ColumnarWriter.NULL_INT
+                    if null in values:
+                        out.extend(None if v == null else v for v in values)
+                    else:
+                        out.extend(values)
+                else:
+                    count, dict_size = struct.unpack_from("<II", data)
+                    dictionary = data[8:8 + dict_size].decode("utf-8")
+                    if version == 1:
+                        dictionary = dictionary.split("\x00") if count else []
+                    else:
+                        dictionary = json.loads(dictionary)
+                    codes = array.array('I')
+                    codes.frombytes(data[8 + dict_size:])
+                    if sys.byteorder != "little":
+                        codes.byteswap()
+                    null = ColumnarWriter.NULL_CODE
+                    out.extend([dictionary[c] if c != null else None for c in codes])
+    return result
+
+
+class ResultExporter:
+    """تصدير تدريجي للنتائج إلى CSV أو NDJSON أو الصيغة العمودية (.ptcol) أثناء تحليلها
+
+    الصيغة تُحدد من امتداد الملف إذا لم تُذكر. يمكن استخدامه كمدير سياق.
+    """
+
+    FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".ptcol": "columnar"}
+
+    def __init__(self, path, fmt=None, columns=PORT_COLUMNS):
+        if fmt is None:
+            fmt = self.FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt not in ("csv", "ndjson", "columnar"):
+            raise ValueError(f"صيغة تصدير غير مدعومة: {fmt or path}")
+        self.path = path
+        self.format = fmt
+        self.rows = 0
+        if fmt == "columnar":
+            self._file = open(path, 'wb')
+            self._sink = ColumnarWriter(self._file, columns)
+        else:
+            self._file = open(path, 'w', newline="" if fmt == "csv" else None, encoding="utf-8")
+            self._sink = (_CsvSink if fmt == "csv" else _NdjsonSink)(self._file, columns)
+
+    def write(self, row):
+        self._sink.write(row)
+        self.rows += 1
+
+    def write_host(self, record):
+        """كتابة سجل جهاز من iter_nmap_hosts (سطر لكل منفذ)"""
+        for row in nmap_port_rows(record):
+            self.write(row)
+
+    def close(self):
+        if self._file is not None:
+            self._sink.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def print_table(rows, headers, max_rows=None):
+    """عرض جدول tabulate لأول max_rows سطر فقط وإرجاع العدد الكلي (rows يمكن أن يكون مولداً)"""
+    shown = []
+    total = 0
+    for row in rows:
+        total += 1
+        if max_rows is None or total <= max_rows:
+            shown.append(row)
+    if shown:
+        print(tabulate(shown, headers=headers, tablefmt="grid"))
+    if total > len(shown):
+        print(f"{Fore.YELLOW}[*] تم عرض {len(shown)} من {total} سطر فقط (استخدم --export لحفظ جميع النتائج){Style.RESET_ALL}")
+    return total
+
+
+# تعابير مجمعة مسبقاً لمخرجات iwlist: عنوان كل خلية ثم بحث مستقل عن كل حقل داخل حدود الخلية
+# (search مع start/end لا ينسخ النص، وهو أسرع من تعبير واحد يمر على كل سطر ببدائل متعددة)
+_IWLIST_CELL_RE = re.compile(r"Cell \d+ - Address: *([0-9A-Fa-f:]{17})")
+_IWLIST_CHANNEL_RE = re.compile(r"Channel:(\d+)")
+_IWLIST_FREQUENCY_RE = re.compile(r"Frequency:([\d.]+) *GHz(?: *\(Channel (\d+)\))?")
+_IWLIST_QUALITY_RE = re.compile(r"Quality[=:](\d+)/(\d+)(?: +Signal level[=:](-?\d+) *dBm)?")
+_IWLIST_SIGNAL_RE = re.compile(r"Signal level[=:](-?\d+) *dBm")
+_IWLIST_ENCRYPTION_RE = re.compile(r"Encryption key:(on|off)")
+_IWLIST_ESSID_RE = re.compile(r'ESSID:"([^\n]*)"')
+_IWLIST_SECURITY_RE = re.compile(r"IE: *(?:IEEE 802\.11i/(WPA2)|(WPA) Version)")
+_IWLIST_WPA2_RE = re.compile(r"IE: *IEEE 802\.11i/WPA2")
+
+# نفس الطريقة لمخرجات iw dev <iface> scan
+_IW_CELL_RE = re.compile(r"""
+    BSS[ ](?P<bssid>[0-9A-Fa-f:]{17})[^\n]*\n
+    (?:(?!BSS[ ][0-9A-Fa-f]{2}:)[ \t]*(?:
+        freq:[ ]*(?P<frequency>[\d.]+)
+      | signal:[ ]*(?P<signal>-?[\d.]+)[ ]*dBm
+      | SSID:[ ]?(?P<ssid>[^\n]*)
+      | DS[ ]Parameter[ ]set:[ ]*channel[ ](?P<channel>\d+)
+      | \*[ ]primary[ ]channel:[ ]*(?P<primary_channel>\d+)
+      | capability:(?P<capability>[^\n]*)
+      | (?P<rsn>RSN):
+      | (?P<wpa>WPA):
+    )?[^\n]*\n)*
+""", re.X)
+
+
+def _frequency_channel(mhz):
+    """تحويل التردد بالميجاهرتز إلى رقم القناة"""
+    if mhz == 2484:
+        return 14
+    if 2412 <= mhz < 2484:
+        return (mhz - 2407) // 5
+    if 5000 <= mhz < 5925:
+        return (mhz - 5000) // 5
+    if 5950 <= mhz <= 7115:
+        return (mhz - 5950) // 5
+    return None
+
+
+def _iter_cell_blocks(source, marker, block_size=65536, parser=None):
+    """قراءة المخرجات على دفعات وإرجاع نصوص تحتوي على خلايا كاملة فقط (الذاكرة بحجم دفعة واحدة تقريباً)
+
+    source يمكن أن يكون نصاً أو ملفاً/أنبوباً مفتوحاً أو أي مصدر للأسطر.
+    parser: اسم المحلل في عداد البايتات المقروءة (toolkit_bytes_parsed_total).
+    """
+    if isinstance(source, str):
+        chunks = (source,)
+    elif hasattr(source, "read"):
+        chunks = iter(lambda: source.read(block_size), "")
+    else:
+        chunks = ("".join(lines) for lines in _batched(source, 2048))
+    pending = ""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            pending += chunk
+            # ما قبل بداية آخر خلية خلايا مكتملة؛ الخلية الأخيرة قد تكون غير مكتملة بعد
+            start = pending.rfind(marker)
+            if start > 0:
+                cut = pending.rfind("\n", 0, start) + 1
+                if cut > 0:
+                    yield pending[:cut]
+                    pending = pending[cut:]
+        if pending:
+            yield pending if pending.endswith("\n") else pending + "\n"
+    finally:
+        metrics.inc("toolkit_bytes_parsed_total", size, parser=parser or "text")
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_iwlist_cells(source):
+    """تحليل مخرجات iwlist <iface> scan أثناء قراءتها (بحث مجمع مسبقاً لكل حقل داخل الخلية)
+
+    القيم رقمية: signal عدد صحيح بالـ dBm، frequency بالجيجاهرتز، quality نسبة بين 0 و 1.
+    """
+    cell_re = _IWLIST_CELL_RE
+    essid = _IWLIST_ESSID_RE.search
+    channel_search = _IWLIST_CHANNEL_RE.search
+    frequency_search = _IWLIST_FREQUENCY_RE.search
+    quality_search = _IWLIST_QUALITY_RE.search
+    signal_search = _IWLIST_SIGNAL_RE.search
+    encryption_search = _IWLIST_ENCRYPTION_RE.search
+    security_search = _IWLIST_SECURITY_RE.search
+    for block in _iter_cell_blocks(source, " - Address:", parser="iwlist"):
+        heads = [(m.start(), m.group(1)) for m in cell_re.finditer(block)]
+        ends = [start for start, _ in heads[1:]]
+        ends.append(len(block))
+        for (start, bssid), end in zip(heads, ends):
+            m = essid(block, start, end)
+            if m is None:
+                continue
+            ssid = m.group(1)
+            m = channel_search(block, start, end)
+            channel = m.group(1) if m else None
+            frequency = None
+            m = frequency_search(block, start, end)
+            if m:
+                frequency = m.group(1)
+                channel = channel or m.group(2)
+            quality = quality_max = signal = None
+            m = quality_search(block, start, end)
+            if m:
+                quality, quality_max, signal = m.groups()
+            if signal is None:
+                m = signal_search(block, start, end)
+                signal = m.group(1) if m else None
+            # WPA2 له الأولوية حتى لو ظهر بعد سطر WPA
+            security = None
+            m = security_search(block, start, end)
+            if m:
+                security = m.group(1) or m.group(2)
+                if security == "WPA" and _IWLIST_WPA2_RE.search(block, m.end(), end):
+                    security = "WPA2"
+            m = encryption_search(block, start, end)
+            yield {
+                'ssid': ssid,
+                'bssid': bssid.upper(),
+                'channel': int(channel) if channel else None,
+                'frequency': float(frequency) if frequency else None,
+                'quality': round(int(quality) / int(quality_max), 3) if quality and quality_max != "0" else None,
+                'signal': int(signal) if signal else None,
+                'encryption': "مشفرة" if m and m.group(1) == "on" else "غير مشفرة",
+                'security': security
+            }
+
+
+def iter_iw_cells(source):
+    """تحليل مخرجات iw dev <iface> scan أثناء قراءتها بنفس صيغة iter_iwlist_cells"""
+    for block in _iter_cell_blocks(source, "\nBSS ", parser="iw"):
+        for m in _IW_CELL_RE.finditer(block):
+            bssid, frequency, signal, ssid, channel, primary_channel, capability, rsn, wpa = m.groups()
+            mhz = float(frequency) if frequency else None
+            channel = channel or primary_channel
+            yield {
+                'ssid': ssid or "",
+                'bssid': bssid.upper(),
+                'channel': int(channel) if channel else (_frequency_channel(int(mhz)) if mhz else None),
+                'frequency': round(mhz / 1000, 3) if mhz else None,
+                'quality': None,
+                'signal': int(float(signal)) if signal else None,
+                'encryption': "مشفرة" if capability and "Privacy" in capability else "غير مشفرة",
+                'security': "WPA2" if rsn else wpa
+            }
+
+
+def parse_iwlist_output(scan_output):
+    """تحليل مخرجات iwlist <iface> scan (نص كامل) إلى قائمة شبكات"""
+    networks = list(iter_iwlist_cells(scan_output))
+    metrics.inc("toolkit_networks_parsed_total", len(networks), parser="iwlist")
+    return networks
+
+
+class _BssidEntry:
+    """سجل مضغوط لنقطة وصول واحدة في جدول المراقبة"""
+
+    __slots__ = ("bssid", "ssid", "encryption", "channel", "channels", "first_seen", "last_seen",
+                 "seen", "signal", "signal_min", "signal_max", "signal_sum", "signal_count", "reported_signal")
+
+    def __init__(self, bssid, now, history):
+        self.bssid = bssid
+        self.ssid = None
+        self.encryption = None
+        self.channel = None
+        # آخر تغييرات القناة فقط (حجم ثابت)
+        self.channels = deque(maxlen=history)
+        self.first_seen = now
+        self.last_seen = now
+        self.seen = 0
+        self.signal = None
+        self.signal_min = None
+        self.signal_max = None
+        self.signal_sum = 0
+        self.signal_count = 0
+        self.reported_signal = None
+
+    def to_dict(self):
+        return {
+            'bssid': self.bssid,
+            'ssid': self.ssid,
+            'encryption': self.encryption,
+            'channel': self.channel,
+            'channels': list(self.channels),
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'seen': self.seen,
+            'signal': self.signal,
+            'signal_min': self.signal_min,
+            'signal_max': self.signal_max,
+            'signal_avg': round(self.signal_sum / self.signal_count, 1) if self.signal_count else None
+        }
+
+
+class BssidTable:
+    """جدول نقاط وصول في الذاكرة بحجم محدود يعيد التغييرات فقط (جديد، تغير، اختفى) بعد كل مسح
+
+    عند تجاوز max_entries تُحذف النقاط الأقدم ظهوراً (LRU)، والنقاط التي لم تظهر خلال expire_after
+    ثانية تُعتبر مختفية.
+    """
+
+    def __init__(self, max_entries=4096, expire_after=300, signal_delta=5, channel_history=8):
+        self.max_entries = max(1, int(max_entries))
+        self.expire_after = expire_after
+        self.signal_delta = signal_delta
+        self.channel_history = channel_history
+        # مرتب حسب آخر ظهور: الأقدم أولاً
+        self.entries = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def update(self, networks, now=None):
+        """دمج نتائج مسح واحد في الجدول وإرجاع قائمة التغييرات"""
+        now = time.time() if now is None else now
+        deltas = []
+        for network in networks:
+            bssid = network.get('bssid')
+            if not bssid or bssid == "غير معروف":
+                continue
+            signal = _to_int(network.get('signal'))
+            channel = _to_int(network.get('channel'))
+            entry = self.entries.get(bssid)
+            if entry is None:
+                entry = self.entries[bssid] = _BssidEntry(bssid, now, self.channel_history)
+                change = "new"
+            else:
+                self.entries.move_to_end(bssid)
+                change = None
+            entry.last_seen = now
+            entry.seen += 1
+            
+            fields = {}
+            for name, value in (("ssid", network.get('ssid')), ("encryption", network.get('encryption')), ("channel", channel)):
+                if value is not None and value != getattr(entry, name):
+                    if change is None:
+                        fields[name] = value
+                    setattr(entry, name, value)
+                    if name == "channel":
+                        entry.channels.append(value)
+                        
+            if signal is not None:
+                entry.signal = signal
+                entry.signal_min = signal if entry.signal_min is None else min(entry.signal_min, signal)
+                entry.signal_max = signal if entry.signal_max is None else max(entry.signal_max, signal)
+                entry.signal_sum += signal
+                entry.signal_count += 1
+                # تغير الإشارة يُسجل فقط إذا تجاوز الحد المحدد منذ آخر تسجيل
+                if change is None and entry.reported_signal is not None and abs(signal - entry.reported_signal) >= self.signal_delta:
+                    fields['signal'] = signal
+                    
+            if change or fields:
+                entry.reported_signal = entry.signal
+                delta = {'type': change or "changed", 'ts': now, 'bssid': bssid}
+                delta.update(fields if change is None else
+                             {'ssid': entry.ssid, 'channel': entry.channel, 'signal': entry.signal, 'encryption': entry.encryption})
+                deltas.append(delta)
+                
+        deltas.extend(self.expire(now))
+        # الحد الأقصى للذاكرة: حذف النقاط الأقدم ظهوراً
+        while len(self.entries) > self.max_entries:
+            _, entry = self.entries.popitem(last=False)
+            self.evicted += 1
+            deltas.append({'type': "evicted", 'ts': now, 'bssid': entry.bssid, 'last_seen': entry.last_seen})
+        return deltas
+
+    def expire(self, now):
+        """إزالة النقاط التي لم تظهر خلال expire_after ثانية"""
+        deltas = []
+        if not self.expire_after:
+            return deltas
+        while self.entries:
+            entry = next(iter(self.entries.values()))
+            if now - entry.last_seen < self.expire_after:
+                break
+            del self.entries[entry.bssid]
+            deltas.append(dict(entry.to_dict(), type="lost", ts=now))
+        return deltas
+
+    def snapshot(self):
+        """حالة جميع النقاط الحالية"""
+        return [entry.to_dict() for entry in self.entries.values()]
+
+
+class AsyncScanEngine:
+    """محرك اكتشاف أجهزة ومسح منافذ TCP بلغة بايثون فقط (بدون nmap) باستخدام asyncio"""
+
+    # منافذ تستخدم لاكتشاف الأجهزة النشطة (الرد بـ RST يعني أيضاً أن الجهاز نشط)
+    DISCOVERY_PORTS = (80, 443, 22, 445, 139, 3389, 8080, 53, 21, 23, 25, 135)
+
+    # أشهر المنافذ المستخدمة في مسح المنافذ الافتراضي
+    TOP_PORTS = (
+        7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135,
+        139, 143, 144, 179, 199, 389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548,
+        554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026, 1027, 1028, 1029, 1110, 1433,
+        1720, 1723, 1755, 1900, 2000, 2001, 2049, 2121, 2717, 3000, 3128, 3306, 3389, 3986,
+        4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000,
+        6001, 6646, 7070, 8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768,
+        49152, 49153, 49154, 49155, 49156, 49157,
+    )
+
+    def __init__(self, concurrency=256, host_rate=0, timeout=1.0, retries=1, discovery_ports=None):
+        self.concurrency = max(1, int(concurrency))
+        # الحد الأقصى لمحاولات الاتصال في الثانية لكل جهاز (0 = بدون حد)
+        self.host_rate = float(host_rate or 0)
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.discovery_ports = tuple(discovery_ports or self.DISCOVERY_PORTS)
+
+    async def _throttle(self, limiter):
+        """الانتظار حتى يسمح حد المعدل الخاص بالجهاز بمحاولة اتصال جديدة"""
+        if not self.host_rate:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, limiter[0])
+        limiter[0] = slot + 1 / self.host_rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def probe(self, ip, port, limiter=None):
+        """محاولة اتصال TCP بمنفذ واحد وإرجاع حالته: open أو closed أو filtered"""
+        limiter = limiter if limiter is not None else [0.0]
+        for _ in range(self.retries + 1):
+            await self._throttle(limiter)
+            async with self._semaphore:
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(str(ip), port), self.timeout)
+                except asyncio.TimeoutError:
+                    continue
+                except ConnectionRefusedError:
+                    return "closed"
+                except OSError:
+                    return "filtered"
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+                return "open"
+        return "filtered"
+
+    async def _scan_host(self, ip, ports):
+        """اكتشاف جهاز واحد ومسح منافذه"""
+        limiter = [0.0]
+        open_ports = []
+        alive = False
+
+        if ports:
+            states = await asyncio.gather(*(self.probe(ip, port, limiter) for port in ports))
+            for port, state in zip(ports, states):
+                if state == "open":
+                    open_ports.append(port)
+                alive = alive or state != "filtered"
+
+        if not alive:
+            # منافذ الاكتشاف التي لم تُفحص بعد، والتوقف عند أول رد
+            scanned = set(ports or ())
+            tasks = [asyncio.ensure_future(self.probe(ip, port, limiter)) for port in self.discovery_ports if port not in scanned]
+            try:
+                for future in asyncio.as_completed(tasks):
+                    if await future != "filtered":
+                        alive = True
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        if not alive:
+            return None
+
+        return {
+            'ip': str(ip),
+            'mac': "غير معروف",
+            'hostname': "غير معروف",
+            'status': "up",
+            'open_ports': [{
+                'protocol': "tcp",
+                'port': str(port),
+                'service': _tcp_service_name(port)
+            } for port in open_ports]
+        }
+
+    async def run(self, target, ports=None, on_host=None):
+        """تشغيل المسح على جميع عناوين الهدف وإرجاع الأجهزة النشطة (on_host يستقبل كل جهاز عند اكتمال مسحه)"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        addresses = iter_target_addresses(target)
+        devices = []
+
+        async def worker():
+            # كل عامل يسحب العنوان التالي من المولد المشترك حتى لا تُنشأ مهام لكل العناوين دفعة واحدة
+            for ip in addresses:
+                device = await self._scan_host(ip, ports)
+                if device:
+                    devices.append(device)
+                    if on_host is not None:
+                        on_host(device)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        devices.sort(key=lambda d: _ip_sort_key(d['ip']))
+        return devices
+
+    def scan(self, target, ports=None, on_host=None):
+        """واجهة متزامنة لتشغيل المسح"""
+        return asyncio.run(self.run(target, ports, on_host))
+
+    async def _banner(self, ip, port, read_bytes):
+        async with self._semaphore:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                return None
+            try:
+                # الخدمات التي لا ترسل شعاراً (مثل HTTP) تُعطي بصمة فارغة ثابتة
+                data = await asyncio.wait_for(reader.read(read_bytes), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                data = b""
+            finally:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+            return hashlib.sha1(data).hexdigest()
+
+    async def _banners(self, endpoints, read_bytes):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        hashes = await asyncio.gather(*(self._banner(ip, port, read_bytes) for ip, port in endpoints))
+        return dict(zip(endpoints, hashes))
+
+    def banner_hashes(self, endpoints, read_bytes=512):
+        """قراءة الشعار الأول لكل منفذ TCP وإرجاع {(ip, port): بصمة SHA1 أو None إذا تعذر الاتصال}"""
+        endpoints = list(dict.fromkeys(endpoints))
+        if not endpoints:
+            return {}
+        return asyncio.run(self._banners(endpoints, read_bytes))
+
+
+def _tcp_service_name(port):
+    """اسم الخدمة المعروفة لمنفذ TCP"""
+    try:
+        return socket.getservbyport(int(port), "tcp")
+    except OSError:
+        return "غير معروف"
+
+
+
+def _to_int(value):
+    """تحويل قيمة نصية إلى عدد صحيح أو None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    """تحويل قيمة نصية إلى عدد عشري أو None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_QUALITY_RE = re.compile(r"\s*(\d+)\s*/\s*(\d+)")
+
+
+def _quality_ratio(value):
+    """جودة الإشارة كنسبة بين 0 و 1 (كما في iter_iwlist_cells) من رقم أو من نص قديم مثل "70/70 (100%)"، أو None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = _QUALITY_RE.match(str(value))
+    if match:
+        quality, quality_max = int(match.group(1)), int(match.group(2))
+        return round(quality / quality_max, 3) if quality_max else None
+    return _to_float(value)
+
+
+class EnvironmentProbe:
+    """فحص البيئة مرة واحدة: عائلة التوزيعة ومواقع البرامج (بحث داخلي في PATH بدلاً من تشغيل which)
+
+    النتائج تُحفظ في ملف مؤقت مشترك بين التشغيلات ويُعاد بناؤها تلقائياً عند تغير PATH
+    أو تغير وقت تعديل أي من مجلداته (أي عند تثبيت برنامج أو حذفه).
+    """
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def _load(self):
+        if self.cache_file:
+            try:
+                with open(self.cache_file, 'r') as f:
+                    cache = json.load(f)
+                if isinstance(cache, dict):
+                    return cache
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        try:
+            # كتابة ذرية حتى لا تقرأ عملية أخرى ملفاً نصف مكتوب
+            fd, staging = tempfile.mkstemp(dir=os.path.dirname(self.cache_file), suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._cache, f)
+            os.replace(staging, self.cache_file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def path_dirs():
+        return [d for d in os.environ.get("PATH", os.defpath).split(os.pathsep) if d]
+
+    def path_key(self):
+        """مفتاح الإبطال: قيمة PATH مع وقت تعديل كل مجلد فيها"""
+        parts = [os.environ.get("PATH", "")]
+        for directory in self.path_dirs():
+            try:
+                parts.append(str(os.stat(directory).st_mtime_ns))
+            except OSError:
+                parts.append("-")
+        return "|".join(parts)
+
+    @staticmethod
+    def system_key():
+        uname = platform.uname()
+        return f"{uname.system}|{uname.release}|{uname.version}"
+
+    @property
+    def family(self):
+        """عائلة التوزيعة (kali, debian, arch, fedora, other, darwin, unsupported)"""
+        key = self.system_key()
+        with self._lock:
+            if self._cache.get('system_key') != key:
+                self._cache['system_key'] = key
+                self._cache['family'] = ToolInstaller.detect_family()
+                self._save()
+            return self._cache['family']
+
+    def which(self, name):
+        """مسار البرنامج أو None (تُحفظ النتائج السلبية أيضاً)"""
+        key = self.path_key()
+        with self._lock:
+            if self._cache.get('path_key') != key:
+                self._cache['path_key'] = key
+                self._cache['binaries'] = {}
+            binaries = self._cache['binaries']
+            if name in binaries:
+                return binaries[name]
+            binaries[name] = self._search(name)
+            self._save()
+            return binaries[name]
+
+    def has(self, name):
+        return self.which(name) is not None
+
+    def _search(self, name):
+        extensions = [""]
+        if os.name == "nt":
+            extensions += os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").lower().split(";")
+        for directory in self.path_dirs():
+            for extension in extensions:
+                path = os.path.join(directory, name + extension)
+                if os.path.isfile(path) and os.access(path, os.X_OK):
+                    return path
+        return None
+
+    def invalidate(self):
+        """حذف نتائج البحث المحفوظة (مثلاً بعد التثبيت)"""
+        with self._lock:
+            self._cache.pop('path_key', None)
+            self._cache.pop('binaries', None)
+            self._save()
+
+
+class InterfaceInventory:
+    """جرد واجهات الشبكة داخل العملية نفسها بدون تشغيل أوامر خارجية
+
+    الخصائص تُقرأ من /sys/class/net والعناوين (IPv4 و IPv6 كاملة مع طول البادئة) من rtnetlink
+    في طلب واحد. على الأنظمة غير لينكس يُستخدم netifaces. النتيجة تُحفظ لمدة ttl ثانية.
+    """
+
+    SYS_NET = "/sys/class/net"
+
+    # أنواع ARPHRD الشائعة في /sys/class/net/<iface>/type
+    LINK_TYPES = {1: "ether", 24: "firewire", 32: "infiniband", 512: "ppp", 768: "tunnel", 769: "tunnel6",
+                  772: "loopback", 776: "sit", 778: "gre", 801: "ieee80211", 803: "radiotap", 65534: "none"}
+
+    # ثوابت rtnetlink
+    RTM_NEWADDR = 20
+    RTM_GETADDR = 22
+    NLMSG_ERROR = 2
+    NLMSG_DONE = 3
+    NLM_F_REQUEST = 0x1
+    NLM_F_DUMP = 0x300
+    IFA_ADDRESS = 1
+    IFA_LOCAL = 2
+    RTM_NEWNEIGH = 28
+    RTM_GETNEIGH = 30
+    NDA_DST = 1
+    NDA_LLADDR = 2
+    # NUD_INCOMPLETE | NUD_FAILED | NUD_NOARP
+    NUD_UNUSABLE = 0x01 | 0x20 | 0x40
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+
+    def interfaces(self, refresh=False):
+        """قائمة جميع الواجهات (بما فيها loopback) كقواميس"""
+        with self._lock:
+            now = time.monotonic()
+            if refresh or self._cached is None or now - self._cached_at > self.ttl:
+                self._cached = self._collect()
+                self._cached_at = now
+            return [dict(iface) for iface in self._cached]
+
+    def wireless(self, refresh=False):
+        """أسماء الواجهات اللاسلكية فقط"""
+        return [iface['name'] for iface in self.interfaces(refresh) if iface['wireless']]
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def _collect(self):
+        if not os.path.isdir(self.SYS_NET):
+            return self._collect_netifaces()
+        try:
+            addresses = self._netlink_addresses()
+        except OSError:
+            addresses = {}
+        interfaces = []
+        for name in sorted(os.listdir(self.SYS_NET)):
+            base = os.path.join(self.SYS_NET, name)
+            index = self._read_int(base, "ifindex")
+            link_type = self._read_int(base, "type")
+            ipv4, ipv6 = addresses.get(index, ([], []))
+            interfaces.append({
+                'name': name,
+                'index': index,
+                'mac': self._read(base, "address") or "غير معروف",
+                'type': self.LINK_TYPES.get(link_type, str(link_type)),
+                # المجلد wireless (امتدادات لاسلكية) أو phy80211 (cfg80211) يدل على واجهة لاسلكية
+                'wireless': os.path.exists(os.path.join(base, "wireless")) or os.path.exists(os.path.join(base, "phy80211")),
+                'virtual': "/virtual/" in os.path.realpath(base),
+                'operstate': self._read(base, "operstate") or "unknown",
+                'speed': self._speed(base),
+                'mtu': self._read_int(base, "mtu"),
+                'ip': ipv4[0]['addr'] if ipv4 else "غير معروف",
+                'ipv4': ipv4,
+                'ipv6': ipv6
+            })
+        return interfaces
+
+    @staticmethod
+    def _read(base, name):
+        try:
+            with open(os.path.join(base, name), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _read_int(self, base, name):
+        try:
+            return int(self._read(base, name))
+        except (TypeError, ValueError):
+            return None
+
+    def _speed(self, base):
+        # الواجهات المتوقفة أو الافتراضية تُرجع خطأ أو -1
+        speed = self._read_int(base, "speed")
+        return speed if speed is not None and speed > 0 else None
+
+    def _netlink_dump(self, request_type, payload):
+        """إرسال طلب dump إلى rtnetlink وإرجاع الرسائل (النوع، البيانات، بداية الحمولة، النهاية)"""
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, 0) as sock:
+            sock.settimeout(1.0)
+            sock.bind((0, 0))
+            header = struct.pack("=LHHLL", 16 + len(payload), request_type, self.NLM_F_REQUEST | self.NLM_F_DUMP, 1, 0)
+            sock.send(header + payload)
+            while True:
+                data = sock.recv(65536)
+                offset = 0
+                while offset + 16 <= len(data):
+                    length, msg_type, _, _, _ = struct.unpack_from("=LHHLL", data, offset)
+                    if length < 16 or msg_type == self.NLMSG_DONE:
+                        return
+                    if msg_type == self.NLMSG_ERROR:
+                        raise OSError("rtnetlink error")
+                    yield msg_type, data, offset + 16, offset + length
+                    offset += (length + 3) & ~3
+
+    @staticmethod
+    def _attributes(data, offset, end):
+        attrs = {}
+        while offset + 4 <= end:
+            attr_len, attr_type = struct.unpack_from("=HH", data, offset)
+            if attr_len < 4:
+                break
+            attrs[attr_type] = data[offset + 4:offset + attr_len]
+            offset += (attr_len + 3) & ~3
+        return attrs
+
+    def _netlink_addresses(self):
+        """جميع العناوين لكل رقم واجهة عبر طلب RTM_GETADDR واحد: {index: (ipv4, ipv6)}"""
+        result = {}
+        payload = struct.pack("=BBBBL", socket.AF_UNSPEC, 0, 0, 0, 0)
+        for msg_type, data, start, end in self._netlink_dump(self.RTM_GETADDR, payload):
+            if msg_type != self.RTM_NEWADDR:
+                continue
+            family, prefixlen, _, scope, index = struct.unpack_from("=BBBBL", data, start)
+            attrs = self._attributes(data, start + 8, end)
+            # IFA_LOCAL هو عنوان الواجهة في IPv4 (IFA_ADDRESS قد يكون عنوان الطرف الآخر في اتصالات نقطة لنقطة)
+            raw = attrs.get(self.IFA_LOCAL) or attrs.get(self.IFA_ADDRESS)
+            if raw is None or family not in (socket.AF_INET, socket.AF_INET6):
+                continue
+            ipv4, ipv6 = result.setdefault(index, ([], []))
+            entry = {'addr': socket.inet_ntop(family, raw), 'prefixlen': prefixlen, 'scope': scope}
+            (ipv4 if family == socket.AF_INET else ipv6).append(entry)
+        return result
+
+    def neighbors(self, interface=None, family=socket.AF_INET6):
+        """عناوين الجيران من ذاكرة الجيران (NDP لـ IPv6 و ARP لـ IPv4) بدون إرسال أي حزم
+
+        كل عنصر {'addr', 'mac'}. تُستبعد الإدخالات الفاشلة أو غير المكتملة. تُرجع قائمة فارغة خارج لينكس.
+        """
+        if not hasattr(socket, "AF_NETLINK"):
+            return []
+        index = None
+        if interface:
+            index = self._read_int(os.path.join(self.SYS_NET, interface), "ifindex")
+            if index is None:
+                return []
+        neighbors = []
+        try:
+            payload = struct.pack("=BxxxiHBB", family, 0, 0, 0, 0)
+            for msg_type, data, start, end in self._netlink_dump(self.RTM_GETNEIGH, payload):
+                if msg_type != self.RTM_NEWNEIGH:
+                    continue
+                entry_family, ifindex, state = struct.unpack_from("=BxxxiH", data, start)
+                if entry_family != family or (index is not None and ifindex != index) or state & self.NUD_UNUSABLE:
+                    continue
+                attrs = self._attributes(data, start + 12, end)
+                if self.NDA_DST in attrs:
+                    lladdr = attrs.get(self.NDA_LLADDR)
+                    neighbors.append({'addr': socket.inet_ntop(family, attrs[self.NDA_DST]),
+                                      'mac': ":".join(f"{b:02x}" for b in lladdr) if lladdr else None})
+        except OSError:
+            return []
+        return neighbors
+
+    def _collect_netifaces(self):
+        """الطريقة البديلة خارج لينكس"""
+        interfaces = []
+        for name in netifaces.interfaces():
+            addrs = netifaces.ifaddresses(name)
+            ipv4 = [{'addr': a['addr'], 'prefixlen': self._prefixlen(a.get('netmask')), 'scope': 0}
+                    for a in addrs.get(netifaces.AF_INET, []) if a.get('addr')]
+            ipv6 = [{'addr': a['addr'].split('%')[0], 'prefixlen': self._prefixlen(a.get('netmask')), 'scope': 0}
+                    for a in addrs.get(netifaces.AF_INET6, []) if a.get('addr')]
+            loopback = name == "lo" or "loop" in name.lower()
+            interfaces.append({
+                'name': name,
+                'index': None,
+                'mac': addrs.get(netifaces.AF_LINK, [{'addr': 'غير معروف'}])[0].get('addr') or "غير معروف",
+                'type': "loopback" if loopback else "ether",
+                'wireless': False,
+                'virtual': loopback,
+                'operstate': "unknown",
+                'speed': None,
+                'mtu': None,
+                'ip': ipv4[0]['addr'] if ipv4 else "غير معروف",
+                'ipv4': ipv4,
+                'ipv6': ipv6
+            })
+        return interfaces
+
+    @staticmethod
+    def _prefixlen(netmask):
+        """طول البادئة من قناع الشبكة (مثل 255.255.255.0 أو ffff:ffff::/64)"""
+        if not netmask:
+            return None
+        try:
+            return ipaddress.ip_network(f"0.0.0.0/{netmask}" if "." in netmask else f"::/{netmask.split('/')[-1]}").prefixlen
+        except ValueError:
+            return None
+
+
+class ToolInstaller:
+    """محرك تثبيت يبني رسماً بيانياً للمهام: تحديث واحد لفهرس الحزم، ثم تثبيت جميع الحزم في عملية واحدة،
+    ثم تنفيذ عمليات البناء من المصدر بشكل متوازٍ، مع قياس زمن كل خطوة"""
+
+    # أوامر مدير الحزم لكل نظام ({packages} تُستبدل بقائمة الحزم)
+    MANAGERS = {
+        "apt": {"refresh": "apt-get update -y", "install": "apt-get install -y {packages}"},
+        "pacman": {"refresh": "pacman -Sy", "install": "pacman -S --needed --noconfirm {packages}"},
+        "dnf": {"refresh": None, "install": "dnf install -y {packages}"},
+        "brew": {"refresh": None, "install": "brew install {packages}"},
+    }
+
+    # مدير الحزم المستخدم لكل عائلة توزيعات
+    FAMILY_MANAGERS = {"kali": "apt", "debian": "apt", "other": "apt", "arch": "pacman", "fedora": "dnf", "darwin": "brew"}
+
+    BETTERCAP_SOURCE = [
+        "git clone --depth 1 https://github.com/bettercap/bettercap bettercap",
+        "cd bettercap && make build && make install"
+    ]
+    MSF_SOURCE = [
+        "curl -fsSL https://raw.githubusercontent.com/rapid7/metasploit-omnibus/master/config/templates/metasploit-framework-wrappers/msfupdate.erb > msfinstall",
+        "chmod +x msfinstall",
+        "./msfinstall"
+    ]
+    SQLMAP_SOURCE = [
+        "git clone --depth 1 https://github.com/sqlmapproject/sqlmap.git /opt/sqlmap",
+        "ln -sf /opt/sqlmap/sqlmap.py /usr/local/bin/sqlmap"
+    ]
+
+    # وصفة كل أداة حسب عائلة النظام: حزم مدير الحزم و/أو أوامر البناء من المصدر
+    RECIPES = {
+        "bettercap": {
+            "name": "Bettercap", "binary": "bettercap", "url": "https://github.com/bettercap/bettercap",
+            "kali": {"packages": ["bettercap"]},
+            "debian": {"packages": ["build-essential", "libpcap-dev", "libusb-1.0-0-dev", "libnetfilter-queue-dev", "bettercap"]},
+            "arch": {"packages": ["bettercap"]},
+            "fedora": {"packages": ["libpcap-devel", "libusb-devel", "make", "gcc", "git"], "source": BETTERCAP_SOURCE},
+            "other": {"source": BETTERCAP_SOURCE},
+            "darwin": {"source": BETTERCAP_SOURCE},
+            "unsupported": {"source": BETTERCAP_SOURCE},
+        },
+        "nmap": {
+            "name": "Nmap", "binary": "nmap", "url": "https://nmap.org/download.html",
+            "kali": {"packages": ["nmap"]},
+            "debian": {"packages": ["nmap"]},
+            "arch": {"packages": ["nmap"]},
+            "fedora": {"packages": ["nmap"]},
+            "other": {"packages": ["nmap"]},
+            "darwin": {"packages": ["nmap"]},
+        },
+        "wireshark": {
+            "name": "Wireshark", "binary": "wireshark", "url": "https://www.wireshark.org/download.html",
+            "kali": {"packages": ["wireshark"]},
+            "debian": {"packages": ["wireshark"]},
+            "arch": {"packages": ["wireshark-qt"]},
+            "fedora": {"packages": ["wireshark"]},
+            "other": {"packages": ["wireshark"]},
+            "darwin": {"packages": ["wireshark"]},
+        },
+        "metasploit": {
+            "name": "Metasploit Framework", "binary": "msfconsole",
+            "url": "https://github.com/rapid7/metasploit-framework/wiki/Nightly-Installers",
+            "kali": {"packages": ["metasploit-framework"]},
+            "debian": {"packages": ["curl", "gnupg2"], "source": MSF_SOURCE},
+            "arch": {"packages": ["metasploit"]},
+            "fedora": {"packages": ["curl"], "source": MSF_SOURCE},
+            "other": {"source": MSF_SOURCE},
+        },
+        "sqlmap": {
+            "name": "SQLMap", "binary": "sqlmap", "url": "https://github.com/sqlmapproject/sqlmap",
+            "kali": {"packages": ["sqlmap"]},
+            "debian": {"packages": ["sqlmap"]},
+            "arch": {"packages": ["sqlmap"]},
+            "fedora": {"packages": ["sqlmap"]},
+            "other": {"source": SQLMAP_SOURCE},
+            "darwin": {"packages": ["sqlmap"]},
+        },
+    }
+
+    def __init__(self, family=None, workers=4, step_callback=None, probe=None):
+        self.probe = probe or EnvironmentProbe()
+        self.family = family or self.probe.family
+        self.manager = self.MANAGERS.get(self.FAMILY_MANAGERS.get(self.family))
+        self.workers = max(1, int(workers))
+        # تُستدعى بعد انتهاء كل خطوة مع سجل الخطوة
+        self.step_callback = step_callback
+        self.steps = []
+        self._steps_lock = threading.Lock()
+        self._failed_packages = set()
+
+    @staticmethod
+    def detect_family(os_type=None, platform_name=None):
+        """تحديد عائلة نظام التشغيل (يُستدعى platform.platform() مرة واحدة فقط)"""
+        os_type = os_type or platform.system()
+        if os_type == "Darwin":
+            return "darwin"
+        if os_type != "Linux":
+            return "unsupported"
+        name = (platform_name or platform.platform()).lower()
+        if "kali" in name:
+            return "kali"
+        if "ubuntu" in name or "debian" in name:
+            return "debian"
+        if "arch" in name:
+            return "arch"
+        if "fedora" in name or "centos" in name or "rhel" in name:
+            return "fedora"
+        return "other"
+
+    def recipe(self, tool):
+        """وصفة تثبيت الأداة على النظام الحالي أو None إذا لم يكن مدعوماً"""
+        recipe = self.RECIPES[tool].get(self.family)
+        if recipe and recipe.get("packages") and not self.manager:
+            return None
+        return recipe
+
+    def plan(self, tools):
+        """بناء رسم المهام: {اسم المهمة: (الدالة، المهام المعتمد عليها)}"""
+        tasks = {}
+        packages = {}
+        for tool in tools:
+            recipe = self.recipe(tool)
+            if recipe and recipe.get("packages"):
+                packages[tool] = recipe["packages"]
+                
+        package_deps = ()
+        if packages:
+            if self.manager["refresh"]:
+                tasks["refresh"] = (lambda: self._run_step("refresh", self.manager["refresh"]), ())
+                package_deps = ("refresh",)
+            tasks["packages"] = (lambda: self._install_packages(packages), package_deps)
+            
+        for tool in tools:
+            recipe = self.recipe(tool)
+            if recipe and recipe.get("source"):
+                deps = ("packages",) if "packages" in tasks else ()
+                tasks[f"source:{tool}"] = (lambda tool=tool, cmds=recipe["source"]: self._build_source(tool, cmds), deps)
+        return tasks
+
+    def run(self, tools):
+        """تنفيذ رسم المهام وإرجاع نتيجة التثبيت لكل أداة"""
+        tasks = self.plan(tools)
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while len(status) < len(tasks):
+                for name, (func, deps) in tasks.items():
+                    if name in status or name in running.values():
+                        continue
+                    if any(status.get(dep) in ("failed", "skipped") for dep in deps):
+                        # فشل مهمة سابقة يعني تخطي المهام المعتمدة عليها
+                        status[name] = "skipped"
+                        self._record(name, None, None, 0.0, "skipped")
+                    elif all(status.get(dep) == "ok" for dep in deps):
+                        running[executor.submit(func)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name] = "ok" if future.result() else "failed"
+                    except Exception as e:
+                        self._record(name, None, None, 0.0, "failed", str(e))
+                        status[name] = "failed"
+                        
+        # التحقق من نجاح التثبيت بالبحث عن الملف التنفيذي لكل أداة
+        return {tool: self.recipe(tool) is not None and self.probe.has(self.RECIPES[tool]["binary"])
+                for tool in tools}
+
+    def _install_packages(self, packages):
+        """تثبيت حزم جميع الأدوات في عملية واحدة، والرجوع إلى التثبيت لكل أداة على حدة عند الفشل"""
+        combined = list(dict.fromkeys(package for names in packages.values() for package in names))
+        command = self.manager["install"].format(packages=" ".join(combined))
+        if self._run_step("packages", command):
+            return True
+        if len(packages) == 1:
+            self._failed_packages.update(packages)
+            return True
+        # حزمة واحدة غير متوفرة تُفشل العملية كاملة، لذا يُعاد التثبيت لكل أداة حتى لا تتأثر بقية الأدوات
+        for tool, names in packages.items():
+            if not self._run_step(f"packages:{tool}", self.manager["install"].format(packages=" ".join(names))):
+                self._failed_packages.add(tool)
+        return True
+
+    def _build_source(self, tool, commands):
+        """تنفيذ أوامر البناء من المصدر لأداة واحدة داخل مجلد مؤقت خاص بها"""
+        if tool in self._failed_packages:
+            self._record(f"source:{tool}", None, None, 0.0, "skipped")
+            return False
+        workdir = tempfile.mkdtemp(prefix=f"ahmad_{tool}_")
+        try:
+            for command in commands:
+                if not self._run_step(f"source:{tool}", command, cwd=workdir):
+                    return False
+            return True
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _run_step(self, name, command, cwd=None):
+        """تنفيذ أمر واحد وتسجيل زمنه ونتيجته"""
+        started = time.monotonic()
+        process = subprocess.run(command, shell=True, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        duration = time.monotonic() - started
+        if process.returncode != 0:
+            print(f"{Fore.RED}[!] خطأ في تنفيذ الأمر: {command}{Style.RESET_ALL}")
+            print(f"{Fore.RED}الخطأ: {process.stderr.decode(errors='replace')}{Style.RESET_ALL}")
+        self._record(name, command, process.returncode, duration, "ok" if process.returncode == 0 else "failed")
+        return process.returncode == 0
+
+    def _record(self, name, command, returncode, duration, status, error=None):
+        step = {'step': name, 'command': command, 'returncode': returncode,
+                'duration': round(duration, 3), 'status': status}
+        if error:
+            step['error'] = error
+        with self._steps_lock:
+            self.steps.append(step)
+        metrics.inc("toolkit_install_steps_total", step=name, status=status)
+        if command is not None:
+            metrics.observe("toolkit_phase_seconds", duration, operation="install", phase=name)
+        if self.step_callback:
+            self.step_callback(step)
+
+
+class ResultsStore:
+    """قاعدة بيانات SQLite (بوضع WAL) لتخزين نتائج المسح والاستعلام عنها عبر الفهارس"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scans (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        target TEXT,
+        scan_type TEXT,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        source_file TEXT UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS hosts (
+        id INTEGER PRIMARY KEY,
+        scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+        ts REAL NOT NULL,
+        ip TEXT,
+        mac TEXT,
+        vendor TEXT,
+        hostname TEXT,
+        status TEXT,
+        os TEXT
+    );
+    CREATE TABLE IF NOT EXISTS ports (
+        host_id INTEGER NOT NULL REFERENCES hosts(id) ON DELETE CASCADE,
+        scan_id INTEGER NOT NULL,
+        ts REAL NOT NULL,
+        ip TEXT NOT NULL,
+        port INTEGER NOT NULL,
+        protocol TEXT NOT NULL,
+        state TEXT,
+        service TEXT,
+        product TEXT,
+        version TEXT
+    );
+    CREATE TABLE IF NOT EXISTS wifi (
+        scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+        ts REAL NOT NULL,
+        ssid TEXT,
+        bssid TEXT,
+        channel INTEGER,
+        frequency REAL,
+        signal INTEGER,
+        quality REAL,
+        encrypted INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_scans_target ON scans(target, started_at);
+    CREATE INDEX IF NOT EXISTS idx_hosts_ip ON hosts(ip, ts);
+    CREATE INDEX IF NOT EXISTS idx_hosts_mac ON hosts(mac, ts);
+    CREATE INDEX IF NOT EXISTS idx_hosts_ts ON hosts(ts);
+    CREATE INDEX IF NOT EXISTS idx_hosts_scan ON hosts(scan_id);
+    CREATE INDEX IF NOT EXISTS idx_ports_port ON ports(port, state, ts);
+    CREATE INDEX IF NOT EXISTS idx_ports_service ON ports(service, ts);
+    CREATE INDEX IF NOT EXISTS idx_ports_ip ON ports(ip, ts);
+    CREATE INDEX IF NOT EXISTS idx_ports_ts ON ports(ts);
+    CREATE INDEX IF NOT EXISTS idx_ports_host ON ports(host_id);
+    CREATE INDEX IF NOT EXISTS idx_wifi_ssid ON wifi(ssid, ts);
+    CREATE INDEX IF NOT EXISTS idx_wifi_bssid ON wifi(bssid, ts);
+    CREATE INDEX IF NOT EXISTS idx_wifi_ts ON wifi(ts);
+    """
+
+    # عدد السجلات في كل دفعة إدخال
+    BATCH_SIZE = 5000
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """تحويل قواعد البيانات القديمة: عمود quality كان نصاً (مثل "70/70 (100%)") وأصبح نسبة REAL"""
+        columns = {row[1]: row[2] for row in self.conn.execute("PRAGMA table_info(wifi)")}
+        if columns.get("quality", "REAL").upper() == "REAL":
+            return
+        # نص واحد بين BEGIN و COMMIT: الفهارس تنتقل مع الجدول عند إعادة تسميته فتُحذف أولاً ليعيد SCHEMA إنشاءها
+        self.conn.create_function("quality_ratio", 1, _quality_ratio)
+        self.conn.executescript(
+            "BEGIN; DROP INDEX IF EXISTS idx_wifi_ssid; DROP INDEX IF EXISTS idx_wifi_bssid; DROP INDEX IF EXISTS idx_wifi_ts;"
+            "ALTER TABLE wifi RENAME TO wifi_old;" + self.SCHEMA +
+            "INSERT INTO wifi (scan_id, ts, ssid, bssid, channel, frequency, signal, quality, encrypted) "
+            "SELECT scan_id, ts, ssid, bssid, channel, frequency, signal, quality_ratio(quality), encrypted FROM wifi_old;"
+            "DROP TABLE wifi_old; COMMIT;"
+        )
+
+    def close(self):
+        """إغلاق الاتصال بقاعدة البيانات"""
+        with self._lock:
+            self.conn.close()
+
+    def _add_scan(self, kind, target, scan_type, started_at, source_file):
+        cursor = self.conn.execute(
+            "INSERT INTO scans (kind, target, scan_type, started_at, source_file) VALUES (?, ?, ?, ?, ?)",
+            (kind, target, scan_type, started_at, source_file)
+        )
+        return cursor.lastrowid
+
+    def has_source(self, source_file):
+        """التحقق مما إذا كان ملف النتائج قد أُدخل مسبقاً"""
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM scans WHERE source_file = ?", (source_file,)).fetchone()
+        return row is not None
+
+    def ingest_nmap(self, xml_file, target=None, scan_type=None, on_record=None):
+        """إدخال تقرير nmap في قاعدة البيانات بشكل تدريجي وإرجاع رقم المسح
+
+        on_record: دالة تستقبل كل سجل جهاز أثناء نفس المرور (مثل CompactDevices.append_record).
+        """
+        started_at = os.path.getmtime(xml_file)
+        with self._lock, self.conn:
+            scan_id = self._add_scan("nmap", target, scan_type, started_at, os.path.abspath(xml_file))
+            ports = []
+            for record in iter_nmap_hosts(xml_file):
+                if on_record is not None:
+                    on_record(record)
+                ip = record['ipv4'] or record['ipv6']
+                if not ip:
+                    continue
+                ts = record['endtime'] or started_at
+                cursor = self.conn.execute(
+                    "INSERT INTO hosts (scan_id, ts, ip, mac, vendor, hostname, status, os) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scan_id, ts, ip, record['mac'], record['vendor'],
+                     record['hostnames'][0]['name'] if record['hostnames'] else None,
+                     record['status'], record['os_matches'][0]['name'] if record['os_matches'] else None)
+                )
+                host_id = cursor.lastrowid
+                for port in record['ports']:
+                    ports.append((host_id, scan_id, ts, ip, port['port'], port['protocol'], port['state'],
+                                  port['service'], port['product'], port['version']))
+                if len(ports) >= self.BATCH_SIZE:
+                    self._insert_ports(ports)
+                    ports = []
+            self._insert_ports(ports)
+            self.conn.execute("UPDATE scans SET finished_at = ? WHERE id = ?", (time.time(), scan_id))
+        return scan_id
+
+    def _insert_ports(self, rows):
+        if rows:
+            self.conn.executemany(
+                "INSERT INTO ports (host_id, scan_id, ts, ip, port, protocol, state, service, product, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def ingest_wifi(self, networks, interface=None, source_file=None, started_at=None):
+        """إدخال نتائج مسح الشبكات اللاسلكية وإرجاع رقم المسح
+
+        started_at وقت المسح (مثل وقت تعديل ملف قديم عند استيراده)، والافتراضي الوقت الحالي.
+        """
+        now = time.time() if started_at is None else started_at
+        with self._lock, self.conn:
+            scan_id = self._add_scan("wifi", interface, None, now, os.path.abspath(source_file) if source_file else None)
+            self.conn.executemany(
+                "INSERT INTO wifi (scan_id, ts, ssid, bssid, channel, frequency, signal, quality, encrypted) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scan_id, now, n.get('ssid'), n.get('bssid'), _to_int(n.get('channel')), _to_float(n.get('frequency')),
+                  _to_int(n.get('signal')), _quality_ratio(n.get('quality')), int(n.get('encryption') == "مشفرة"))
+                 for n in networks]
+            )
+            self.conn.execute("UPDATE scans SET finished_at = ? WHERE id = ?", (time.time(), scan_id))
+        return scan_id
+
+    def query_ports(self, ip=None, port=None, service=None, protocol=None, state="open", since=None, until=None, limit=None):
+        """الاستعلام عن المنافذ المخزنة (مثال: جميع الأجهزة التي لديها المنفذ 445 مفتوحاً منذ 7 أيام)"""
+        clauses, params = [], []
+        for column, value in (("ip", ip), ("port", port), ("service", service), ("protocol", protocol), ("state", state)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._select("ports", clauses, params, since, until, limit)
+
+    def query_hosts(self, ip=None, mac=None, status=None, since=None, until=None, limit=None):
+        """الاستعلام عن الأجهزة المخزنة حسب العنوان أو الحالة والفترة الزمنية"""
+        clauses, params = [], []
+        for column, value in (("ip", ip), ("mac", mac), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._select("hosts", clauses, params, since, until, limit)
+
+    def query_wifi(self, ssid=None, bssid=None, since=None, until=None, limit=None):
+        """الاستعلام عن الشبكات اللاسلكية المخزنة"""
+        clauses, params = [], []
+        for column, value in (("ssid", ssid), ("bssid", bssid)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._select("wifi", clauses, params, since, until, limit)
+
+    def _select(self, table, clauses, params, since, until, limit):
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        sql = f"SELECT * FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def last_scan_id(self, target, kind="nmap", scan_type=None):
+        """رقم آخر مسح مخزن لنفس الهدف، أو None"""
+        sql = "SELECT id FROM scans WHERE target = ? AND kind = ?"
+        params = [target, kind]
+        if scan_type is not None:
+            sql += " AND scan_type = ?"
+            params.append(scan_type)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT 1"
+        with self._lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def scan_fingerprint(self, scan_id):
+        """بصمة المنافذ المفتوحة لكل جهاز نشط في مسح مخزن على شكل {ip: [port/protocol]}"""
+        with self._lock:
+            fingerprint = {row[0]: [] for row in self.conn.execute(
+                "SELECT ip FROM hosts WHERE scan_id = ? AND status = 'up'", (scan_id,))}
+            for ip, port, protocol in self.conn.execute(
+                    "SELECT ip, port, protocol FROM ports WHERE scan_id = ? AND state = 'open'", (scan_id,)):
+                if ip in fingerprint:
+                    fingerprint[ip].append(f"{port}/{protocol}")
+        return {ip: sorted(ports) for ip, ports in fingerprint.items()}
+
+    def import_directory(self, directory):
+        """إدخال ملفات النتائج القديمة (scan_*.xml و wifi_scan_*.json) التي لم تُدخل بعد"""
+        imported = 0
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if self.has_source(os.path.abspath(path)):
+                continue
+            try:
+                if name.startswith("scan_") and name.endswith(".xml"):
+                    self.ingest_nmap(path)
+                elif name.startswith("wifi_scan_") and name.endswith(".json"):
+                    with open(path, 'r') as f:
+                        self.ingest_wifi(json.load(f), source_file=path, started_at=os.path.getmtime(path))
+                else:
+                    continue
+                imported += 1
+            except (ET.ParseError, ValueError, OSError):
+                continue
+        return imported
+
+
+
+class ScanQueue:
+    """طابور مهام مسح دائم على القرص (SQLite) يسمح باستئناف الدفعات بعد التوقف أو الانهيار"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        batch TEXT NOT NULL,
+        target TEXT NOT NULL,
+        scan_type TEXT NOT NULL,
+        subnet TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_run REAL NOT NULL DEFAULT 0,
+        progress REAL NOT NULL DEFAULT 0,
+        result_file TEXT,
+        error TEXT,
+        created REAL NOT NULL,
+        updated REAL NOT NULL,
+        UNIQUE (batch, target, scan_type)
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (batch, status, next_run);
+    """
+
+    # عدد الصفوف في كل عملية إدخال
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        """إغلاق الاتصال بقاعدة البيانات"""
+        with self._lock:
+            self.conn.close()
+
+    def add(self, batch, targets, scan_type):
+        """إضافة أهداف إلى الدفعة (الأهداف الموجودة مسبقاً تُتجاهل) وإرجاع عدد المضاف"""
+        now = time.time()
+        added = 0
+        rows = []
+        with self._lock, self.conn:
+            for target in targets:
+                rows.append((batch, target, scan_type, target_subnet(target), now, now))
+                if len(rows) >= self.BATCH_SIZE:
+                    added += self._insert(rows)
+                    rows = []
+            if rows:
+                added += self._insert(rows)
+        return added
+
+    def _insert(self, rows):
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (batch, target, scan_type, subnet, created, updated) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return self.conn.total_changes - before
+
+    def recover(self, batch):
+        """إعادة المهام التي كانت قيد التنفيذ عند توقف البرنامج إلى الانتظار"""
+        return self._update("UPDATE jobs SET status = 'pending', progress = 0, updated = ? WHERE batch = ? AND status = 'running'",
+                            (time.time(), batch))
+
+    def ready(self, batch, now, limit=100):
+        """المهام الجاهزة للتنفيذ حسب ترتيب الإضافة"""
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(
+                "SELECT * FROM jobs WHERE batch = ? AND status = 'pending' AND next_run <= ? ORDER BY id LIMIT ?",
+                (batch, now, limit))]
+
+    def next_wakeup(self, batch):
+        """أقرب وقت تصبح فيه مهمة منتظرة جاهزة، أو None إذا لم تبقَ مهام"""
+        with self._lock:
+            row = self.conn.execute("SELECT MIN(next_run) FROM jobs WHERE batch = ? AND status = 'pending'", (batch,)).fetchone()
+        return row[0]
+
+    def start(self, job_id):
+        self._update("UPDATE jobs SET status = 'running', attempts = attempts + 1, progress = 0, updated = ? WHERE id = ?",
+                     (time.time(), job_id))
+
+    def set_progress(self, job_id, percent):
+        self._update("UPDATE jobs SET progress = ?, updated = ? WHERE id = ?", (percent, time.time(), job_id))
+
+    def finish(self, job_id, result_file):
+        self._update("UPDATE jobs SET status = 'done', progress = 100, result_file = ?, error = NULL, updated = ? WHERE id = ?",
+                     (result_file, time.time(), job_id))
+
+    def fail(self, job_id, error, retries, backoff):
+        """تسجيل فشل المهمة وجدولة إعادة المحاولة بتأخير متزايد أو وسمها كفاشلة نهائياً"""
+        with self._lock:
+            attempts = self.conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        now = time.time()
+        if attempts > retries:
+            self._update("UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?", (error, now, job_id))
+            return "failed"
+        delay = min(backoff * 2 ** (attempts - 1), 3600) * random.uniform(1.0, 1.5)
+        self._update("UPDATE jobs SET status = 'pending', error = ?, next_run = ?, updated = ? WHERE id = ?",
+                     (error, now + delay, now, job_id))
+        return "pending"
+
+    def requeue(self, job_id):
+        """إعادة المهمة إلى الانتظار بدون احتساب المحاولة (عند الإيقاف اليدوي)"""
+        self._update("UPDATE jobs SET status = 'pending', attempts = MAX(attempts - 1, 0), progress = 0, updated = ? WHERE id = ?",
+                     (time.time(), job_id))
+
+    def counts(self, batch):
+        """عدد المهام حسب الحالة"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status", (batch,)).fetchall()
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def batches(self):
+        """ملخص جميع الدفعات في الطابور"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT batch, COUNT(*) AS total, SUM(status = 'done') AS done, SUM(status = 'failed') AS failed, "
+                "SUM(status IN ('pending', 'running')) AS remaining, MIN(created) AS created, MAX(updated) AS updated "
+                "FROM jobs GROUP BY batch ORDER BY created").fetchall()
+        return [dict(row) for row in rows]
+
+    def jobs(self, batch, status=None):
+        """مهام الدفعة (مع إمكانية التصفية حسب الحالة)"""
+        sql = "SELECT * FROM jobs WHERE batch = ?"
+        params = [batch]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql + " ORDER BY id", params)]
+
+    def _update(self, sql, params):
+        with self._lock, self.conn:
+            return self.conn.execute(sql, params).rowcount
+
+
+class FingerprintCache:
+    """ذاكرة مؤقتة لنتائج اكتشاف الإصدارات (-sV) لكل (عنوان، منفذ، بروتوكول) على القرص (SQLite)
+
+    الإدخال صالح حتى انتهاء ttl ثانية وما دامت بصمة الشعار (banner) لم تتغير. عند تجاوز max_entries
+    تُحذف الإدخالات الأقدم استخداماً (LRU).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        ip TEXT NOT NULL,
+        port INTEGER NOT NULL,
+        protocol TEXT NOT NULL,
+        banner_hash TEXT,
+        service TEXT,
+        product TEXT,
+        version TEXT,
+        extrainfo TEXT,
+        tunnel TEXT,
+        cpe TEXT,
+        fingerprinted_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (ip, port, protocol)
+    );
+    CREATE INDEX IF NOT EXISTS idx_fingerprints_lru ON fingerprints (last_used);
+    """
+
+    FIELDS = ("service", "product", "version", "extrainfo", "tunnel")
+
+    def __init__(self, db_path, ttl=86400, max_entries=100000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def lookup(self, endpoints, banners):
+        """تقسيم المنافذ إلى (نتائج صالحة من الذاكرة، منافذ تحتاج اكتشاف الإصدار)
+
+        endpoints قائمة (ip, port, protocol) و banners قاموس {(ip, port): بصمة الشعار أو None}.
+        """
+        now = time.time()
+        hits, misses = {}, []
+        with self._lock, self.conn:
+            for ip, port, protocol in endpoints:
+                row = self.conn.execute(
+                    "SELECT * FROM fingerprints WHERE ip = ? AND port = ? AND protocol = ?", (ip, port, protocol)
+                ).fetchone()
+                banner = banners.get((ip, port)) if protocol == "tcp" else None
+                # تعذر الاتصال لقراءة الشعار (None) يعني أن حالة المنفذ غير مؤكدة فيُعاد فحصه
+                fresh = (row is not None and now - row['fingerprinted_at'] < self.ttl
+                         and (protocol != "tcp" or banner is not None and banner == row['banner_hash']))
+                if fresh:
+                    hits[(ip, port, protocol)] = dict(row)
+                else:
+                    misses.append((ip, port, protocol))
+            if hits:
+                self.conn.executemany("UPDATE fingerprints SET last_used = ? WHERE ip = ? AND port = ? AND protocol = ?",
+                                      [(now,) + key for key in hits])
+        return hits, misses
+
+    def store(self, entries):
+        """حفظ نتائج اكتشاف الإصدار: قائمة قواميس فيها ip و port و protocol و banner_hash وحقول الخدمة"""
+        now = time.time()
+        rows = [(e['ip'], e['port'], e['protocol'], e.get('banner_hash'))
+                + tuple(e.get(field) for field in self.FIELDS) + (json.dumps(e.get('cpe') or []), now, now)
+                for e in entries]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (ip, port, protocol, banner_hash, service, product, version, "
+                "extrainfo, tunnel, cpe, fingerprinted_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._evict()
+        return len(rows)
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        if self.max_entries and count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM fingerprints WHERE rowid IN (SELECT rowid FROM fingerprints ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+
+# سطر من سجل النشاط النصي القديم (history.log): [YYYY-mm-dd HH:MM:SS] الرسالة
+_LEGACY_LOG_RE = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?(.*)$')
+
+
+class ActivityLogger:
+    """مسجل نشاط آمن للخيوط يكتب أحداثاً منظمة بصيغة JSONL إلى ذاكرة مؤقتة ثم يفرغها دفعة واحدة
+
+    كل دفعة تُكتب إلى الملف يُسجل لها سطر في ملف فهرس جانبي (<path>.idx) يحتوي على موضعها
+    ونطاقها الزمني وأنواع الأحداث فيها، فيمكن للاستعلامات القفز مباشرة إلى الأجزاء المطلوبة.
+    """
+
+    # فترات التدوير الزمني المدعومة وصيغة الفترة المستخدمة للمقارنة
+    ROTATION_PERIODS = {"hourly": "%Y%m%d%H", "daily": "%Y%m%d", "weekly": "%G%V"}
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_when=None, backup_count=5,
+                 compress=True, flush_interval=1.0, buffer_lines=256):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.max_bytes = max_bytes
+        self.rotate_when = rotate_when if rotate_when in self.ROTATION_PERIODS else None
+        self.backup_count = max(1, int(backup_count))
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.buffer_lines = buffer_lines
+        # عناصر الذاكرة المؤقتة: (السطر، الوقت، نوع الحدث)
+        self._buffer = []
+        # قفل للذاكرة المؤقتة وقفل منفصل للكتابة والتدوير حتى لا ينتظر المسار السريع عمليات القرص
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher = None
+        self._closed = threading.Event()
+        atexit.register(self.close)
+
+    def log(self, event, **fields):
+        """إضافة حدث منظم إلى الذاكرة المؤقتة (المسار السريع)"""
+        now = time.time()
+        record = {'ts': round(now, 3), 'time': datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"), 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._buffer_lock:
+            self._buffer.append((line, now, event))
+            pending = len(self._buffer)
+        if pending >= self.buffer_lines:
+            self.flush()
+        elif self._flusher is None:
+            self._start_flusher()
+
+    def _start_flusher(self):
+        with self._buffer_lock:
+            if self._flusher is not None or not self.flush_interval:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="activity-log-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                # الأحداث بقيت في الذاكرة المؤقتة وستُكتب في المحاولة التالية
+                continue
+
+    def flush(self):
+        """كتابة محتوى الذاكرة المؤقتة إلى الملف وتسجيل الدفعة في الفهرس
+
+        قفل الكتابة يُحجز قبل أخذ الذاكرة المؤقتة حتى تُكتب الدفعات بترتيبها، وعند فشل الكتابة
+        تُعاد الأحداث إلى بداية الذاكرة المؤقتة بدلاً من ضياعها.
+        """
+        with self._write_lock:
+            with self._buffer_lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+            data = "".join(line for line, _, _ in pending).encode("utf-8")
+            entry = {
+                'first_ts': round(min(ts for _, ts, _ in pending), 3),
+                'last_ts': round(max(ts for _, ts, _ in pending), 3),
+                'events': sorted({event for _, _, event in pending}),
+                'length': len(data)
+            }
+            written = False
+            try:
+                with metrics.phase("activity_log", "flush"):
+                    self._rotate_if_needed(len(data))
+                    with open(self.path, 'ab') as f:
+                        # قفل الملف حتى لا تتداخل الكتابة مع عمليات أخرى بين تحديد الموضع والكتابة
+                        if fcntl:
+                            fcntl.flock(f, fcntl.LOCK_EX)
+                        try:
+                            entry['offset'] = f.seek(0, os.SEEK_END)
+                            f.write(data)
+                            f.flush()
+                            written = True
+                            with open(self.index_path, 'a') as index:
+                                index.write(json.dumps(entry) + "\n")
+                        finally:
+                            if fcntl:
+                                fcntl.flock(f, fcntl.LOCK_UN)
+            except BaseException:
+                if not written:
+                    with self._buffer_lock:
+                        self._buffer[:0] = pending
+                raise
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_size == 0:
+            return
+        if self.max_bytes and stat.st_size + incoming > self.max_bytes:
+            self._rotate()
+        elif self.rotate_when:
+            period = self.ROTATION_PERIODS[self.rotate_when]
+            if datetime.fromtimestamp(stat.st_mtime).strftime(period) != datetime.now().strftime(period):
+                self._rotate()
+
+    def rotate(self):
+        """تدوير ملف السجل الحالي فوراً"""
+        self.flush()
+        with self._write_lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                self._rotate()
+
+    def segments(self):
+        """قائمة أجزاء السجل (المسار، مسار الفهرس) من الأقدم إلى الأحدث وآخرها الملف الحالي"""
+        paths = []
+        for index in range(self.backup_count, 0, -1):
+            for path in (f"{self.path}.{index}.gz", f"{self.path}.{index}"):
+                if os.path.exists(path):
+                    paths.append((path, f"{self.path}.{index}.idx"))
+        if os.path.exists(self.path):
+            paths.append((self.path, self.index_path))
+        return paths
+
+    def _rotate(self):
+        # إزاحة الأجزاء القديمة وفهارسها: N-1 -> N مع حذف ما يتجاوز العدد المسموح
+        for index in range(self.backup_count, 0, -1):
+            for suffix in (".gz", "", ".idx"):
+                source = f"{self.path}.{index}{suffix}"
+                if not os.path.exists(source):
+                    continue
+                if index == self.backup_count:
+                    os.remove(source)
+                else:
+                    os.replace(source, f"{self.path}.{index + 1}{suffix}")
+        if os.path.exists(self.index_path):
+            os.replace(self.index_path, f"{self.path}.1.idx")
+        if not self.compress:
+            os.replace(self.path, f"{self.path}.1")
+            return
+        # ضغط الجزء بشكل تدفقي (ذاكرة ثابتة)
+        staging = f"{self.path}.rotating"
+        os.replace(self.path, staging)
+        with metrics.phase("activity_log", "compress"), open(staging, 'rb') as src, gzip.open(f"{self.path}.1.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(staging)
+
+    def query(self, since=None, until=None, events=None):
+        """المرور على الأحداث المطابقة للفترة الزمنية وأنواع الأحداث باستخدام الفهرس الجانبي"""
+        self.flush()
+        events = set(events) if events else None
+        for path, index_path in self.segments():
+            blocks = self._load_index(index_path)
+            if blocks is not None:
+                # تخطي الدفعات (والأجزاء كاملة) التي لا تتقاطع مع الفلتر
+                blocks = [b for b in blocks
+                          if (since is None or b['last_ts'] >= since)
+                          and (until is None or b['first_ts'] < until)
+                          and (events is None or events.intersection(b['events']))]
+                if not blocks:
+                    continue
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, 'rb') as f:
+                if blocks is None:
+                    # جزء بدون فهرس: قراءة كاملة
+                    chunks = [f]
+                else:
+                    chunks = []
+                    for block in blocks:
+                        f.seek(block['offset'])
+                        chunks.append(f.read(block['length']).splitlines())
+                for chunk in chunks:
+                    for line in chunk:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if not isinstance(record, dict):
+                            continue
+                        ts = record.get('ts', 0)
+                        if since is not None and ts < since:
+                            continue
+                        if until is not None and ts >= until:
+                            continue
+                        if events is not None and record.get('event') not in events:
+                            continue
+                        yield record
+
+    def import_legacy(self, legacy_path, backup_count=5):
+        """استيراد سجل النشاط النصي القديم (مع أجزائه المدورة) كأقدم أحداث هذا السجل
+
+        الأسطر تصبح أحداثاً من نوع message، والأسطر التي لا تبدأ بوقت تُضاف إلى رسالة السطر السابق.
+        تُعاد كتابة السجل الحالي بعدها مع فهرس جديد، ثم تُعاد تسمية الملفات القديمة بإضافة .imported.
+        تُرجع عدد الأحداث المستوردة.
+        """
+        sources = [path for index in range(backup_count, 0, -1)
+                   for path in (f"{legacy_path}.{index}.gz", f"{legacy_path}.{index}") if os.path.exists(path)]
+        if os.path.exists(legacy_path):
+            sources.append(legacy_path)
+        if not sources:
+            return 0
+        self.flush()
+
+        def legacy_records():
+            record = None
+            for source in sources:
+                opener = gzip.open if source.endswith(".gz") else open
+                with opener(source, 'rt', encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        line = line.rstrip("\n")
+                        m = _LEGACY_LOG_RE.match(line)
+                        if m:
+                            if record:
+                                yield record
+                            ts = datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+                            record = {'ts': round(ts, 3), 'time': m.group(1), 'event': "message",
+                                      'message': m.group(2), 'legacy': True}
+                        elif record and line:
+                            record['message'] += "\n" + line
+            if record:
+                yield record
+
+        def current_lines():
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict):
+                        yield line.decode("utf-8", "replace").rstrip("\n") + "\n", record.get('ts', 0), record.get('event', "message")
+
+        imported = 0
+
+        def entries():
+            nonlocal imported
+            for record in legacy_records():
+                imported += 1
+                yield json.dumps(record, ensure_ascii=False) + "\n", record['ts'], record['event']
+            yield from current_lines()
+
+        staging, staging_index = self.path + ".importing", self.index_path + ".importing"
+        with self._write_lock:
+            with open(staging, 'wb') as out, open(staging_index, 'w') as index:
+                for batch in _batched(entries(), self.buffer_lines):
+                    data = "".join(line for line, _, _ in batch).encode("utf-8")
+                    index.write(json.dumps({'first_ts': round(min(ts for _, ts, _ in batch), 3),
+                                            'last_ts': round(max(ts for _, ts, _ in batch), 3),
+                                            'events': sorted({event for _, _, event in batch}),
+                                            'length': len(data), 'offset': out.tell()}) + "\n")
+                    out.write(data)
+            os.replace(staging, self.path)
+            os.replace(staging_index, self.index_path)
+        for source in sources:
+            os.replace(source, source + ".imported")
+        return imported
+
+    @staticmethod
+    def _load_index(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        """إيقاف خيط التفريغ وكتابة ما تبقى في الذاكرة المؤقتة"""
+        self._closed.set()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+
+class AhmadToolkit:
+    # أنواع المسح المتاحة وخيارات nmap الخاصة بكل منها
+    SCAN_OPTIONS = {
+        "quick": "-sn",  # مسح سريع لاكتشاف الأجهزة فقط
+        "discovery": "-T4 -F",  # اكتشاف سريع لأشهر 100 منفذ (بصمة المنافذ المفتوحة)
+        "basic": "-sV -O --osscan-limit",  # مسح أساسي لاكتشاف الخدمات ونظام التشغيل
+        "full": "-sS -sV -O -A",  # مسح كامل مع اكتشاف متقدم
+        "vuln": "-sV --script=vuln"  # مسح للثغرات الأمنية
+    }
+    
+    # لون وبادئة رسائل الحالة حسب مستواها
+    MESSAGE_STYLES = {
+        "info": (Fore.CYAN, "[*]"),
+        "notice": (Fore.YELLOW, "[*]"),
+        "success": (Fore.GREEN, "[+]"),
+        "warning": (Fore.YELLOW, "[!]"),
+        "error": (Fore.RED, "[!]")
+    }
+    
+    def __init__(self, headless=False, on_message=None):
+        """headless: وضع المكتبة (بدون طباعة أو أسئلة، والأخطاء كاستثناءات ToolkitError)
+        on_message: دالة (level, message) تستقبل رسائل الحالة بدلاً من طباعتها
+        """
+        self.headless = headless
+        self.on_message = on_message
+        # تعريف شعار متحرك بألوان متعددة
+        self.banner = f"""
+{random.choice(colors)}
+     ▄▄▄      ██░ ██  ███▄ ▄███▓ ▄▄▄      ▓█████▄     
+    ▒████▄    ▓██░ ██▒▓██▒▀█▀ ██▒▒████▄    ▒██▀ ██▌    
+    ▒██  ▀█▄  ▒██▀▀██░▓██    ▓██░▒██  ▀█▄  ░██   █▌    
+    ░██▄▄▄▄██ ░▓█ ░██ ▒██    ▒██ ░██▄▄▄▄██ ░▓█▄   ▌    
+     ▓█   ▓██▒░▓█▒░██▓▒██▒   ░██▒ ▓█   ▓██▒░▒████▓     
+     ▒▒   ▓▒█░ ▒ ░░▒░▒░ ▒░   ░  ░ ▒▒   ▓▒█░ ▒▒▓  ▒     
+      ▒   ▒▒ ░ ▒ ░▒░ ░░  ░      ░  ▒   ▒▒ ░ ░ ▒  ▒     
+      ░   ▒    ░  ░░ ░░      ░     ░   ▒    ░ ░  ░     
+          ░  ░ ░  ░  ░       ░         ░  ░   ░        
+                                            ░          
+{random.choice(colors)}    _______ ____   ____  _     _  _____ _______ 
+{random.choice(colors)}   |__   __/ __ \\ / __ \\| |   | |/ ____|__   __|
+{random.choice(colors)}      | | | |  | | |  | | |   | | |  __   | |   
+{random.choice(colors)}      | | | |  | | |  | | |   | | | |_ |  | |   
+{random.choice(colors)}      | | | |__| | |__| | |___| | |__| |  | |   
+{random.choice(colors)}      |_|  \\____/ \\____/ \\_____/ \\_____|  |_|   
+                                                        
+{Fore.YELLOW}[+] تم التطوير بواسطة Ahmad | v2.0.0
+{Fore.CYAN}[+] https://github.com/ahmad/toolkit
+{Style.RESET_ALL}
+        """
+        self.os_type = platform.system()
+        self.is_root = os.geteuid() == 0 if self.os_type == "Linux" else False
+        self.tools_path = os.path.join(os.path.expanduser("~"), ".ahmad_toolkit")
+        self.config_file = os.path.join(self.tools_path, "config.json")
+        self.logs_dir = os.path.join(self.tools_path, "logs")
+        self.history_file = os.path.join(self.logs_dir, "history.jsonl")
+        self.scan_results = os.path.join(self.logs_dir, "scan_results")
+        self.results_db = os.path.join(self.tools_path, "results.db")
+        self.queue_db = os.path.join(self.tools_path, "queue.db")
+        self.fingerprints_db = os.path.join(self.tools_path, "fingerprints.db")
+        self._fingerprint_cache = None
+        self._result_files = set()
+        self._result_files_lock = threading.Lock()
+        self._rate_tuners = {}
+        self._rate_tuners_lock = threading.Lock()
+        self._config_lock = threading.Lock()
+        # فحص البيئة (التوزيعة ومواقع البرامج) مع ذاكرة مؤقتة مشتركة بين التشغيلات
+        self.env = EnvironmentProbe(os.path.join(self.tools_path, "env_cache.json"))
+        self._results_store = None
+        # فتح قاعدة النتائج وذاكرة البصمات مرة واحدة حتى عند أول استخدام من عدة خيوط (وضع الخدمة)
+        self._stores_lock = threading.Lock()
+        # يتم تعطيله في وضع سطر الأوامر غير التفاعلي (مثل --json) وفي وضع المكتبة
+        self.interactive = not headless
+        
+        # إنشاء المجلدات اللازمة إذا لم تكن موجودة
+        self.setup_directories()
+        
+        # تحميل الإعدادات
+        self.load_config()
+        
+        # مسجل النشاط
+        self.logger = ActivityLogger(
+            self.history_file,
+            max_bytes=int(self.config.get("max_log_size", 10) * 1024 * 1024),
+            rotate_when=self.config.get("log_rotation"),
+            backup_count=self.config.get("log_backup_count", 5),
+            compress=self.config.get("log_compress", True),
+            flush_interval=self.config.get("log_flush_interval", 1.0)
+        )
+        # سجل النشاط النصي من الإصدارات السابقة يُستورد مرة واحدة
+        legacy_log = os.path.join(self.logs_dir, "history.log")
+        if os.path.exists(legacy_log):
+            try:
+                imported = self.logger.import_legacy(legacy_log, self.config.get("log_backup_count", 5))
+                self.notify(f"تم استيراد {imported} حدث من سجل النشاط القديم", "success")
+            except Exception as e:
+                self.notify(f"خطأ في استيراد سجل النشاط القديم: {str(e)}", "warning")
+        
+        # وضع البدء السريع: بدون رسوم متحركة أو تحقق من التحديثات
+        self.fast_start = headless or bool(self.config.get("fast_start", False))
+        
+        # سجل المقاييس المشترك (metrics.summary() أو metrics.prometheus() في وضع المكتبة)
+        self.metrics = metrics
+        if self.config.get("metrics_enabled", False):
+            metrics.enabled = True
+        
+        # جرد واجهات الشبكة (من /sys و rtnetlink بدون تشغيل أوامر لكل واجهة)
+        self.inventory = InterfaceInventory(ttl=self.config.get("interface_cache_ttl", 2))
+        
+    def setup_directories(self):
+        """إنشاء المجلدات اللازمة للأداة"""
+        try:
+            if not os.path.exists(self.tools_path):
+                os.makedirs(self.tools_path)
+            if not os.path.exists(self.logs_dir):
+                os.makedirs(self.logs_dir)
+            if not os.path.exists(self.scan_results):
+                os.makedirs(self.scan_results)
+        except Exception as e:
+            self.notify(f"خطأ في إنشاء المجلدات: {str(e)}", "error")
+            
+    def notify(self, message, level="info"):
+        """رسالة حالة: تُمرر إلى on_message إن وُجد، وتُطبع ملونة في سطر الأوامر، وتُتجاهل في وضع المكتبة"""
+        if self.on_message is not None:
+            self.on_message(level, message)
+        elif not self.headless:
+            color, prefix = self.MESSAGE_STYLES.get(level, self.MESSAGE_STYLES["info"])
+            print(f"{color}{prefix} {message}{Style.RESET_ALL}")
+            
+    def load_config(self):
+        """تحميل إعدادات الأداة"""
+        default_config = {
+            "auto_check_updates": True,
+            "default_scan_type": "quick",
+            "scan_shard_size": 0,  # عدد العناوين في كل جزء (0 = بدون تقسيم)
+            "scan_workers": 0,  # عدد عمليات nmap المتوازية (0 = عدد المعالجات)
+            "install_workers": 4,  # عدد عمليات البناء من المصدر المتوازية عند التثبيت
+            "scan_engine": "auto",  # nmap أو native أو auto
+            "native_concurrency": 256,  # عدد الاتصالات المتزامنة في المحرك المدمج
+            "native_host_rate": 0,  # محاولات الاتصال في الثانية لكل جهاز (0 = بدون حد)
+            "native_timeout": 1.0,  # مهلة الاتصال بالثواني
+            "native_retries": 1,
+            "nmap_stats_interval": "2s",  # الفاصل الزمني لإحصائيات تقدم nmap
+            "scan_profiles": {},  # ملفات مسح إضافية: {"الاسم": {"base": "basic", "timing": 4, "max_rate": 1000, ...}}
+            "auto_tune_shard_size": 256,  # حجم الأجزاء في ملفات المسح ذات الضبط التلقائي للمعدل
+            "fingerprint_cache": True,  # تخطي اكتشاف الإصدارات (-sV) للمنافذ التي لم تتغير بصمة شعارها
+            "fingerprint_cache_ttl": 86400,  # مدة صلاحية بصمة الخدمة بالثواني
+            "fingerprint_cache_size": 100000,  # الحد الأقصى لعدد البصمات المحفوظة (يُحذف الأقدم استخداماً)
+            "fingerprint_banner_timeout": 2.0,  # مهلة قراءة الشعار بالثواني
+            "scan_stall_timeout": 0,  # إيقاف المسح إذا لم يتقدم خلال هذه المدة بالثواني (0 = معطل)
+            "enable_logging": True,
+            "store_results": True,  # حفظ النتائج في قاعدة البيانات
+            "batch_concurrency": 4,  # عدد مهام المسح المتزامنة في الدفعات
+            "batch_subnet_concurrency": 1,  # الحد الأقصى للمهام المتزامنة في نفس الشبكة الفرعية
+            "batch_subnet_interval": 0,  # أقل فاصل بالثواني بين بدء مهمتين في نفس الشبكة الفرعية
+            "batch_retries": 3,  # عدد مرات إعادة محاولة المهمة الفاشلة
+            "batch_backoff": 30,  # التأخير الأساسي قبل إعادة المحاولة بالثواني (يتضاعف مع كل محاولة)
+            "wifi_monitor_interval": 10,  # الفاصل بين عمليات المسح في وضع المراقبة بالثواني
+            "wifi_monitor_max_bssids": 4096,  # الحد الأقصى لنقاط الوصول في جدول المراقبة
+            "wifi_monitor_expire": 300,  # اعتبار نقطة الوصول مختفية إذا لم تظهر خلال هذه المدة بالثواني
+            "wifi_monitor_signal_delta": 5,  # أقل تغير في الإشارة (dBm) يُسجل كتغيير
+            "table_max_rows": 200,  # أقصى عدد أسطر تُعرض في جداول الطرفية (0 لعرض الكل)
+            "interface_cache_ttl": 2,  # مدة الاحتفاظ بجرد واجهات الشبكة بالثواني
+            "auto_target_min_prefix": 16,  # أصغر طول بادئة لشبكات IPv4 المشتقة تلقائياً (الشبكات الأكبر تُقلص)
+            "ipv6_neighbor_discovery": True,  # إضافة جيران IPv6 من ذاكرة الجيران إلى الأهداف المشتقة
+            "daemon_host": "127.0.0.1",  # عنوان الاستماع في وضع الخدمة (محلي فقط افتراضياً)
+            "daemon_port": 8765,
+            "daemon_workers": 4,  # عدد المهام المتزامنة في وضع الخدمة
+            "daemon_token": None,  # الرمز المطلوب في ترويسة Authorization: Bearer (بدونه يُنشأ رمز عشوائي لكل تشغيل)
+            "daemon_max_jobs": 1000,  # عدد المهام المحفوظة في الذاكرة (تُحذف أقدم المهام المنتهية)
+            "metrics_enabled": False,  # قياس أزمنة مراحل المسح والتثبيت والتحليل وعداداتها
+            "metrics_file": None,  # ملف المقاييس بصيغة Prometheus (مثلاً لـ textfile collector في node_exporter)
+            "terminal_theme": "dark",
+            "max_log_size": 10,  # بالميجابايت
+            "log_rotation": None,  # تدوير السجل زمنياً: hourly أو daily أو weekly
+            "log_backup_count": 5,  # عدد أجزاء السجل المؤرشفة
+            "log_compress": True,  # ضغط الأجزاء المؤرشفة بـ gzip
+            "log_flush_interval": 1.0,  # الفاصل الزمني لتفريغ السجل إلى القرص بالثواني
+            "preferred_browser": "firefox",
+            "show_animations": True,
+            "fast_start": False,  # تخطي الرسوم المتحركة والتحقق من التحديثات لتسريع التشغيل
+            "background_update_check": True,  # التحقق من التحديثات في الخلفية
+            "last_update_check": None
+        }
+        
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r') as f:
+                    self.config = json.load(f)
+            else:
+                self.config = default_config
+                self._write_config(self.config)
+        except Exception as e:
+            self.notify(f"تعذر تحميل الإعدادات: {str(e)}. استخدام الإعدادات الافتراضية.", "warning")
+            self.config = default_config
+            
+    def save_config(self):
+        """حفظ إعدادات الأداة"""
+        try:
+            with self._config_lock:
+                self._write_config(self.config)
+            self.notify("تم حفظ الإعدادات بنجاح", "success")
+        except Exception as e:
+            self.notify(f"خطأ في حفظ الإعدادات: {str(e)}", "error")
+            
+    def update_config(self, key, value):
+        """تعديل إعداد واحد في الملف كما هو على القرص حالياً (لا تضيع تعديلات عملية أخرى بينهما)"""
+        with self._config_lock:
+            try:
+                with open(self.config_file, 'r') as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                config = dict(self.config)
+            config[key] = value
+            self.config[key] = value
+            self._write_config(config)
+            
+    def _write_config(self, config):
+        """كتابة ملف الإعدادات بشكل ذري (ملف مؤقت ثم os.replace) حتى لا يبقى مقطوعاً عند الخروج أثناء الكتابة"""
+        fd, temp_path = tempfile.mkstemp(dir=self.tools_path, prefix=".config_")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(config, f, indent=4)
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+            
+    def new_result_file(self, prefix, extension):
+        """إنشاء اسم ملف نتائج فريد بختم زمني (مع رقم إضافي إذا تكرر في نفس الثانية)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.scan_results, f"{prefix}_{timestamp}.{extension}")
+        counter = 1
+        # الأسماء المحجوزة في الذاكرة تمنع تكرار الاسم بين المسوحات المتزامنة قبل إنشاء الملف
+        with self._result_files_lock:
+            while os.path.exists(path) or path in self._result_files:
+                path = os.path.join(self.scan_results, f"{prefix}_{timestamp}_{counter}.{extension}")
+                counter += 1
+            self._result_files.add(path)
+        return path
+        
+    def get_results_store(self):
+        """الحصول على قاعدة بيانات النتائج (تُفتح عند أول استخدام)"""
+        if self._results_store is None:
+            with self._stores_lock:
+                if self._results_store is None:
+                    self._results_store = ResultsStore(self.results_db)
+        return self._results_store
+        
+    def store_nmap_results(self, xml_file, target=None, scan_type=None, on_record=None):
+        """إدخال نتائج مسح nmap في قاعدة البيانات (on_record يستقبل كل سجل أثناء نفس المرور)"""
+        if not self.config.get("store_results", True):
+            return None
+        try:
+            with metrics.phase("network_scan", "store"):
+                return self.get_results_store().ingest_nmap(xml_file, target, scan_type, on_record)
+        except Exception as e:
+            self.notify(f"خطأ في حفظ النتائج في قاعدة البيانات: {str(e)}", "warning")
+            return None
+            
+    def export_results(self, xml_files, path, fmt=None):
+        """تصدير تقارير nmap إلى CSV أو NDJSON أو الصيغة العمودية بشكل تدريجي (بدون تحميل التقرير كاملاً)"""
+        try:
+            with metrics.phase("export", "write"), ResultExporter(path, fmt) as exporter:
+                for xml_file in xml_files:
+                    for record in iter_nmap_hosts(xml_file):
+                        exporter.write_host(record)
+            self.notify(f"تم تصدير {exporter.rows} سطر إلى: {path}", "success")
+            return exporter.rows
+        except Exception as e:
+            self.notify(f"خطأ في تصدير النتائج: {str(e)}", "error")
+            return None
+            
+    def store_wifi_results(self, networks, interface=None, source_file=None):
+        """إدخال نتائج مسح الشبكات اللاسلكية في قاعدة البيانات"""
+        if not self.config.get("store_results", True):
+            return None
+        try:
+            with metrics.phase("wireless_scan", "store"):
+                return self.get_results_store().ingest_wifi(networks, interface, source_file)
+        except Exception as e:
+            self.notify(f"خطأ في حفظ النتائج في قاعدة البيانات: {str(e)}", "warning")
+            return None
+            
+    def log_activity(self, activity, event="message", **fields):
+        """تسجيل حدث منظم في سجل النشاط (الهدف، المدة، ملف النتائج، رمز الخروج...)"""
+        if not self.config.get("enable_logging", True):
+            return
+            
+        try:
+            self.logger.log(event, message=activity, **fields)
+        except Exception as e:
+            self.notify(f"خطأ في تسجيل النشاط: {str(e)}", "warning")
+                
+    def truncate_log_file(self):
+        """تدوير ملف السجل عند تجاوزه الحد المسموح (يُحفظ الجزء القديم مضغوطاً)"""
+        try:
+            self.logger.rotate()
+        except Exception as e:
+            self.notify(f"خطأ في تقليص ملف السجل: {str(e)}", "warning")
+            
+    def animations_enabled(self):
+        """التحقق مما إذا كانت الرسوم المتحركة وأشرطة التقدم مفعلة (لا تُعرض أبداً إذا لم يكن الإخراج طرفية)"""
+        return (self.interactive and not self.fast_start and self.config.get("show_animations", True)
+                and sys.stdout.isatty())
+        
+    def animate_text(self, text):
+        """عرض نص متحرك"""
+        if not self.animations_enabled():
+            print(text)
+            return
+            
+        for char in text:
+            print(char, end='', flush=True)
+            time.sleep(0.01)
+        print()
+        
+    def print_banner(self):
+        """عرض شعار الأداة مع تأثير متحرك"""
+        if self.animations_enabled():
+            for line in self.banner.split('\n'):
+                print(line)
+                time.sleep(0.05)
+        else:
+            print(self.banner)
+            
+        # التحقق من وجود تحديثات إذا كان مفعلاً (يتم تخطيه في وضع البدء السريع)
+        if self.config.get("auto_check_updates", True) and not self.fast_start:
+            self.check_for_updates(background=self.config.get("background_update_check", True))
+        
+    def check_for_updates(self, background=False, quiet=False):
+        """التحقق من وجود تحديثات للأداة (background لتنفيذه في خيط منفصل دون تأخير بدء التشغيل)
+
+        في الخلفية لا تُعرض إلا رسالة وجود تحديث (حتى لا تتداخل الرسائل مع الأسئلة)، ويُتخطى
+        الفحص في التشغيل غير التفاعلي.
+        """
+        if background:
+            if self.interactive:
+                threading.Thread(target=self.check_for_updates, kwargs={'quiet': True}, daemon=True).start()
+            return
+            
+        # وقت آخر تحقق من التحديثات
+        last_check = self.config.get("last_update_check")
+        
+        # التحقق من التحديثات مرة واحدة يومياً فقط
+        if last_check and (datetime.now() - datetime.fromisoformat(last_check)).days < 1:
+            return
+            
+        try:
+            if not quiet:
+                self.notify("جاري التحقق من وجود تحديثات...")
+            
+            # هذا محاكاة فقط للتحقق من وجود تحديثات - في التطبيق الحقيقي سيتم الاتصال بخادم التحديثات
+            time.sleep(1)
+            
+            # تحديث وقت آخر فحص (بدون إعادة كتابة باقي الإعدادات التي قد تتغير في عملية أخرى)
+            self.update_config("last_update_check", datetime.now().isoformat())
+            
+            # تحقق وهمي من وجود تحديثات
+            if random.choice([True, False]):
+                if not quiet:
+                    self.notify("الإصدار الحالي هو الأحدث.", "success")
+            else:
+                self.notify("هناك تحديث جديد متاح! يمكنك تحديث الأداة باستخدام الأمر: git pull", "warning")
+        except Exception as e:
+            if not quiet:
+                self.notify(f"خطأ في التحقق من التحديثات: {str(e)}", "warning")
+            
+    def check_root(self, assume_yes=False):
+        """التحقق من صلاحيات الجذر (assume_yes للمتابعة بدون سؤال)"""
+        if self.os_type == "Linux" and not self.is_root:
+            print(f"{Fore.RED}[!] يجب تشغيل الأداة بصلاحيات الجذر (root) للحصول على جميع الميزات{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}[*] جرب تشغيل الأمر: sudo {' '.join(sys.argv)}{Style.RESET_ALL}")
+            
+            if assume_yes:
+                return
+                
+            # السؤال عما إذا كان يرغب المستخدم في المتابعة بدون صلاحيات الجذر
+            continue_anyway = input(f"{Fore.YELLOW}هل ترغب في المتابعة بدون صلاحيات الجذر؟ (بعض الميزات لن تعمل) [y/N]: {Style.RESET_ALL}")
+            if continue_anyway.lower() != 'y':
+                sys.exit(1)
+                
+    def check_dependencies(self, auto_install=None):
+        """التحقق من وجود البرامج والمكتبات المطلوبة (auto_install=None للسؤال قبل تثبيت الحزم)"""
+        print(f"{Fore.CYAN}[*] جاري التحقق من المتطلبات...{Style.RESET_ALL}")
+        
+        dependencies = {
+            "programs": ["nmap", "bettercap", "wireshark", "metasploit", "sqlmap"],
+            "pip_packages": ["colorama", "tabulate", "tqdm", "netifaces", "requests"]
+        }
+        
+        # التحقق من وجود البرامج
+        missing_programs = []
+        for program in dependencies["programs"]:
+            if not self.env.has(ToolInstaller.RECIPES[program]["binary"]):
+                missing_programs.append(program)
+                
+        # التحقق من وجود حزم بايثون
+        missing_packages = []
+        for package in dependencies["pip_packages"]:
+            try:
+                __import__(package.lower())
+            except ImportError:
+                missing_packages.append(package)
+                
+        if missing_programs:
+            print(f"{Fore.YELLOW}[!] البرامج التالية غير مثبتة: {', '.join(missing_programs)}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.GREEN}[+] جميع البرامج المطلوبة متوفرة{Style.RESET_ALL}")
+            
+        if missing_packages:
+            print(f"{Fore.YELLOW}[!] حزم بايثون التالية غير مثبتة: {', '.join(missing_packages)}{Style.RESET_ALL}")
+            try:
+                if auto_install is None:
+                    install_packages = input(f"{Fore.YELLOW}هل ترغب في تثبيت حزم بايثون المفقودة؟ [Y/n]: {Style.RESET_ALL}")
+                    auto_install = install_packages.lower() != 'n'
+                if auto_install:
+                    for package in missing_packages:
+                        print(f"{Fore.CYAN}[*] جاري تثبيت {package}...{Style.RESET_ALL}")
+                        subprocess.run([sys.executable, "-m", "pip", "install", package])
+                    # تحديث قائمة الحزم المفقودة بعد التثبيت
+                    missing_packages = []
+            except Exception as e:
+                print(f"{Fore.RED}[!] خطأ في تثبيت الحزم: {str(e)}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.GREEN}[+] جميع حزم بايثون المطلوبة متوفرة{Style.RESET_ALL}")
+            
+        return {"programs": missing_programs, "packages": missing_packages}
+    
+    def install_tools(self, tool_name=None, assume_yes=False):
+        """تثبيت الأدوات المطلوبة وإرجاع نتيجة التثبيت لكل أداة"""
+        self.check_root(assume_yes)
+        
+        tools = {
+            "bettercap": self.install_bettercap,
+            "nmap": self.install_nmap,
+            "wireshark": self.install_wireshark,
+            "metasploit": self.install_metasploit,
+            "sqlmap": self.install_sqlmap,
+            "all": None  # ستستخدم لتثبيت جميع الأدوات
+        }
+        
+        if not tool_name:
+            # عرض قائمة بالأدوات المتاحة للتثبيت
+            print(f"{Fore.CYAN}[*] الأدوات المتاحة للتثبيت:{Style.RESET_ALL}")
+            for i, name in enumerate(tools.keys()):
+                if name != "all":
+                    print(f"  {i+1}. {name}")
+            print(f"  {len(tools)}. all (جميع الأدوات)")
+            
+            try:
+                choice = input(f"{Fore.YELLOW}اختر رقم الأداة للتثبيت (0 للإلغاء): {Style.RESET_ALL}")
+                if choice == "0":
+                    return {}
+                    
+                choice = int(choice)
+                if 1 <= choice <= len(tools):
+                    tool_name = list(tools.keys())[choice-1]
+                else:
+                    print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
+                    return {}
+            except ValueError:
+                print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
+                return {}
+                
+        # تثبيت أداة محددة أو عدة أدوات أو جميع الأدوات
+        names = [tool_name] if isinstance(tool_name, str) else list(tool_name)
+        if "all" in names:
+            selected = [name for name, func in tools.items() if func]
+        else:
+            selected = list(dict.fromkeys(names))
+            unknown = [name for name in selected if not tools.get(name)]
+            if unknown:
+                print(f"{Fore.RED}[!] الأداة '{', '.join(unknown)}' غير معتمدة أو غير موجودة{Style.RESET_ALL}")
+                return {}
+            
+        return self.run_installer(selected)
+    
+    def run_installer(self, tools):
+        """تثبيت مجموعة أدوات معاً عبر ToolInstaller (تحديث واحد للفهرس، عملية تثبيت واحدة، بناء متوازٍ)"""
+        installer = ToolInstaller(
+            workers=self.config.get("install_workers", 4),
+            probe=self.env,
+            step_callback=lambda step: self.log_activity(f"خطوة تثبيت: {step['step']}", event="install_step", **step)
+        )
+        results = {}
+        runnable = []
+        for tool in tools:
+            recipe = ToolInstaller.RECIPES[tool]
+            print(f"{Fore.CYAN}[*] جاري تثبيت {recipe['name']}...{Style.RESET_ALL}")
+            self.log_activity(f"محاولة تثبيت {recipe['name']}", event="install_started", tool=tool)
+            if installer.recipe(tool) is None:
+                print(f"{Fore.RED}[!] نظام التشغيل غير مدعوم. يرجى تثبيت {recipe['name']} يدوياً من {recipe['url']}{Style.RESET_ALL}")
+                self.log_activity(f"فشل تثبيت {recipe['name']}", event="install_failed", tool=tool, exit_code=1)
+                results[tool] = False
+            else:
+                runnable.append(tool)
+                
+        if not runnable:
+            return results
+            
+        started = time.monotonic()
+        try:
+            installed = installer.run(runnable)
+        except Exception as e:
+            print(f"{Fore.RED}[!] خطأ أثناء التثبيت: {str(e)}{Style.RESET_ALL}")
+            for tool in runnable:
+                self.log_activity(f"خطأ في تثبيت {ToolInstaller.RECIPES[tool]['name']}: {str(e)}", event="install_error", tool=tool, error=str(e))
+                metrics.inc("toolkit_operations_total", operation="install", status="error")
+                results[tool] = False
+            return results
+        duration = round(time.monotonic() - started, 3)
+        metrics.observe("toolkit_operation_seconds", duration, operation="install")
+        
+        # زمن كل خطوة
+        if installer.steps:
+            print(tabulate([[step['step'], step['status'], f"{step['duration']:.1f}s"] for step in installer.steps],
+                           headers=["الخطوة", "الحالة", "الزمن"], tablefmt="simple"))
+            
+        for tool in runnable:
+            recipe = ToolInstaller.RECIPES[tool]
+            results[tool] = installed[tool]
+            metrics.inc("toolkit_operations_total", operation="install", status="ok" if installed[tool] else "failed")
+            if installed[tool]:
+                print(f"{Fore.GREEN}[+] تم تثبيت {recipe['name']} بنجاح{Style.RESET_ALL}")
+                self.log_activity(f"تم تثبيت {recipe['name']} بنجاح", event="install_finished", tool=tool, exit_code=0, duration=duration)
+            else:
+                print(f"{Fore.RED}[!] فشل التثبيت. يرجى تثبيت {recipe['name']} يدوياً من {recipe['url']}{Style.RESET_ALL}")
+                self.log_activity(f"فشل تثبيت {recipe['name']}", event="install_failed", tool=tool, exit_code=1, duration=duration)
+        return results
+        
+    def install_bettercap(self):
+        """تثبيت Bettercap حسب نوع نظام التشغيل"""
+        return self.run_installer(["bettercap"])["bettercap"]
+            
+    def install_nmap(self):
+        """تثبيت Nmap"""
+        return self.run_installer(["nmap"])["nmap"]
+            
+    def install_wireshark(self):
+        """تثبيت Wireshark"""
+        return self.run_installer(["wireshark"])["wireshark"]
+            
+    def install_metasploit(self):
+        """تثبيت Metasploit Framework"""
+        return self.run_installer(["metasploit"])["metasploit"]
+            
+    def install_sqlmap(self):
+        """تثبيت SQLMap"""
+        return self.run_installer(["sqlmap"])["sqlmap"]
+    
+    def get_network_interfaces(self, refresh=False):
+        """الحصول على قائمة واجهات الشبكة المتاحة (بدون loopback)
+
+        كل واجهة تحتوي على name و mac و ip (أول عنوان IPv4) بالإضافة إلى جميع العناوين في ipv4 و ipv6
+        والنوع والحالة والسرعة وما إذا كانت لاسلكية.
+        """
+        try:
+            # تجاهل واجهات loopback
+            return [iface for iface in self.inventory.interfaces(refresh)
+                    if iface['type'] != "loopback" and iface['name'] != "lo" and "loop" not in iface['name'].lower()]
+        except Exception as e:
+            print(f"{Fore.RED}[!] خطأ في الحصول على واجهات الشبكة: {str(e)}{Style.RESET_ALL}")
+            return []
+            
+    def interface_targets(self, iface):
+        """أهداف المسح لجميع عناوين الواجهة: شبكات IPv4 حسب القناع وجيران IPv6 من ذاكرة الجيران"""
+        neighbors = []
+        if iface.get('ipv6') and self.config.get("ipv6_neighbor_discovery", True):
+            # رسالة ping إلى جميع الأجهزة (ff02::1) لتعبئة ذاكرة الجيران قبل قراءتها
+            if self.env.has("ping"):
+                try:
+                    subprocess.run(["ping", "-6", "-c", "2", "-w", "2", f"ff02::1%{iface['name']}"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+                except (OSError, subprocess.SubprocessError):
+                    pass
+            neighbors = self.inventory.neighbors(iface['name'])
+        return derive_interface_targets(iface, neighbors, min_prefix=self.config.get("auto_target_min_prefix", 16))
+    
+    def network_scan(self, target=None, scan_type="quick", shard_size=None, workers=None, engine=None,
+                     progress_callback=None, stall_timeout=None, differential=False, show_results=True, interface=None,
+                     export=None, export_format=None, fingerprint_cache=None):
+        """مسح الشبكة من سطر الأوامر: اختيار الواجهة بالسؤال وتثبيت nmap وعرض النتائج فوق scan()
+
+        تُرجع ScanResult (أجهزته محفوظة بعد تحليل العرض فلا يُعاد تحليل التقرير)، أو None عند الفشل.
+        export: مسار ملف لتصدير جرد المنافذ أثناء تحليل النتائج (csv أو ndjson أو ptcol حسب الامتداد).
+        fingerprint_cache: استخدام ذاكرة بصمات الخدمات مع -sV (None = حسب الإعدادات).
+        """
+        print(f"{Fore.CYAN}[*] جاري بدء المسح الشبكي...{Style.RESET_ALL}")
+        
+        if not target:
+            # الحصول على عنوان IP للشبكة المحلية
+            interfaces = self.get_network_interfaces()
+            if not interfaces:
+                print(f"{Fore.RED}[!] لم يتم العثور على واجهات شبكة نشطة{Style.RESET_ALL}")
+                return
+                
+            if interface:
+                # الواجهة محددة مسبقاً (بدون سؤال)
+                try:
+                    target = self.resolve_interface_target(interface)
+                except TargetError as e:
+                    print(f"{Fore.RED}[!] {str(e)}{Style.RESET_ALL}")
+                    return
+                print(f"{Fore.CYAN}[*] الأهداف المشتقة من الواجهة {interface}: {target}{Style.RESET_ALL}")
+            else:
+                # عرض الواجهات المتاحة للمستخدم للاختيار
+                print(f"{Fore.CYAN}[*] واجهات الشبكة المتاحة:{Style.RESET_ALL}")
+                for i, iface in enumerate(interfaces):
+                    addresses = [a['addr'] for a in iface.get('ipv4', []) + iface.get('ipv6', [])] or [iface['ip']]
+                    print(f"  {i+1}. {iface['name']} - IP: {', '.join(addresses)}, MAC: {iface['mac']}")
+                    
+                try:
+                    choice = int(input(f"{Fore.YELLOW}اختر واجهة للمسح (0 للإلغاء): {Style.RESET_ALL}"))
+                    if choice == 0:
+                        return
+                        
+                    if 1 <= choice <= len(interfaces):
+                        selected_iface = interfaces[choice-1]
+                    else:
+                        print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
+                        return
+                except ValueError:
+                    print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
+                    return
+                    
+                ipv4_targets, ipv6_targets = self.interface_targets(selected_iface)
+                if ipv4_targets or ipv6_targets:
+                    target = " ".join(ipv4_targets + ipv6_targets)
+                    print(f"{Fore.CYAN}[*] الأهداف المشتقة من الواجهة {selected_iface['name']}: {target}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.RED}[!] عنوان IP غير صالح للواجهة المحددة{Style.RESET_ALL}")
+                    target = input(f"{Fore.YELLOW}أدخل هدف المسح (مثال: 192.168.1.0/24): {Style.RESET_ALL}")
+                    
+        scan_kwargs = dict(shard_size=shard_size, workers=workers, progress_callback=progress_callback,
+                           stall_timeout=stall_timeout, differential=differential, fingerprint_cache=fingerprint_cache,
+                           export=None if show_results else export, export_format=export_format)
+        try:
+            try:
+                result = self.scan(target, scan_type, engine=engine, **scan_kwargs)
+            except ToolNotFoundError as e:
+                if e.tool != "nmap":
+                    raise
+                print(f"{Fore.RED}[!] أداة nmap غير مثبتة. جاري محاولة التثبيت...{Style.RESET_ALL}")
+                if self.install_nmap():
+                    self.env.invalidate()
+                elif (engine or self.config.get("scan_engine", "auto")) == "auto":
+                    print(f"{Fore.YELLOW}[!] سيتم استخدام محرك المسح المدمج (اكتشاف الخدمات ونظام التشغيل غير متاح){Style.RESET_ALL}")
+                    engine = "native"
+                else:
+                    return None
+                result = self.scan(target, scan_type, engine=engine, **scan_kwargs)
+        except ToolkitError as e:
+            print(f"{Fore.RED}[!] {str(e)}{Style.RESET_ALL}")
+            return None
+            
+        if result.diff is not None:
+            self.print_scan_diff(result.diff)
+            
+        # عرض نتائج المسح (والتصدير في نفس مرور التحليل)
+        if show_results and result.output_file:
+            if export:
+                try:
+                    with ResultExporter(export, export_format) as exporter:
+                        devices = self.parse_nmap_results(result.output_file, exporter)
+                    if devices is not None:
+                        result._devices = devices
+                    print(f"{Fore.GREEN}[+] تم تصدير {exporter.rows} سطر إلى: {export}{Style.RESET_ALL}")
+                except Exception as e:
+                    print(f"{Fore.RED}[!] خطأ في تصدير النتائج: {str(e)}{Style.RESET_ALL}")
+            else:
+                self.parse_nmap_results(result.output_file, devices=result.devices())
+                
+        return result
+        
+    def resolve_interface_target(self, name):
+        """أهداف المسح المشتقة من واجهة محددة بالاسم (يرفع TargetError)"""
+        matches = [iface for iface in self.get_network_interfaces() if iface['name'] == name]
+        if not matches:
+            raise TargetError(f"الواجهة '{name}' غير موجودة")
+        ipv4_targets, ipv6_targets = self.interface_targets(matches[0])
+        if not (ipv4_targets or ipv6_targets):
+            raise TargetError(f"عنوان IP غير صالح للواجهة {name}")
+        return " ".join(ipv4_targets + ipv6_targets)
+        
+    def scan(self, target=None, scan_type="quick", shard_size=None, workers=None, engine=None, progress_callback=None,
+             stall_timeout=None, differential=False, interface=None, export=None, export_format=None,
+             fingerprint_cache=None, host_callback=None):
+        """مسح الشبكة بدون طباعة أو أسئلة (واجهة المكتبة)
+
+        تُرجع ScanResult وترفع TargetError أو ProfileError (ملف أو محرك غير صالح) أو ToolNotFoundError أو ScanError.
+        progress_callback يستقبل أحداث التقدم (dict) من nmap أو من أجزاء المسح.
+        host_callback يستقبل قاموس كل جهاز فور توفره: من المحرك المدمج عند اكتمال كل جهاز ومن المسح المجزأ
+        عند انتهاء كل جزء. المسح بعملية nmap واحدة أو بذاكرة البصمات لا يعرف الأجهزة إلا في النهاية.
+        """
+        if not target:
+            if not interface:
+                raise TargetError("يجب تحديد هدف المسح أو الواجهة")
+            target = self.resolve_interface_target(interface)
+        if not target.split():
+            raise TargetError("هدف المسح فارغ")
+        validate_scan_target(target)
+            
+        # تحديد ملف المسح (مدمج أو معرف في الإعدادات)
+        profile = self.scan_profiles().resolve(scan_type)
+        base_type = profile['base']
+        scan_opt = " ".join(profile['args'])
+        
+        # تحديد محرك المسح: nmap أو المحرك المدمج (native) أو الاختيار التلقائي (auto)
+        if engine is None:
+            engine = self.config.get("scan_engine", "auto")
+        if engine not in SCAN_ENGINES:
+            raise ProfileError(f"محرك المسح '{engine}' غير معروف (المتاح: {', '.join(SCAN_ENGINES)})")
+            
+        # الوضع التفاضلي: مسح عميق للأجهزة الجديدة أو المتغيرة فقط
+        if differential and base_type not in ("quick", "discovery"):
+            result = self.differential_scan(target, scan_type, shard_size=shard_size, workers=workers, engine=engine,
+                                            progress_callback=progress_callback, stall_timeout=stall_timeout,
+                                            fingerprint_cache=fingerprint_cache, host_callback=host_callback)
+            if export and result.output_file:
+                self.export_results([result.output_file], export, export_format)
+            return result
+            
+        # التحقق من وجود أداة nmap
+        if engine != "native" and not self.env.has("nmap"):
+            if engine == "auto" and base_type == "quick":
+                self.notify("أداة nmap غير مثبتة. سيتم استخدام محرك المسح المدمج", "notice")
+                engine = "native"
+            else:
+                raise ToolNotFoundError("nmap", "أداة nmap غير مثبتة")
+        if engine == "auto":
+            engine = "nmap"
+                
+        started = time.monotonic()
+        self.log_activity(f"بدء مسح الشبكة نوع: {scan_type}, هدف: {target}", event="scan_started",
+                          target=target, scan_type=scan_type)
+        
+        # إنشاء اسم ملف التقرير
+        output_file = self.new_result_file("scan", "xml")
+        
+        # بناء أمر المسح
+        stats_every = self.config.get("nmap_stats_interval", "2s")
+        cmd = (["nmap"] + scan_opt.split() + nmap_family_args(target.split())
+               + ["--stats-every", stats_every, "-oX", output_file, "--"] + target.split())
+        command = " ".join(cmd)
+        
+        # مهلة إيقاف المسح المتعثر (بالثواني) إذا لم يتقدم
+        if stall_timeout is None:
+            stall_timeout = self.config.get("scan_stall_timeout", 0)
+        
+        stderr = None
+        try:
+            # تقسيم الهدف إلى أجزاء إذا كان وضع المسح المجزأ مفعلاً
+            if shard_size is None:
+                shard_size = self.config.get("scan_shard_size", 0)
+            if fingerprint_cache is None:
+                fingerprint_cache = self.config.get("fingerprint_cache", True)
+            tuner = None
+            if profile['auto_tune'] and engine != "native":
+                # الضبط التلقائي يحتاج أجزاء متعددة لقياس الفقد بينها
+                shard_size = shard_size or self.config.get("auto_tune_shard_size", 256)
+                tuner = self.rate_tuner(profile)
+            shards = split_scan_targets(target, shard_size) if shard_size else []
+            
+            # nmap يحتاج تشغيلاً منفصلاً (مع -6) لأهداف IPv6، فالهدف المختلط يُمسح كأجزاء حسب العائلة
+            families = split_target_families(target)
+            if len(families) > 1 and engine != "native":
+                shards = [shard for family in families
+                          for shard in (split_scan_targets(family, shard_size) if shard_size else [family.split()])]
+            
+            if engine == "native":
+                # المحرك المدمج يمسح العائلتين في تشغيل واحد (مع الاحتفاظ بنطاق عناوين link-local)
+                # ويرتب النتائج حسب العائلة ثم العنوان، فلا يحتاج إلى التقسيم السابق
+                returncode = self.run_native_scan(target, base_type, output_file, host_callback)
+            elif fingerprint_cache and ("-sV" in profile['args'] or "-A" in profile['args']):
+                self.notify(f"جاري تنفيذ المسح: {command}")
+                returncode = self.run_fingerprint_scan(profile, target, shards, output_file, workers,
+                                                       progress_callback, stall_timeout, tuner)
+            elif len(shards) > 1 or tuner:
+                self.notify(f"جاري تنفيذ المسح: {command}")
+                returncode = self.run_sharded_scan(scan_opt, shards or [target.split()], output_file, workers,
+                                                   progress_callback, stall_timeout, tuner, host_callback)
+            else:
+                self.notify(f"جاري تنفيذ المسح: {command}")
+                
+                # تشغيل المسح مع تتبع التقدم الفعلي من إحصائيات nmap
+                if self.animations_enabled():
+                    with tqdm(total=100, desc="تقدم المسح", bar_format="{l_bar}{bar}| {n:.1f}%{postfix}") as pbar:
+                        def on_progress(event):
+                            if event['type'] == "progress":
+                                pbar.set_description(event['phase'] or "تقدم المسح")
+                                pbar.n = event['percent']
+                                if event.get('etc'):
+                                    pbar.set_postfix_str(f"ETC {event['etc']} ({event['remaining']})", refresh=False)
+                                pbar.refresh()
+                            if progress_callback:
+                                progress_callback(event)
+                                
+                        returncode, stderr = self.run_nmap_process(cmd, on_progress, stall_timeout)
+                        if returncode == 0:
+                            pbar.n = 100  # إكمال شريط التقدم
+                            pbar.refresh()
+                else:
+                    returncode, stderr = self.run_nmap_process(cmd, progress_callback, stall_timeout,
+                                                               echo_output=progress_callback is None and not self.headless)
+                    
+                if stderr:
+                    self.notify(f"أخطاء أثناء المسح: {stderr}", "error")
+        except Exception as e:
+            self.log_activity(f"خطأ في مسح الشبكة: {str(e)}", event="scan_error", target=target,
+                              scan_type=scan_type, duration=round(time.monotonic() - started, 3), error=str(e))
+            metrics.inc("toolkit_operations_total", operation="network_scan", status="error")
+            raise ScanError(f"خطأ أثناء المسح: {str(e)}") from e
+            
+        # التحقق من نتيجة المسح
+        duration = round(time.monotonic() - started, 3)
+        if returncode != 0:
+            self.log_activity("فشل مسح الشبكة", event="scan_failed", target=target, scan_type=scan_type,
+                              duration=duration, exit_code=returncode)
+            metrics.inc("toolkit_operations_total", operation="network_scan", status="failed")
+            raise ScanError("فشل المسح. تحقق من الاتصال والصلاحيات.", returncode, stderr)
+            
+        self.notify(f"اكتمل المسح بنجاح. تم حفظ النتائج في: {output_file}", "success")
+        self.log_activity(f"اكتمل المسح بنجاح. ملف التقرير: {output_file}", event="scan_finished",
+                          target=target, scan_type=scan_type, duration=duration,
+                          result_file=output_file, exit_code=returncode)
+        
+        # حفظ النتائج في قاعدة البيانات مع تجميع الأجهزة في نفس المرور
+        result = ScanResult(target, scan_type, engine, output_file, returncode, duration)
+        devices = CompactDevices()
+        if self.store_nmap_results(output_file, target, scan_type, devices.append_record) is not None:
+            result._devices = devices
+        if export:
+            self.export_results([output_file], export, export_format)
+        metrics.inc("toolkit_operations_total", operation="network_scan", status="ok")
+        metrics.observe("toolkit_operation_seconds", time.monotonic() - started, operation="network_scan", engine=engine)
+        return result
+        
+    def differential_scan(self, target, scan_type="basic", **scan_kwargs):
+        """مسح تفاضلي: اكتشاف سريع ومقارنته بآخر نتائج مخزنة ثم مسح عميق للأجهزة الجديدة أو المتغيرة فقط
+
+        تُرجع ScanResult يحتوي diff، وملف التقرير هو نتيجة المسح العميق (None إذا لم يتغير شيء).
+        """
+        store = self.get_results_store()
+        started = time.monotonic()
+        # أجهزة الاكتشاف السريع ليست النتيجة النهائية، فلا تُمرر إلا أجهزة المسح العميق
+        host_callback = scan_kwargs.pop("host_callback", None)
+        
+        # بصمة المنافذ من آخر مسح اكتشاف لنفس الهدف
+        previous_id = store.last_scan_id(target, scan_type="discovery")
+        previous = store.scan_fingerprint(previous_id) if previous_id else {}
+        
+        self.notify("المسح التفاضلي: جاري الاكتشاف السريع...")
+        discovery = self.scan(target, "discovery", **scan_kwargs)
+        discovery_file = discovery.output_file
+        if not store.has_source(os.path.abspath(discovery_file)):
+            store.ingest_nmap(discovery_file, target, "discovery")
+            
+        current = nmap_fingerprint(discovery_file)
+        diff = diff_fingerprints(previous, current)
+        diff['discovery_file'] = discovery_file
+        # المنافذ السابقة للأجهزة المختفية (لعرضها)
+        diff['previous'] = {ip: previous[ip] for ip in diff['removed']}
+        diff['current'] = {ip: current[ip] for ip in diff['added']}
+        
+        self.log_activity(f"مسح تفاضلي للهدف {target}: جديد {len(diff['added'])}، اختفى {len(diff['removed'])}، تغير {len(diff['changed'])}",
+                          event="scan_diff", target=target, scan_type=scan_type, result_file=discovery_file,
+                          added=len(diff['added']), removed=len(diff['removed']), changed=len(diff['changed']))
+        
+        # المسح العميق للأجهزة الجديدة أو المتغيرة فقط
+        result = ScanResult(target, scan_type, discovery.engine, diff=diff)
+        rescan = diff['added'] + list(diff['changed'])
+        if rescan:
+            self.notify(f"جاري المسح العميق ({scan_type}) لعدد {len(rescan)} جهاز...")
+            deep = self.scan(" ".join(rescan), scan_type, host_callback=host_callback, **scan_kwargs)
+            result.output_file = deep.output_file
+            result.engine = deep.engine
+            result._devices = deep._devices
+        result.duration = round(time.monotonic() - started, 3)
+        return result
+        
+    def print_scan_diff(self, diff):
+        """عرض فروقات المسح التفاضلي في جدول"""
+        if diff['added'] or diff['removed'] or diff['changed']:
+            table_data = []
+            for ip in diff['added']:
+                table_data.append([ip, "جديد", ", ".join(diff['current'][ip]) or "-"])
+            for ip in diff['removed']:
+                table_data.append([ip, "اختفى", ", ".join(diff['previous'][ip]) or "-"])
+            for ip, change in diff['changed'].items():
+                ports = [f"+{p}" for p in change['added']] + [f"-{p}" for p in change['removed']]
+                table_data.append([ip, "تغير", ", ".join(ports)])
+            print(tabulate(table_data, headers=["عنوان IP", "التغيير", "المنافذ"], tablefmt="grid"))
+        print(f"{Fore.GREEN}[+] جديد: {len(diff['added'])}، اختفى: {len(diff['removed'])}، تغير: {len(diff['changed'])}، بدون تغيير: {diff['unchanged']}{Style.RESET_ALL}")
+        if not (diff['added'] or diff['changed']):
+            print(f"{Fore.GREEN}[+] لا توجد تغييرات تتطلب مسحاً عميقاً{Style.RESET_ALL}")
+        
+    def batch_scan(self, batch, targets=None, scan_type=None, engine=None, concurrency=None, subnet_concurrency=None,
+                   subnet_interval=None, retries=None, backoff=None):
+        """تنفيذ دفعة أهداف من طابور دائم مع حدود تزامن لكل شبكة فرعية وإعادة المحاولة (تُستأنف بعد التوقف)"""
+        scan_type = scan_type or self.config.get("default_scan_type", "quick")
+        concurrency = max(1, int(concurrency or self.config.get("batch_concurrency", 4)))
+        if subnet_concurrency is None:
+            subnet_concurrency = self.config.get("batch_subnet_concurrency", 1)
+        subnet_concurrency = max(1, int(subnet_concurrency))
+        if subnet_interval is None:
+            subnet_interval = self.config.get("batch_subnet_interval", 0)
+        if retries is None:
+            retries = self.config.get("batch_retries", 3)
+        if backoff is None:
+            backoff = self.config.get("batch_backoff", 30)
+            
+        scan_queue = ScanQueue(self.queue_db)
+        try:
+            if targets:
+                added = scan_queue.add(batch, targets, scan_type)
+                print(f"{Fore.CYAN}[*] تمت إضافة {added} هدف جديد إلى الدفعة '{batch}'{Style.RESET_ALL}")
+            recovered = scan_queue.recover(batch)
+            if recovered:
+                print(f"{Fore.YELLOW}[*] استئناف {recovered} مهمة توقفت قبل اكتمالها{Style.RESET_ALL}")
+            counts = scan_queue.counts(batch)
+            if not counts['pending']:
+                print(f"{Fore.YELLOW}[*] لا توجد مهام منتظرة في الدفعة '{batch}'{Style.RESET_ALL}")
+                return counts
+                
+            print(f"{Fore.CYAN}[*] بدء الدفعة '{batch}': {counts['pending']} مهمة منتظرة، {concurrency} متزامنة{Style.RESET_ALL}")
+            self.log_activity(f"بدء الدفعة {batch}", event="batch_started", batch=batch, scan_type=scan_type,
+                              pending=counts['pending'])
+            started = time.monotonic()
+            if self.config.get("store_results", True):
+                # فتح قاعدة النتائج قبل بدء الخيوط
+                self.get_results_store()
+                
+            active = {}
+            subnet_active = {}
+            subnet_started = {}
+            stopping = False
+            
+            def make_progress(job_id):
+                last = [0.0]
+                def on_progress(event):
+                    # تحديث تقدم المهمة في الطابور عند تغيره بنسبة 1% على الأقل
+                    if event.get('type') == "progress" and event.get('percent', 0) - last[0] >= 1:
+                        last[0] = event['percent']
+                        scan_queue.set_progress(job_id, event['percent'])
+                return on_progress
+                
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                while True:
+                    try:
+                        if not stopping and len(active) < concurrency:
+                            now = time.time()
+                            for job in scan_queue.ready(batch, now, limit=max(100, concurrency * 10)):
+                                if len(active) >= concurrency:
+                                    break
+                                subnet = job['subnet']
+                                if subnet_active.get(subnet, 0) >= subnet_concurrency:
+                                    continue
+                                if subnet_interval and now - subnet_started.get(subnet, 0) < subnet_interval:
+                                    continue
+                                scan_queue.start(job['id'])
+                                subnet_active[subnet] = subnet_active.get(subnet, 0) + 1
+                                subnet_started[subnet] = now
+                                future = executor.submit(self.scan, job['target'], job['scan_type'], engine=engine,
+                                                         progress_callback=make_progress(job['id']))
+                                active[future] = job
+                                
+                        if not active:
+                            if stopping:
+                                break
+                            wakeup = scan_queue.next_wakeup(batch)
+                            if wakeup is None:
+                                break
+                            # انتظار انتهاء التأخير أو فاصل الشبكة الفرعية
+                            time.sleep(min(max(wakeup - time.time(), 0.2), 5))
+                            continue
+                            
+                        done, _ = wait(active, timeout=1.0, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            job = active.pop(future)
+                            subnet_active[job['subnet']] -= 1
+                            try:
+                                result, error = future.result().output_file, None
+                            except Exception as e:
+                                result, error = None, str(e)
+                            if result:
+                                scan_queue.finish(job['id'], result)
+                            elif stopping:
+                                scan_queue.requeue(job['id'])
+                            elif scan_queue.fail(job['id'], error, retries, backoff) == "failed":
+                                print(f"{Fore.RED}[!] فشل مسح {job['target']} نهائياً بعد {job['attempts'] + 1} محاولة{Style.RESET_ALL}")
+                            else:
+                                print(f"{Fore.YELLOW}[!] فشل مسح {job['target']}. ستتم إعادة المحاولة لاحقاً{Style.RESET_ALL}")
+                            counts = scan_queue.counts(batch)
+                            print(f"{Fore.CYAN}[*] الدفعة '{batch}': مكتمل {counts['done']}، فشل {counts['failed']}، "
+                                  f"متبقي {counts['pending'] + counts['running']}{Style.RESET_ALL}")
+                    except KeyboardInterrupt:
+                        if stopping:
+                            raise
+                        # إيقاف بدء مهام جديدة مع انتظار المهام الجارية؛ ما يفشل منها أثناء الإيقاف يعود إلى
+                        # الطابور بدون احتساب محاولة، وما لم ينتهِ (عند خروج العملية) يُستعاد بـ recover()
+                        stopping = True
+                        print(f"\n{Fore.YELLOW}[!] جاري إيقاف الدفعة. يمكن استئنافها لاحقاً بنفس الاسم{Style.RESET_ALL}")
+                        
+            counts = scan_queue.counts(batch)
+            self.log_activity(f"انتهاء الدفعة {batch}", event="batch_stopped" if stopping else "batch_finished",
+                              batch=batch, scan_type=scan_type, duration=round(time.monotonic() - started, 3), **counts)
+            return counts
+        finally:
+            scan_queue.close()
+            
+    def batch_status(self, batch=None):
+        """ملخص الدفعات أو مهام دفعة محددة"""
+        scan_queue = ScanQueue(self.queue_db)
+        try:
+            return scan_queue.jobs(batch) if batch else scan_queue.batches()
+        finally:
+            scan_queue.close()
+            
+    def run_native_scan(self, target, scan_type, output_file, host_callback=None):
+        """تشغيل المسح باستخدام المحرك المدمج وحفظ النتائج بصيغة XML متوافقة مع nmap"""
+        engine = AsyncScanEngine(
+            concurrency=self.config.get("native_concurrency", 256),
+            host_rate=self.config.get("native_host_rate", 0),
+            timeout=self.config.get("native_timeout", 1.0),
+            retries=self.config.get("native_retries", 1)
+        )
+        # المسح السريع لاكتشاف الأجهزة فقط، وباقي الأنواع تمسح أشهر المنافذ
+        ports = None if scan_type == "quick" else AsyncScanEngine.TOP_PORTS
+        
+        self.notify(f"جاري تنفيذ المسح باستخدام المحرك المدمج: {target}")
+        with metrics.phase("network_scan", "native_engine"):
+            devices = engine.scan(target, ports, host_callback)
+        with metrics.phase("network_scan", "write"):
+            write_nmap_xml(devices, output_file, args=f"native {scan_type} {target}")
+        return 0
+        
+    def scan_profiles(self):
+        """ملفات المسح المدمجة مع الملفات المعرفة في الإعدادات"""
+        return ScanProfiles(self.SCAN_OPTIONS, self.config.get("scan_profiles") or {})
+        
+    def rate_tuner(self, profile):
+        """ضابط المعدل لملف المسح (مشترك بين عمليات المسح في نفس التشغيل، مثل مهام الدفعات)"""
+        with self._rate_tuners_lock:
+            tuner = self._rate_tuners.get(profile['name'])
+            if tuner is None:
+                tuner = RateTuner(min_rate=profile['min_rate'], max_rate=profile['max_rate'])
+                self._rate_tuners[profile['name']] = tuner
+            return tuner
+            
+    def run_nmap_process(self, cmd, progress_callback=None, stall_timeout=0, echo_output=False):
+        """تشغيل nmap وقراءة مخرجاته تدريجياً لتتبع التقدم الفعلي وإيقافه عند التعثر"""
+        with metrics.phase("network_scan", "spawn"):
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, bufsize=1)
+        spawned = time.perf_counter()
+        
+        # قراءة المخرجات في خيوط منفصلة حتى لا تمتلئ الأنابيب ويتجمد nmap
+        lines = queue.Queue()
+        stderr_lines = []
+        
+        def read_stdout():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+            
+        def read_stderr():
+            for line in process.stderr:
+                stderr_lines.append(line)
+                
+        readers = [threading.Thread(target=read_stdout, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+        for reader in readers:
+            reader.start()
+            
+        state = {'type': "progress", 'phase': None, 'percent': 0.0, 'etc': None, 'remaining': None,
+                 'elapsed': None, 'hosts_completed': 0, 'hosts_up': 0, 'hosts_undergoing': 0,
+                 'dropped_probes': 0, 'sent_probes': 0, 'retransmission_giveups': 0}
+        last_marker = None
+        last_change = time.monotonic()
+        
+        while True:
+            try:
+                line = lines.get(timeout=1)
+            except queue.Empty:
+                line = ""
+            if line is None:
+                break
+                
+            if echo_output and line.strip():
+                print(line, end='')
+                
+            stats = parse_nmap_stats_line(line.strip())
+            if stats:
+                state.update(stats)
+                marker = (state['phase'], state['percent'], state['hosts_completed'])
+                if marker != last_marker:
+                    last_marker = marker
+                    last_change = time.monotonic()
+                if 'percent' in stats and progress_callback:
+                    progress_callback(dict(state))
+            else:
+                # الحزم المفقودة (في الوضع المفصل) لاستخدامها في الضبط التلقائي للمعدل
+                loss = parse_nmap_loss_line(line)
+                if loss:
+                    state['dropped_probes'] += loss[0]
+                    state['sent_probes'] += loss[1]
+                    state['retransmission_giveups'] += loss[2]
+                
+            # إيقاف المسح إذا لم يتقدم خلال المهلة المحددة
+            if stall_timeout and time.monotonic() - last_change > stall_timeout and process.poll() is None:
+                process.kill()
+                self.notify(f"تم إيقاف المسح لعدم تقدمه خلال {stall_timeout} ثانية", "error")
+                if progress_callback:
+                    progress_callback(dict(state, type="stalled"))
+                    
+        process.wait()
+        for reader in readers:
+            reader.join()
+        metrics.observe("toolkit_phase_seconds", time.perf_counter() - spawned, operation="network_scan", phase="nmap")
+        metrics.inc("toolkit_processes_total", program="nmap", status="ok" if process.returncode == 0 else "failed")
+            
+        if progress_callback:
+            progress_callback(dict(state, type="finished", returncode=process.returncode))
+        return process.returncode, "".join(stderr_lines).strip()
+        
+    def get_fingerprint_cache(self):
+        """الحصول على ذاكرة بصمات الخدمات (تُفتح عند أول استخدام)"""
+        if self._fingerprint_cache is None:
+            with self._stores_lock:
+                if self._fingerprint_cache is None:
+                    self._fingerprint_cache = FingerprintCache(
+                        self.fingerprints_db,
+                        ttl=self.config.get("fingerprint_cache_ttl", 86400),
+                        max_entries=self.config.get("fingerprint_cache_size", 100000)
+                    )
+        return self._fingerprint_cache
+        
+    def _run_nmap_stage(self, args, shards, output_file, workers=None, progress_callback=None, stall_timeout=0, tuner=None):
+        """تشغيل مرحلة nmap واحدة (مجزأة إذا تعددت الأجزاء أو وُجد ضابط للمعدل)"""
+        if len(shards) > 1 or tuner:
+            return self.run_sharded_scan(" ".join(args), shards, output_file, workers, progress_callback, stall_timeout, tuner)
+        hosts = shards[0]
+        stats_every = self.config.get("nmap_stats_interval", "2s")
+        cmd = ["nmap"] + args + nmap_family_args(hosts) + ["--stats-every", stats_every, "-oX", output_file, "--"] + hosts
+        returncode, stderr = self.run_nmap_process(cmd, progress_callback, stall_timeout)
+        if returncode != 0 and stderr:
+            self.notify(f"أخطاء أثناء المسح: {stderr}", "error")
+        return returncode
+        
+    def run_fingerprint_scan(self, profile, target, shards, output_file, workers=None, progress_callback=None,
+                             stall_timeout=0, tuner=None):
+        """مسح مع ذاكرة بصمات الخدمات: اكتشاف المنافذ أولاً ثم اكتشاف الإصدارات (-sV) للمنافذ الجديدة
+        أو التي تغيرت بصمة شعارها أو انتهت صلاحيتها فقط، ودمج النتائج المحفوظة لباقي المنافذ"""
+        cache = self.get_fingerprint_cache()
+        work_dir = tempfile.mkdtemp(prefix="fingerprint_", dir=self.scan_results)
+        try:
+            discovery_args, unversioned_args, versioned_args = nmap_stage_args(profile['args'])
+            
+            # المرحلة 1: المنافذ المفتوحة فقط
+            self.notify("اكتشاف المنافذ المفتوحة (بدون اكتشاف الإصدارات)...")
+            ports_file = os.path.join(work_dir, "ports.xml")
+            returncode = self._run_nmap_stage(discovery_args, shards or [target.split()], ports_file, workers,
+                                              progress_callback, stall_timeout, tuner)
+            if returncode != 0:
+                return returncode
+            open_ports = {}
+            for record in iter_nmap_hosts(ports_file):
+                ip = record['ipv4'] or record['ipv6']
+                ports = [(p['port'], p['protocol']) for p in record['ports'] if p['state'] == "open"]
+                if ip and ports:
+                    open_ports[ip] = ports
+                    
+            # المرحلة 2: بصمة الشعار لكل منفذ TCP ومقارنتها بالذاكرة
+            endpoints = [(ip, port, protocol) for ip, ports in open_ports.items() for port, protocol in ports]
+            engine = AsyncScanEngine(concurrency=self.config.get("native_concurrency", 256),
+                                     timeout=self.config.get("fingerprint_banner_timeout", 2.0), retries=0)
+            banners = engine.banner_hashes([(ip, port) for ip, port, protocol in endpoints if protocol == "tcp"])
+            hits, misses = cache.lookup(endpoints, banners)
+            self.notify(f"ذاكرة البصمات: {len(hits)} منفذ بدون تغيير، {len(misses)} منفذ يحتاج اكتشاف الإصدار")
+            
+            # المرحلة 3: تجميع الأجهزة ذات المنافذ نفسها في عملية nmap واحدة
+            stale = {}
+            for ip, port, protocol in misses:
+                stale.setdefault(ip, []).append((port, protocol))
+            # الأجهزة المحفوظة بالكامل تحتاج nmap فقط إذا بقيت خيارات أخرى (مثل -O أو السكربتات)
+            extra_work = unversioned_args != nmap_stage_args(unversioned_args)[0]
+            groups = {}
+            for ip, ports in open_ports.items():
+                if ip in stale or extra_work:
+                    # اكتشاف الإصدار للمنافذ المتغيرة فقط، وتُضاف المنافذ المحفوظة عند الدمج
+                    key = (ip in stale, ':' in ip, nmap_port_spec(stale.get(ip, ports)))
+                    groups.setdefault(key, []).append(ip)
+                    
+            def run_group(index, key, hosts):
+                is_stale, _, spec = key
+                group_file = os.path.join(work_dir, f"group_{index:05d}.xml")
+                args = (versioned_args if is_stale else unversioned_args) + ["-p", spec]
+                if tuner:
+                    args += ["--max-rate", str(tuner.share())]
+                return is_stale, group_file, self._run_nmap_stage(args, [hosts], group_file, stall_timeout=stall_timeout)
+                
+            stage_files = []
+            fingerprinted = []
+            if groups:
+                self.notify(f"تشغيل nmap على {len(groups)} مجموعة ({len(stale)} جهاز يحتاج اكتشاف الإصدار)...")
+                pool_size = max(1, min(int(workers or self.config.get("scan_workers", 0) or os.cpu_count() or 4), len(groups)))
+                # المجموعات المتوازية تتقاسم معدل الضابط بدلاً من أن تحصل كل منها على المعدل كاملاً
+                with (tuner.reserve(pool_size) if tuner else contextlib.nullcontext()), \
+                        ThreadPoolExecutor(max_workers=pool_size) as pool:
+                    futures = [_submit_in_context(pool, run_group, i, key, hosts) for i, (key, hosts) in enumerate(groups.items())]
+                    for future in futures:
+                        is_stale, group_file, code = future.result()
+                        if code != 0:
+                            self.notify("فشلت إحدى مجموعات اكتشاف الإصدارات، ستظهر منافذها بدون إصدارات", "warning")
+                            continue
+                        stage_files.append(group_file)
+                        if is_stale:
+                            fingerprinted.append(group_file)
+                            
+            # حفظ النتائج الجديدة في الذاكرة
+            entries = []
+            for group_file in fingerprinted:
+                for record in iter_nmap_hosts(group_file):
+                    ip = record['ipv4'] or record['ipv6']
+                    for port in record['ports']:
+                        if port['state'] == "open" and port['service']:
+                            entries.append(dict(port, ip=ip, banner_hash=banners.get((ip, port['port']))))
+            if entries:
+                cache.store(entries)
+                
+            # دمج النتائج: نتائج المرحلة 3 أولاً ثم باقي الأجهزة من المرحلة 1، مع إضافة الخدمات المحفوظة
+            seen = set()
+            hits_by_host = {}
+            for ip, port, protocol in hits:
+                hits_by_host.setdefault(ip, []).append((port, protocol))
+            
+            def patch(host):
+                address = next((a.get('addr') for a in host.findall('address') if a.get('addrtype') in ("ipv4", "ipv6")), None)
+                if address in seen:
+                    return None
+                seen.add(address)
+                ports_elem = host.find('ports')
+                if ports_elem is None:
+                    ports_elem = ET.SubElement(host, 'ports')
+                present = {(int(port.get('portid')), port.get('protocol')) for port in ports_elem.findall('port')}
+                for number, protocol in hits_by_host.get(address, ()):
+                    if (number, protocol) not in present:
+                        port = ET.SubElement(ports_elem, 'port', protocol=protocol, portid=str(number))
+                        ET.SubElement(port, 'state', state="open", reason="cache")
+                for port in ports_elem.findall('port'):
+                    hit = hits.get((address, int(port.get('portid')), port.get('protocol')))
+                    if hit is None:
+                        continue
+                    for service in port.findall('service'):
+                        port.remove(service)
+                    attrs = {field: hit[field] for field in FingerprintCache.FIELDS[1:] if hit[field]}
+                    service = ET.SubElement(port, 'service', dict(attrs, name=hit['service'] or "unknown", method="cache"))
+                    for cpe in json.loads(hit['cpe'] or "[]"):
+                        ET.SubElement(service, 'cpe').text = cpe
+                return host
+                
+            args = f"nmap {' '.join(profile['args'])} -oX {output_file} {target}"
+            merge_nmap_xml(stage_files + [ports_file], output_file, args=args, transform=patch)
+            self.log_activity(f"ذاكرة البصمات: {len(hits)} منفذ محفوظ، {len(misses)} منفذ جديد أو متغير",
+                              event="fingerprint_cache", cached=len(hits), fingerprinted=len(misses), result_file=output_file)
+            return 0
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            
+    def run_sharded_scan(self, scan_opt, shards, output_file, workers=None, progress_callback=None, stall_timeout=0,
+                         tuner=None, host_callback=None):
+        """تشغيل أجزاء المسح كعمليات nmap متوازية ضمن مجموعة عمال محدودة ثم دمج النتائج
+
+        إذا مُرر tuner (RateTuner) يبدأ كل جزء بحصته من المعدل الحالي (المعدل مقسوماً على العمليات
+        المتوازية) ويُحدث المعدل من الحزم المفقودة عند انتهائه.
+        إذا مُرر host_callback يستقبل أجهزة كل جزء عند انتهائه (قبل دمج التقارير).
+        """
+        if not workers:
+            workers = self.config.get("scan_workers", 0) or os.cpu_count() or 4
+        workers = max(1, min(int(workers), len(shards)))
+        
+        self.notify(f"تم تقسيم الهدف إلى {len(shards)} جزء، سيتم مسحها باستخدام {workers} عملية متوازية")
+        
+        # مجلد مؤقت لتقارير الأجزاء
+        shard_dir = tempfile.mkdtemp(prefix="shards_", dir=self.scan_results)
+        stats_every = self.config.get("nmap_stats_interval", "2s")
+        shard_progress = {}
+        
+        def run_shard(index, hosts):
+            shard_file = os.path.join(shard_dir, f"shard_{index:05d}.xml")
+            rate_args = ["--max-rate", str(tuner.share())] if tuner else []
+            cmd = (["nmap"] + scan_opt.split() + rate_args + nmap_family_args(hosts)
+                   + ["--stats-every", stats_every, "-oX", shard_file, "--"] + hosts)
+            
+            def on_progress(event):
+                if event['type'] == "progress":
+                    shard_progress[index] = event['percent']
+                elif event['type'] == "finished" and tuner:
+                    rate = tuner.observe(event['dropped_probes'], event['sent_probes'], event['retransmission_giveups'])
+                    self.notify(f"الجزء {index + 1}: فقد {event['dropped_probes']}/{event['sent_probes']} حزمة، "
+                                f"المعدل التالي {rate} حزمة/ث")
+                if progress_callback:
+                    progress_callback(dict(event, shard=index, shards=len(shards)))
+                    
+            returncode, stderr = self.run_nmap_process(cmd, on_progress, stall_timeout)
+            shard_progress[index] = 100.0
+            return index, shard_file, returncode, stderr
+        
+        completed = []
+        failed = 0
+        try:
+            with (tuner.reserve(workers) if tuner else contextlib.nullcontext()), \
+                    ThreadPoolExecutor(max_workers=workers) as pool:
+                pending = {_submit_in_context(pool, run_shard, i, hosts) for i, hosts in enumerate(shards)}
+                with tqdm(total=100, desc="تقدم المسح المجزأ", bar_format="{l_bar}{bar}| {n:.1f}%{postfix}",
+                          disable=not self.animations_enabled()) as pbar:
+                    while pending:
+                        done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            index, shard_file, returncode, stderr = future.result()
+                            if returncode == 0:
+                                completed.append((index, shard_file))
+                                if host_callback is not None:
+                                    for record in iter_nmap_hosts(shard_file):
+                                        device = nmap_host_to_device(record)
+                                        if device:
+                                            host_callback(device)
+                            else:
+                                failed += 1
+                                self.notify(f"فشل مسح الجزء {index + 1}: {stderr}", "error")
+                        # التقدم الكلي هو متوسط تقدم جميع الأجزاء
+                        pbar.n = sum(shard_progress.values()) / len(shards)
+                        pbar.set_postfix_str(f"{len(completed) + failed}/{len(shards)}", refresh=False)
+                        pbar.refresh()
+                        
+            if not completed:
+                return 1
+                
+            if failed:
+                self.notify(f"فشل {failed} من أصل {len(shards)} جزء. النتائج المدمجة غير مكتملة.", "warning")
+                self.log_activity(f"فشل {failed} جزء من المسح المجزأ", event="scan_shards_failed", failed=failed,
+                                  shards=len(shards), result_file=output_file)
+                
+            # دمج تقارير الأجزاء بترتيبها الأصلي
+            completed.sort()
+            args = f"nmap {scan_opt} -oX {output_file} " + " ".join(" ".join(hosts) for hosts in shards)
+            merge_nmap_xml([shard_file for _, shard_file in completed], output_file, args=args)
+            return 0
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+            
+    def parse_nmap_results(self, xml_file, exporter=None, devices=None):
+        """تحليل نتائج مسح nmap وعرضها بتنسيق مناسب (مع تصديرها أثناء التحليل إذا مُرر exporter)
+
+        تُرجع CompactDevices: تُستخدم كقائمة قواميس الأجهزة بدون الاحتفاظ بها كلها في الذاكرة.
+        devices: أجهزة محللة مسبقاً من نفس التقرير للعرض فقط بدون تحليله مرة أخرى.
+        """
+        try:
+            if not os.path.exists(xml_file):
+                print(f"{Fore.RED}[!] ملف نتائج المسح غير موجود: {xml_file}{Style.RESET_ALL}")
+                return
+                
+            # تحليل تدريجي لملف XML وجمع الأجهزة في حاوية مضغوطة (القواميس تُنشأ عند العرض فقط)
+            if devices is None or exporter is not None:
+                with metrics.phase("network_scan", "parse"):
+                    devices = CompactDevices.from_xml(xml_file, exporter)
+
+            if not devices:
+                print(f"{Fore.YELLOW}[*] لم يتم العثور على أجهزة نشطة في نطاق المسح{Style.RESET_ALL}")
+                return
+                
+            # عرض الأجهزة المكتشفة
+            print(f"{Fore.GREEN}[+] تم اكتشاف {len(devices)} جهاز نشط:{Style.RESET_ALL}")
+            
+            table_data = (
+                [
+                    device['ip'],
+                    device['mac'],
+                    device['hostname'],
+                    ", ".join([f"{p['port']}/{p['protocol']} ({p['service']})" for p in device['open_ports']])
+                    if device['open_ports'] else "لا توجد منافذ مفتوحة"
+                ]
+                for device in devices
+            )
+                
+            # عرض النتائج في جدول (مختصر عند تجاوز الحد لأن tabulate بطيء مع الجداول الكبيرة)
+            headers = ["عنوان IP", "عنوان MAC", "اسم الجهاز", "المنافذ المفتوحة"]
+            with metrics.phase("network_scan", "render"):
+                print_table(table_data, headers, self.config.get("table_max_rows", 200) or None)
+            
+            return devices
+            
+        except Exception as e:
+            print(f"{Fore.RED}[!] خطأ في تحليل نتائج المسح: {str(e)}{Style.RESET_ALL}")
+            return None
+    
+    def select_wireless_interface(self, interface=None):
+        """التحقق من أدوات المسح اللاسلكي واختيار الواجهة (بالسؤال إذا لم تُحدد)"""
+        # التحقق من نوع نظام التشغيل
+        if self.os_type != "Linux":
+            print(f"{Fore.RED}[!] هذه الميزة متاحة فقط على أنظمة لينكس{Style.RESET_ALL}")
+            return None
+            
+        # التحقق من وجود الأدوات المطلوبة
+        if not self.env.has("iwlist") and not self.env.has("iw"):
+            print(f"{Fore.RED}[!] الأداة iwlist غير مثبتة. جاري التثبيت...{Style.RESET_ALL}")
+            try:
+                family = self.env.family
+                if family in ("debian", "kali"):
+                    subprocess.run(["apt-get", "install", "-y", "wireless-tools"], check=True)
+                elif family == "arch":
+                    subprocess.run(["pacman", "-S", "--noconfirm", "wireless_tools"], check=True)
+                elif family == "fedora":
+                    subprocess.run(["dnf", "install", "-y", "wireless-tools"], check=True)
+                else:
+                    print(f"{Fore.RED}[!] لا يمكن تثبيت الأدوات المطلوبة تلقائياً. يرجى تثبيت حزمة wireless-tools يدوياً.{Style.RESET_ALL}")
+                    return None
+            except subprocess.CalledProcessError:
+                print(f"{Fore.RED}[!] فشل تثبيت الأدوات المطلوبة{Style.RESET_ALL}")
+                return None
+                
+        # الحصول على واجهات الشبكة اللاسلكية من الجرد مباشرة
+        wireless_interfaces = [iface['name'] for iface in self.get_network_interfaces() if iface['wireless']]
+                
+        if not wireless_interfaces:
+            print(f"{Fore.RED}[!] لم يتم العثور على واجهات شبكة لاسلكية{Style.RESET_ALL}")
+            return None
+            
+        if interface:
+            # الواجهة محددة مسبقاً (بدون سؤال)
+            if interface not in wireless_interfaces:
+                print(f"{Fore.RED}[!] الواجهة '{interface}' ليست واجهة لاسلكية{Style.RESET_ALL}")
+                return None
+            selected_iface = interface
+        else:
+            # عرض الواجهات اللاسلكية المتاحة
+            print(f"{Fore.CYAN}[*] واجهات الشبكة اللاسلكية المتاحة:{Style.RESET_ALL}")
+            for i, iface in enumerate(wireless_interfaces):
+                print(f"  {i+1}. {iface}")
+                
+            # اختيار الواجهة للمسح
+            try:
+                choice = int(input(f"{Fore.YELLOW}اختر واجهة للمسح (0 للإلغاء): {Style.RESET_ALL}"))
+                if choice == 0:
+                    return None
+                    
+                if 1 <= choice <= len(wireless_interfaces):
+                    selected_iface = wireless_interfaces[choice-1]
+                else:
+                    print(f"{Fore.RED}[!] اختيار غير صالح{Style.RESET_ALL}")
+                    return None
+            except ValueError:
+                print(f"{Fore.RED}[!] إدخال غير صالح{Style.RESET_ALL}")
+                return None
+        return selected_iface
+        
+    def wireless_interface(self, interface=None):
+        """الواجهة اللاسلكية للمسح بدون أسئلة (المحددة أو الأولى المتاحة)، ترفع ToolkitError إذا تعذر المسح"""
+        if self.os_type != "Linux":
+            raise UnsupportedPlatformError("هذه الميزة متاحة فقط على أنظمة لينكس")
+        if not self.env.has("iwlist") and not self.env.has("iw"):
+            raise ToolNotFoundError("wireless-tools", "الأداة iwlist غير مثبتة")
+        wireless_interfaces = [iface['name'] for iface in self.get_network_interfaces() if iface['wireless']]
+        if not wireless_interfaces:
+            raise TargetError("لم يتم العثور على واجهات شبكة لاسلكية")
+        if interface is None:
+            return wireless_interfaces[0]
+        if interface not in wireless_interfaces:
+            raise TargetError(f"الواجهة '{interface}' ليست واجهة لاسلكية")
+        return interface
+        
+    def run_iwlist_scan(self, iface):
+        """تنفيذ مسح واحد على الواجهة وإرجاع قائمة الشبكات (ترفع ScanError عند الفشل)"""
+        # تفعيل وضع المسح للواجهة
+        if self.is_root:
+            subprocess.run(["ifconfig", iface, "up"], check=True)
+            
+        # iwlist إذا كان متوفراً وإلا iw، مع تحليل المخرجات أثناء قراءتها
+        if self.env.has("iwlist") or not self.env.has("iw"):
+            cmd, parser = ["iwlist", iface, "scan"], iter_iwlist_cells
+        else:
+            cmd, parser = ["iw", "dev", iface, "scan"], iter_iw_cells
+        # التحليل يتم أثناء قراءة المخرجات، فمرحلة "scan" تشمل زمن الأداة والتحليل معاً
+        with metrics.phase("wireless_scan", "spawn"):
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace")
+        # قراءة stderr في خيط منفصل حتى لا يمتلئ أنبوبه وتتوقف الأداة أثناء قراءة stdout
+        stderr_lines = []
+        reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+        reader.start()
+        with metrics.phase("wireless_scan", "scan"), process:
+            networks = list(parser(process.stdout))
+            reader.join()
+        stderr = "".join(stderr_lines)
+        metrics.inc("toolkit_processes_total", program=cmd[0], status="ok" if process.returncode == 0 else "failed")
+        metrics.inc("toolkit_networks_parsed_total", len(networks), parser=cmd[0])
+        if process.returncode != 0:
+            raise ScanError(f"فشل المسح: {stderr.strip()}", process.returncode, stderr)
+        return networks
+        
+    def scan_wireless(self, interface=None):
+        """مسح الشبكات اللاسلكية بدون طباعة أو أسئلة (واجهة المكتبة)
+
+        تُرجع WirelessScanResult وترفع UnsupportedPlatformError أو ToolNotFoundError أو TargetError أو ScanError.
+        """
+        selected_iface = self.wireless_interface(interface)
+        started = time.monotonic()
+        self.log_activity("بدء مسح الشبكات اللاسلكية", event="wifi_started", interface=selected_iface)
+        try:
+            networks = self.run_iwlist_scan(selected_iface)
+            output_file = None
+            if networks:
+                # حفظ النتائج في ملف
+                output_file = self.new_result_file("wifi_scan", "json")
+                with metrics.phase("wireless_scan", "write"), open(output_file, 'w') as f:
+                    json.dump(networks, f, indent=4)
+                    
+                self.notify(f"تم حفظ نتائج المسح في: {output_file}", "success")
+                self.log_activity(f"اكتمل مسح الشبكات اللاسلكية. ملف النتائج: {output_file}", event="wifi_finished",
+                                  interface=selected_iface, duration=round(time.monotonic() - started, 3),
+                                  result_file=output_file, networks=len(networks))
+                self.store_wifi_results(networks, selected_iface, output_file)
+        except Exception as e:
+            self.log_activity(f"خطأ في مسح الشبكات اللاسلكية: {str(e)}", event="wifi_error",
+                              duration=round(time.monotonic() - started, 3), error=str(e))
+            metrics.inc("toolkit_operations_total", operation="wireless_scan", status="error")
+            if isinstance(e, ScanError):
+                raise
+            raise ScanError(f"خطأ أثناء المسح اللاسلكي: {str(e)}") from e
+            
+        metrics.inc("toolkit_operations_total", operation="wireless_scan", status="ok")
+        metrics.observe("toolkit_operation_seconds", time.monotonic() - started, operation="wireless_scan")
+        return WirelessScanResult(selected_iface, [WirelessNetwork.from_dict(network) for network in networks],
+                                  output_file, round(time.monotonic() - started, 3))
+        
+    def wireless_scan(self, interface=None):
+        """مسح للشبكات اللاسلكية المتاحة من سطر الأوامر (اختيار الواجهة بالسؤال وعرض النتائج فوق scan_wireless())"""
+        print(f"{Fore.CYAN}[*] جاري البحث عن الشبكات اللاسلكية المتاحة...{Style.RESET_ALL}")
+        
+        selected_iface = self.select_wireless_interface(interface)
+        if not selected_iface:
+            return None
+            
+        print(f"{Fore.CYAN}[*] جاري مسح الشبكات اللاسلكية باستخدام {selected_iface}...{Style.RESET_ALL}")
+        try:
+            result = self.scan_wireless(selected_iface)
+        except ToolkitError as e:
+            print(f"{Fore.RED}[!] {str(e)}{Style.RESET_ALL}")
+            return None
+            
+        if not result.networks:
+            print(f"{Fore.YELLOW}[*] لم يتم العثور على شبكات لاسلكية{Style.RESET_ALL}")
+            return []
+            
+        # عرض النتائج
+        print(f"{Fore.GREEN}[+] تم العثور على {len(result.networks)} شبكة لاسلكية:{Style.RESET_ALL}")
+        table_data = []
+        for network in result.networks:
+            table_data.append([
+                network.ssid,
+                network.bssid,
+                network.channel if network.channel is not None else "غير معروف",
+                f"{network.signal} dBm" if network.signal is not None else "غير معروف",
+                f"{network.quality:.0%}" if network.quality is not None else "غير معروف",
+                network.encryption
+            ])
+            
+        headers = ["اسم الشبكة", "عنوان BSSID", "القناة", "قوة الإشارة", "الجودة", "التشفير"]
+        with metrics.phase("wireless_scan", "render"):
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        return [network.to_dict() for network in result.networks]
+            
+    def wireless_monitor(self, interface=None, interval=None, duration=None, max_scans=None, on_delta=None):
+        """مراقبة مستمرة للشبكات اللاسلكية: إعادة المسح كل فترة مع جدول BSSID في الذاكرة وكتابة التغييرات فقط"""
+        if interval is None:
+            interval = self.config.get("wifi_monitor_interval", 10)
+        selected_iface = self.select_wireless_interface(interface)
+        if not selected_iface:
+            return None
+            
+        table = BssidTable(
+            max_entries=self.config.get("wifi_monitor_max_bssids", 4096),
+            expire_after=self.config.get("wifi_monitor_expire", 300),
+            signal_delta=self.config.get("wifi_monitor_signal_delta", 5)
+        )
+        output_file = self.new_result_file("wifi_monitor", "jsonl")
+        print(f"{Fore.CYAN}[*] بدء المراقبة اللاسلكية على {selected_iface} كل {interval} ثانية. اضغط Ctrl+C للإيقاف{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}[*] التغييرات تُكتب في: {output_file}{Style.RESET_ALL}")
+        self.log_activity(f"بدء المراقبة اللاسلكية على {selected_iface}", event="wifi_monitor_started",
+                          interface=selected_iface, result_file=output_file)
+        
+        started = time.monotonic()
+        scans = 0
+        total_deltas = 0
+        try:
+            with open(output_file, 'a') as f:
+                while True:
+                    scan_started = time.monotonic()
+                    try:
+                        networks = self.run_iwlist_scan(selected_iface)
+                    except ScanError as e:
+                        self.notify(str(e), "error")
+                        networks = None
+                    scans += 1
+                    if networks is not None:
+                        deltas = table.update(networks)
+                        # كتابة التغييرات فقط (سطر JSON لكل تغيير)
+                        for delta in deltas:
+                            f.write(json.dumps(delta, ensure_ascii=False) + "\n")
+                            if on_delta:
+                                on_delta(delta)
+                        f.flush()
+                        total_deltas += len(deltas)
+                        counts = {}
+                        for delta in deltas:
+                            counts[delta['type']] = counts.get(delta['type'], 0) + 1
+                        print(f"{Fore.CYAN}[*] مسح {scans}: {len(networks)} شبكة، {len(table)} في الجدول، "
+                              f"جديد {counts.get('new', 0)}، تغير {counts.get('changed', 0)}، اختفى {counts.get('lost', 0)}{Style.RESET_ALL}")
+                              
+                    if max_scans and scans >= max_scans:
+                        break
+                    if duration and time.monotonic() - started >= duration:
+                        break
+                    time.sleep(max(0, interval - (time.monotonic() - scan_started)))
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}[*] تم إيقاف المراقبة{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}[!] خطأ أثناء المراقبة اللاسلكية: {str(e)}{Style.RESET_ALL}")
+            self.log_activity(f"خطأ في المراقبة اللاسلكية: {str(e)}", event="wifi_error",
+                              duration=round(time.monotonic() - started, 3), error=str(e))
+            
+        snapshot = table.snapshot()
+        if snapshot:
+            headers = ["اسم الشبكة", "عنوان BSSID", "القناة", "الإشارة (أدنى/متوسط/أعلى)", "مرات الظهور"]
+            print(tabulate([[e['ssid'], e['bssid'], e['channel'], f"{e['signal_min']}/{e['signal_avg']}/{e['signal_max']}", e['seen']]
+                            for e in snapshot], headers=headers, tablefmt="grid"))
+            self.store_wifi_results(snapshot, selected_iface, output_file)
+        self.log_activity(f"انتهاء المراقبة اللاسلكية. ملف التغييرات: {output_file}", event="wifi_monitor_finished",
+                          interface=selected_iface, duration=round(time.monotonic() - started, 3), result_file=output_file,
+                          scans=scans, deltas=total_deltas, networks=len(snapshot))
+        return {'output_file': output_file, 'scans': scans, 'deltas': total_deltas, 'evicted': table.evicted, 'networks': snapshot}
+
+# المهمة الحالية في وضع الخدمة لتوجيه رسائل الأداة إلى أحداثها؛ متغير سياق (وليس threading.local)
+# حتى يصل إلى خيوط الأجزاء التي تُشغل عبر _submit_in_context
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class _DaemonJob:
+    """مهمة في وضع الخدمة مع سجل أحداثها (للمتابعة والبث المباشر)"""
+
+    __slots__ = ("id", "kind", "params", "status", "created", "started", "finished", "result", "error",
+                 "future", "events", "seq", "condition")
+
+    def __init__(self, job_id, kind, params, max_events=1000):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.future = None
+        # آخر الأحداث فقط (حجم ثابت) مع رقم تسلسلي لاستئناف البث
+        self.events = deque(maxlen=max_events)
+        self.seq = 0
+        self.condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def emit(self, event, data):
+        with self.condition:
+            self.seq += 1
+            self.events.append((self.seq, event, data))
+            self.condition.notify_all()
+
+    def events_after(self, seq, timeout):
+        """الأحداث بعد الرقم seq (تنتظر حتى timeout إذا لم توجد أحداث جديدة والمهمة لم تنتهِ)"""
+        with self.condition:
+            if self.seq <= seq and not self.done:
+                self.condition.wait(timeout)
+            return [item for item in self.events if item[0] > seq]
+
+    def set_status(self, status, result=None, error=None):
+        with self.condition:
+            self.status = status
+            if status == "running":
+                self.started = time.time()
+            elif status in ("done", "failed", "cancelled"):
+                self.finished = time.time()
+            self.result = result
+            self.error = error
+        self.emit("status", {'status': status, 'error': error})
+
+    def to_dict(self):
+        result = self.result.to_dict() if self.result is not None else None
+        return {'id': self.id, 'kind': self.kind, 'params': self.params, 'status': self.status,
+                'created': self.created, 'started': self.started, 'finished': self.finished,
+                'error': self.error, 'result': result}
+
+
+class ToolkitDaemon:
+    """وضع الخدمة: واجهة HTTP/JSON محلية لإرسال مهام المسح ومتابعتها
+
+    جميع المهام تعمل على نسخة واحدة من الأداة ومجموعة عمال مشتركة، فتبقى الذاكرات المؤقتة
+    (فحص البيئة، جرد الواجهات، ذاكرة البصمات، قاعدة النتائج، ضوابط المعدل) جاهزة بين الطلبات.
+
+    المسارات:
+        POST   /scans                   {"target", "scan_type", "engine", "shard_size", "workers", "differential", "interface"}
+        POST   /wifi                    {"interface"}
+        GET    /jobs                    قائمة المهام
+        GET    /jobs/<id>               حالة المهمة ونتيجتها
+        DELETE /jobs/<id>               إلغاء مهمة لم تبدأ بعد
+        GET    /jobs/<id>/events        بث الأحداث والأجهزة فور توفرها (SSE) ثم باقي الأجهزة عند الانتهاء (?after=رقم للاستئناف)
+        GET    /jobs/<id>/results       الأجهزة أو الشبكات (?format=ndjson للبث سطراً سطراً)
+        GET    /history                 النتائج المخزنة (?ip= &port= &service= &ssid= &bssid= &days= &limit=)
+        GET    /history/events          سجل النشاط (?since= &until= &event= &limit=)
+        GET    /metrics                 المقاييس بصيغة Prometheus النصية
+        GET    /health
+    """
+
+    SCAN_FIELDS = ("target", "scan_type", "engine", "shard_size", "workers", "stall_timeout", "differential",
+                   "interface", "fingerprint_cache")
+
+    def __init__(self, tool, host="127.0.0.1", port=8765, workers=4, token=None, max_jobs=1000, metrics_file=None):
+        self.tool = tool
+        self.host = host
+        self.port = port
+        # بدون رمز محدد يُنشأ رمز عشوائي لكل تشغيل ويُعرض عند البدء
+        self.generated_token = not token
+        self.token = token or secrets.token_urlsafe(24)
+        self.max_jobs = max_jobs
+        # القياس مفعل دائماً في وضع الخدمة لعرضه على /metrics (وكتابته في metrics_file بعد كل مهمة)
+        self.metrics_file = metrics_file
+        metrics.enabled = True
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        self.server = None
+        tool.headless = True
+        tool.interactive = False
+        tool.on_message = self._on_message
+
+    def _on_message(self, level, message):
+        job = _current_job.get()
+        if job is not None:
+            job.emit("message", {'level': level, 'message': message})
+        else:
+            color, prefix = AhmadToolkit.MESSAGE_STYLES.get(level, AhmadToolkit.MESSAGE_STYLES["info"])
+            print(f"{color}{prefix} {message}{Style.RESET_ALL}")
+
+    def submit(self, kind, params):
+        """إضافة مهمة إلى مجموعة العمال (ترفع ToolkitError إذا كانت المدخلات غير صالحة)"""
+        if kind == "scan":
+            params = {key: params[key] for key in self.SCAN_FIELDS if params.get(key) is not None}
+            params.setdefault("scan_type", self.tool.config.get("default_scan_type", "quick"))
+            if not params.get("target") and not params.get("interface"):
+                raise TargetError("يجب تحديد هدف المسح أو الواجهة")
+            if params.get("target") is not None and not isinstance(params["target"], str):
+                raise TargetError("target يجب أن يكون نصاً")
+            if params.get("target"):
+                validate_scan_target(params["target"])
+            if not isinstance(params["scan_type"], str):
+                raise ProfileError("scan_type يجب أن يكون نصاً")
+            self.tool.scan_profiles().resolve(params["scan_type"])
+            if params.get("engine") is not None and params["engine"] not in SCAN_ENGINES:
+                raise ProfileError(f"engine يجب أن يكون أحد: {', '.join(SCAN_ENGINES)}")
+            # الحقول الرقمية تُفحص هنا لترجع 400 بدلاً من فشل المهمة داخل العامل
+            for key in ("workers", "shard_size"):
+                if key in params and (isinstance(params[key], bool) or not isinstance(params[key], int)
+                                      or params[key] < 1):
+                    raise ProfileError(f"{key} يجب أن يكون عدداً صحيحاً موجباً")
+            if "stall_timeout" in params and (isinstance(params["stall_timeout"], bool)
+                                              or not isinstance(params["stall_timeout"], (int, float))
+                                              or not 0 <= params["stall_timeout"] < float("inf")):
+                raise ProfileError("stall_timeout يجب أن يكون عدداً غير سالب بالثواني")
+        else:
+            params = {'interface': params.get("interface")}
+            
+        with self._lock:
+            job = _DaemonJob(str(self._next_id), kind, params)
+            self._next_id += 1
+            self.jobs[job.id] = job
+            # حذف أقدم المهام المنتهية عند تجاوز الحد
+            while len(self.jobs) > self.max_jobs:
+                oldest = next((j for j in self.jobs.values() if j.done), None)
+                if oldest is None:
+                    break
+                del self.jobs[oldest.id]
+        job.emit("status", {'status': "queued", 'error': None})
+        job.future = self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.status == "cancelled":
+            return
+        job.set_status("running")
+        context_token = _current_job.set(job)
+        try:
+            if job.kind == "scan":
+                result = self.tool.scan(progress_callback=lambda event: job.emit("progress", event),
+                                        host_callback=lambda device: job.emit("host", device), **job.params)
+            else:
+                result = self.tool.scan_wireless(job.params['interface'])
+            job.set_status("done", result=result)
+        except ToolkitError as e:
+            job.set_status("failed", error=str(e))
+        except Exception as e:
+            job.set_status("failed", error=f"{type(e).__name__}: {str(e)}")
+        finally:
+            _current_job.reset(context_token)
+            metrics.inc("toolkit_daemon_jobs_total", kind=job.kind, status=job.status)
+            if self.metrics_file:
+                try:
+                    metrics.write(self.metrics_file)
+                except OSError as e:
+                    self._on_message("warning", f"تعذر كتابة ملف المقاييس: {str(e)}")
+
+    def cancel(self, job):
+        """إلغاء مهمة منتظرة (المهام الجارية لا تُلغى)"""
+        if job.status == "queued" and job.future.cancel():
+            job.set_status("cancelled")
+            return True
+        return False
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def job_records(self, job):
+        """سجلات نتيجة المهمة: الأجهزة (CompactDevices) أو الشبكات اللاسلكية"""
+        if job.result is None:
+            return []
+        if job.kind == "scan":
+            return job.result.devices()
+        return [network.to_dict() for network in job.result.networks]
+
+    def history(self, query):
+        """الاستعلام عن النتائج المخزنة بنفس معايير الأمر history"""
+        days = _to_float(query.get("days"))
+        since = time.time() - days * 86400 if days else None
+        limit = int(query.get("limit") or 1000)
+        store = self.tool.get_results_store()
+        if query.get("ssid") or query.get("bssid"):
+            return store.query_wifi(ssid=query.get("ssid"), bssid=query.get("bssid"), since=since, limit=limit)
+        if query.get("port") or query.get("service"):
+            return store.query_ports(ip=query.get("ip"), port=_to_int(query.get("port")), service=query.get("service"),
+                                     since=since, limit=limit)
+        return store.query_hosts(ip=query.get("ip"), since=since, limit=limit)
+
+    def history_events(self, query, events):
+        since = _parse_time(query["since"]) if query.get("since") else None
+        until = _parse_time(query["until"]) if query.get("until") else None
+        limit = int(query.get("limit") or 100)
+        return list(deque(self.tool.logger.query(since=since, until=until, events=events or None), maxlen=limit))
+
+    def serve(self):
+        """تشغيل الخادم حتى Ctrl+C"""
+        self.server = http_server.ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.tool.log_activity(f"بدء وضع الخدمة على {self.host}:{self.port}", event="daemon_started",
+                               host=self.host, port=self.port)
+        self._on_message("success", f"وضع الخدمة يعمل على http://{self.host}:{self.port} (Ctrl+C للإيقاف)")
+        if self.generated_token:
+            self._on_message("info", f"رمز الوصول (Authorization: Bearer): {self.token}")
+        try:
+            self.server.serve_forever(poll_interval=0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        return len(self.jobs)
+
+    def close(self):
+        if self.server is not None:
+            self.server.server_close()
+        for job in list(self.jobs.values()):
+            if job.status == "queued":
+                self.cancel(job)
+        self._pool.shutdown(wait=False)
+        self.tool.log_activity("إيقاف وضع الخدمة", event="daemon_stopped", jobs=len(self.jobs))
+
+    def _handler_class(self):
+        daemon = self
+
+        class Handler(http_server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            server_version = "AhmadToolkit/2.0"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                daemon._dispatch(self, "GET")
+
+            def do_POST(self):
+                daemon._dispatch(self, "POST")
+
+            def do_DELETE(self):
+                daemon._dispatch(self, "DELETE")
+
+        return Handler
+
+    def _dispatch(self, request, method):
+        url = urllib_parse.urlsplit(request.path)
+        query = {key: values[-1] for key, values in urllib_parse.parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if not self._same_origin(request):
+                return self._send_json(request, 403, {'error': "forbidden host or origin"})
+            authorization = request.headers.get("Authorization") or ""
+            if not secrets.compare_digest(authorization.encode("utf-8"), f"Bearer {self.token}".encode("utf-8")):
+                return self._send_json(request, 401, {'error': "unauthorized"})
+            if parts == ["health"]:
+                return self._send_json(request, 200, {'ok': True, 'jobs': len(self.jobs)})
+            if parts == ["metrics"] and method == "GET":
+                return self._send_text(request, 200, metrics.prometheus(), "text/plain; version=0.0.4")
+            if parts in (["scans"], ["wifi"]) and method == "POST":
+                if request.headers.get_content_type() != "application/json":
+                    return self._send_json(request, 415, {'error': "Content-Type must be application/json"})
+                job = self.submit("scan" if parts == ["scans"] else "wifi", self._read_json(request))
+                return self._send_json(request, 202, job.to_dict())
+            if parts == ["jobs"] and method == "GET":
+                with self._lock:
+                    jobs = [job.to_dict() for job in self.jobs.values()]
+                return self._send_json(request, 200, {'jobs': jobs})
+            if len(parts) >= 2 and parts[0] == "jobs":
+                job = self.get_job(parts[1])
+                if job is None:
+                    return self._send_json(request, 404, {'error': "job not found"})
+                if len(parts) == 2 and method == "GET":
+                    return self._send_json(request, 200, job.to_dict())
+                if len(parts) == 2 and method == "DELETE":
+                    cancelled = self.cancel(job)
+                    return self._send_json(request, 200 if cancelled else 409, job.to_dict())
+                if parts[2:] == ["events"] and method == "GET":
+                    return self._stream_events(request, job, int(query.get("after") or 0))
+                if parts[2:] == ["results"] and method == "GET":
+                    if not job.done:
+                        return self._send_json(request, 409, {'error': "job not finished", 'status': job.status})
+                    if query.get("format") == "ndjson":
+                        return self._stream(request, "application/x-ndjson",
+                                            (json.dumps(record, ensure_ascii=False) + "\n" for record in self.job_records(job)))
+                    return self._send_json(request, 200, dict(job.to_dict(), records=self.job_records(job)))
+            if parts == ["history"] and method == "GET":
+                return self._send_json(request, 200, {'rows': self.history(query)})
+            if parts == ["history", "events"] and method == "GET":
+                events = urllib_parse.parse_qs(url.query).get("event")
+                return self._send_json(request, 200, {'events': self.history_events(query, events)})
+            return self._send_json(request, 404, {'error': "not found"})
+        except (ToolkitError, ValueError, argparse.ArgumentTypeError) as e:
+            return self._send_json(request, 400, {'error': str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            return None
+        except Exception as e:
+            return self._send_json(request, 500, {'error': f"{type(e).__name__}: {str(e)}"})
+
+    def _local_name(self, name):
+        """اسم من ترويسة Host أو Origin يشير إلى الخادم: localhost أو عنوان الاستماع أو عنوان IP مباشر
+
+        أسماء النطاقات الأخرى مرفوضة لأن إعادة ربط DNS (DNS rebinding) تحتاج إلى اسم نطاق.
+        """
+        if name in ("localhost", self.host):
+            return True
+        try:
+            ipaddress.ip_address(name)
+            return True
+        except ValueError:
+            return False
+
+    def _same_origin(self, request):
+        """رفض الطلبات من صفحات المواقع الأخرى: Host و Origin (إذا وُجد) يجب أن يشيرا إلى هذا الخادم"""
+        for value, schemes in ((f"//{request.headers.get('Host') or ''}", ("",)),
+                               (request.headers.get("Origin"), ("http",))):
+            if value is None:
+                continue
+            url = urllib_parse.urlsplit(value)
+            try:
+                port = url.port or 80
+            except ValueError:
+                return False
+            if url.scheme not in schemes or not url.hostname or not self._local_name(url.hostname) or port != self.port:
+                return False
+        return True
+
+    @staticmethod
+    def _read_json(request):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b"{}"
+        data = json.loads(body or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("جسم الطلب يجب أن يكون كائن JSON")
+        return data
+
+    @staticmethod
+    def _send_json(request, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    @staticmethod
+    def _send_text(request, status, text, content_type="text/plain"):
+        body = text.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    @staticmethod
+    def _stream(request, content_type, chunks):
+        """إرسال استجابة مقسمة (chunked) أثناء توليدها"""
+        request.send_response(200)
+        request.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        request.send_header("Cache-Control", "no-cache")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            if data:
+                request.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                request.wfile.flush()
+        request.wfile.write(b"0\r\n\r\n")
+
+    def _stream_events(self, request, job, after):
+        def events():
+            seq = after
+            # الأجهزة المرسلة أثناء المسح لا تُعاد في النهاية (وما سقط من سجل الأحداث المحدود يُرسل عندها)
+            sent = set()
+            while True:
+                items = job.events_after(seq, timeout=15)
+                for seq, event, data in items:
+                    if event == "host":
+                        sent.add(data['ip'])
+                    yield f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=_json_default)}\n\n"
+                if not items:
+                    # تعليق لإبقاء الاتصال مفتوحاً
+                    yield ": keepalive\n\n"
+                if job.done and seq >= job.seq:
+                    break
+            for record in self.job_records(job):
+                if job.kind == "scan" and record['ip'] in sent:
+                    continue
+                yield f"event: {'host' if job.kind == 'scan' else 'network'}\ndata: {json.dumps(record, ensure_ascii=False)}\n\n"
+            yield f"event: end\ndata: {json.dumps(job.to_dict(), ensure_ascii=False, default=_json_default)}\n\n"
+        return self._stream(request, "text/event-stream", events())
+
+
+def _parse_time(value):
+    """تحويل وقت مكتوب (تاريخ أو epoch) إلى ثوانٍ منذ epoch"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"صيغة وقت غير صالحة: {value}")
+
+
+def _add_common_options(parser, default=False):
+    """إضافة خيارات الإخراج العامة (تُقبل قبل الأمر الفرعي أو بعده)"""
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", default=default, help="إخراج النتيجة كمستند JSON واحد (بدون شعار أو ألوان)")
+    output.add_argument("--ndjson", action="store_true", default=default, help="إخراج النتائج بصيغة NDJSON (سجل واحد في كل سطر)")
+    parser.add_argument("-q", "--quiet", action="store_true", default=default, help="إخفاء الرسائل النصية")
+    parser.add_argument("--no-banner", action="store_true", default=default, help="عدم عرض الشعار")
+    parser.add_argument("--no-color", action="store_true", default=default, help="تعطيل الألوان")
+    parser.add_argument("-y", "--yes", action="store_true", default=default, help="الموافقة تلقائياً (المتابعة بدون صلاحيات الجذر)")
+    parser.add_argument("--fast-start", action="store_true", default=default, help="بدء سريع بدون رسوم متحركة أو تحقق من التحديثات")
+    parser.add_argument("--metrics", action="store_true", default=default,
+                        help="قياس أزمنة المراحل والعدادات وعرض ملخصها (ضمن مستند --json في الوضع الآلي)")
+    parser.add_argument("--metrics-file", metavar="FILE", default=default if default is argparse.SUPPRESS else None,
+                        help="كتابة المقاييس بصيغة Prometheus النصية في ملف عند الانتهاء")
+
+
+def build_arg_parser():
+    """إنشاء محلل أوامر سطر الأوامر والأوامر الفرعية"""
+    parser = argparse.ArgumentParser(prog="py-toolkit.py", description="Ahmad Toolkit - أداة شبكات متعددة الوظائف")
+    _add_common_options(parser)
+    
+    # الخيارات العامة بعد الأمر الفرعي لا تلغي القيم المحددة قبله
+    common = argparse.ArgumentParser(add_help=False)
+    _add_common_options(common, default=argparse.SUPPRESS)
+    
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    
+    scan = commands.add_parser("scan", parents=[common], help="مسح الشبكة")
+    scan.add_argument("target", nargs="?", help="هدف المسح (CIDR أو نطاق أو قائمة أجهزة)")
+    scan.add_argument("-t", "--type", dest="scan_type",
+                      help=f"نوع المسح أو اسم ملف مسح من الإعدادات ({', '.join(AhmadToolkit.SCAN_OPTIONS)})")
+    scan.add_argument("-i", "--interface", help="اشتقاق الهدف من شبكة هذه الواجهة")
+    scan.add_argument("--engine", choices=SCAN_ENGINES, help="محرك المسح")
+    scan.add_argument("--shard-size", type=int, help="عدد العناوين في كل جزء من المسح المجزأ")
+    scan.add_argument("--workers", type=int, help="عدد عمليات nmap المتوازية")
+    scan.add_argument("--stall-timeout", type=float, help="إيقاف المسح إذا لم يتقدم خلال هذه المدة بالثواني")
+    scan.add_argument("--differential", action="store_true", help="مسح عميق للأجهزة الجديدة أو المتغيرة فقط")
+    scan.add_argument("--no-fingerprint-cache", dest="fingerprint_cache", action="store_false", default=None,
+                      help="اكتشاف إصدارات جميع المنافذ بدون استخدام ذاكرة البصمات")
+    scan.add_argument("--export", metavar="FILE", help="تصدير جرد المنافذ (csv أو ndjson أو ptcol حسب الامتداد)")
+    scan.add_argument("--export-format", choices=["csv", "ndjson", "columnar"], help="صيغة التصدير بدلاً من الامتداد")
+    
+    wifi = commands.add_parser("wifi", parents=[common], help="مسح الشبكات اللاسلكية")
+    wifi.add_argument("-i", "--interface", help="الواجهة اللاسلكية المستخدمة")
+    wifi.add_argument("--monitor", action="store_true", help="مراقبة مستمرة مع كتابة التغييرات فقط")
+    wifi.add_argument("--interval", type=float, help="الفاصل بين عمليات المسح في وضع المراقبة بالثواني")
+    wifi.add_argument("--duration", type=float, help="مدة المراقبة بالثواني (الافتراضي: حتى Ctrl+C)")
+    
+    install = commands.add_parser("install", parents=[common], help="تثبيت الأدوات")
+    install.add_argument("tool", nargs="+", choices=["bettercap", "nmap", "wireshark", "metasploit", "sqlmap", "all"],
+                         help="أداة أو أكثر (تُثبت معاً في عملية واحدة)")
+    
+    batch = commands.add_parser("batch", parents=[common], help="مسح قائمة أهداف عبر طابور دائم قابل للاستئناف")
+    batch_commands = batch.add_subparsers(dest="batch_command", metavar="ACTION")
+    batch_run = batch_commands.add_parser("run", parents=[common], help="إضافة أهداف من ملف أو stdin وتنفيذ الدفعة")
+    batch_run.add_argument("file", nargs="?", help="ملف الأهداف (هدف في كل سطر، - للقراءة من stdin). بدونه تُستأنف الدفعة")
+    batch_run.add_argument("--name", help="اسم الدفعة (الافتراضي: اسم الملف)")
+    batch_run.add_argument("-t", "--type", dest="scan_type",
+                           help=f"نوع المسح أو اسم ملف مسح من الإعدادات ({', '.join(AhmadToolkit.SCAN_OPTIONS)})")
+    batch_run.add_argument("--engine", choices=SCAN_ENGINES, help="محرك المسح")
+    batch_run.add_argument("--concurrency", type=int, help="عدد المهام المتزامنة")
+    batch_run.add_argument("--subnet-concurrency", type=int, help="الحد الأقصى للمهام المتزامنة في نفس الشبكة الفرعية")
+    batch_run.add_argument("--subnet-interval", type=float, help="أقل فاصل بالثواني بين مهمتين في نفس الشبكة الفرعية")
+    batch_run.add_argument("--retries", type=int, help="عدد مرات إعادة المحاولة")
+    batch_run.add_argument("--backoff", type=float, help="التأخير الأساسي قبل إعادة المحاولة بالثواني")
+    batch_status = batch_commands.add_parser("status", parents=[common], help="عرض حالة الدفعات")
+    batch_status.add_argument("--name", help="عرض مهام دفعة محددة")
+    
+    deps = commands.add_parser("deps", parents=[common], help="التحقق من المتطلبات")
+    deps_install = deps.add_mutually_exclusive_group()
+    deps_install.add_argument("--install-missing", dest="install_missing", action="store_true", default=None,
+                              help="تثبيت حزم بايثون المفقودة بدون سؤال")
+    deps_install.add_argument("--no-install", dest="install_missing", action="store_false", help="عدم تثبيت الحزم المفقودة")
+    
+    history = commands.add_parser("history", parents=[common], help="سجل النشاط ونتائج المسح المخزنة")
+    history.add_argument("-n", "--lines", type=int, default=20, help="عدد أسطر سجل النشاط المعروضة")
+    history.add_argument("--ip", help="البحث في النتائج حسب عنوان IP")
+    history.add_argument("--port", type=int, help="البحث عن المنافذ المفتوحة حسب الرقم")
+    history.add_argument("--service", help="البحث عن المنافذ المفتوحة حسب الخدمة")
+    history.add_argument("--ssid", help="البحث في الشبكات اللاسلكية حسب SSID")
+    history.add_argument("--bssid", help="البحث في الشبكات اللاسلكية حسب BSSID")
+    history.add_argument("--days", type=float, help="حصر النتائج في آخر عدد من الأيام")
+    history.add_argument("--since", type=_parse_time, help="أحداث السجل منذ وقت معين (YYYY-MM-DD[ HH:MM[:SS]] أو epoch)")
+    history.add_argument("--until", type=_parse_time, help="أحداث السجل حتى وقت معين")
+    history.add_argument("--event", action="append", help="تصفية أحداث السجل حسب النوع (يمكن تكراره، مثل scan_finished)")
+    history.add_argument("--count", action="store_true", help="عرض عدد الأحداث لكل نوع بدلاً من الأحداث نفسها")
+    
+    export = commands.add_parser("export", parents=[common], help="تصدير تقارير nmap إلى CSV أو NDJSON أو صيغة عمودية")
+    export.add_argument("xml_files", nargs="+", metavar="XML", help="تقارير nmap بصيغة XML")
+    export.add_argument("-o", "--output", required=True, help="ملف التصدير (.csv أو .ndjson أو .ptcol)")
+    export.add_argument("--format", dest="export_format", choices=["csv", "ndjson", "columnar"], help="صيغة التصدير بدلاً من الامتداد")
+    
+    daemon = commands.add_parser("daemon", parents=[common], help="تشغيل واجهة HTTP/JSON محلية لإرسال المهام ومتابعتها")
+    daemon.add_argument("--host", help="عنوان الاستماع (الافتراضي: 127.0.0.1)")
+    daemon.add_argument("--port", type=int, help="منفذ الاستماع (الافتراضي: 8765)")
+    daemon.add_argument("--workers", type=int, help="عدد المهام المتزامنة")
+    daemon.add_argument("--token", help="رمز يُطلب في ترويسة Authorization: Bearer (الافتراضي: رمز عشوائي يُعرض عند البدء)")
+    
+    config = commands.add_parser("config", parents=[common], help="عرض الإعدادات وتعديلها")
+    config_commands = config.add_subparsers(dest="config_command", metavar="ACTION")
+    config_commands.add_parser("list", help="عرض جميع الإعدادات")
+    config_get = config_commands.add_parser("get", help="عرض قيمة إعداد")
+    config_get.add_argument("key")
+    config_set = config_commands.add_parser("set", help="تعديل قيمة إعداد (القيمة بصيغة JSON أو نص)")
+    config_set.add_argument("key")
+    config_set.add_argument("value")
+    config_commands.add_parser("profiles", help="عرض ملفات المسح وخيارات nmap الناتجة عنها")
+    
+    return parser
+
+
+def _cli_scan(tool, args):
+    """تنفيذ الأمر scan"""
+    if not args.target and not args.interface and not tool.interactive:
+        print(f"{Fore.RED}[!] يجب تحديد هدف المسح أو الواجهة في الوضع غير التفاعلي{Style.RESET_ALL}")
+        return False, None, []
+        
+    scan_type = args.scan_type or tool.config.get("default_scan_type", "quick")
+    result = tool.network_scan(args.target, scan_type, shard_size=args.shard_size, workers=args.workers,
+                               engine=args.engine, stall_timeout=args.stall_timeout,
+                               differential=args.differential, interface=args.interface,
+                               export=args.export, export_format=args.export_format,
+                               fingerprint_cache=args.fingerprint_cache)
+    if not result:
+        return False, None, []
+        
+    payload = {'target': args.target, 'scan_type': scan_type}
+    if result.diff is not None:
+        payload['diff'] = dict(result.diff, output_file=result.output_file)
+    payload['output_file'] = result.output_file
+    # الأجهزة المحللة أثناء الحفظ أو العرض (بدون تحليل التقرير مرة أخرى)
+    devices = result.devices()
+    payload['devices'] = devices
+    return True, payload, devices
+
+
+def _cli_batch(tool, args):
+    """تنفيذ الأمر batch"""
+    if args.batch_command != "run":
+        rows = tool.batch_status(args.name)
+        if rows:
+            columns = ["target", "status", "attempts", "progress", "result_file", "error"] if args.name else list(rows[0])
+            print(tabulate([[row[c] for c in columns] for row in rows], headers=columns, tablefmt="grid"))
+        else:
+            print(f"{Fore.YELLOW}[*] لا توجد دفعات{Style.RESET_ALL}")
+        return True, rows, rows
+        
+    targets = None
+    if args.file:
+        # هدف في كل سطر مع تجاهل الأسطر الفارغة والتعليقات
+        with (contextlib.nullcontext(sys.stdin) if args.file == "-" else open(args.file, 'r')) as source:
+            targets = [line.split('#', 1)[0].strip() for line in source]
+        targets = [target for target in targets if target]
+    name = args.name or (os.path.splitext(os.path.basename(args.file))[0] if args.file and args.file != "-" else "stdin")
+    if not targets and not args.name and not args.file:
+        print(f"{Fore.RED}[!] يجب تحديد ملف الأهداف أو اسم الدفعة المراد استئنافها{Style.RESET_ALL}")
+        return False, None, []
+        
+    if args.scan_type:
+        try:
+            tool.scan_profiles().resolve(args.scan_type)
+        except ValueError as e:
+            print(f"{Fore.RED}[!] {str(e)}{Style.RESET_ALL}")
+            return False, None, []
+            
+    counts = tool.batch_scan(name, targets, scan_type=args.scan_type, engine=args.engine, concurrency=args.concurrency,
+                             subnet_concurrency=args.subnet_concurrency, subnet_interval=args.subnet_interval,
+                             retries=args.retries, backoff=args.backoff)
+    payload = dict(counts, batch=name)
+    return not (counts['failed'] or counts['pending']), payload, [payload]
+
+
+def _cli_history(tool, args):
+    """تنفيذ الأمر history"""
+    since = time.time() - args.days * 86400 if args.days else None
+    
+    # البحث في قاعدة بيانات النتائج
+    if any(v is not None for v in (args.ip, args.port, args.service, args.ssid, args.bssid)):
+        store = tool.get_results_store()
+        if args.ssid or args.bssid:
+            rows = store.query_wifi(ssid=args.ssid, bssid=args.bssid, since=since)
+        elif args.port is not None or args.service:
+            rows = store.query_ports(ip=args.ip, port=args.port, service=args.service, since=since)
+        else:
+            rows = store.query_hosts(ip=args.ip, since=since)
+        if rows:
+            columns = [key for key in rows[0] if key not in ("id", "host_id", "scan_id", "ts")]
+            print_table(([datetime.fromtimestamp(r['ts']).strftime("%Y-%m-%d %H:%M:%S")] + [r[c] for c in columns] for r in rows),
+                        ["الوقت"] + columns, tool.config.get("table_max_rows", 200) or None)
+        else:
+            print(f"{Fore.YELLOW}[*] لا توجد نتائج مطابقة{Style.RESET_ALL}")
+        return True, rows, rows
+        
+    # أحداث سجل النشاط (يستخدم الفهرس الجانبي لتخطي الأجزاء خارج الفترة أو الأنواع المطلوبة)
+    if args.since is not None:
+        since = args.since if since is None else max(since, args.since)
+    records = tool.logger.query(since=since, until=args.until, events=args.event)
+    
+    if args.count:
+        counts = {}
+        for record in records:
+            event = record.get('event', "message")
+            counts[event] = counts.get(event, 0) + 1
+        print(tabulate(sorted(counts.items()), headers=["الحدث", "العدد"], tablefmt="grid"))
+        return True, counts, [{'event': k, 'count': v} for k, v in sorted(counts.items())]
+        
+    events = list(deque(records, maxlen=args.lines))
+    for record in events:
+        print(f"[{record.get('time', '')}] {record.get('event', '')}: {record.get('message', '')}")
+    return True, events, events
+
+
+def _cli_config(tool, args):
+    """تنفيذ الأمر config"""
+    if args.config_command == "get":
+        if args.key not in tool.config:
+            print(f"{Fore.RED}[!] الإعداد '{args.key}' غير موجود{Style.RESET_ALL}")
+            return False, None, []
+        print(json.dumps(tool.config[args.key], ensure_ascii=False))
+        return True, {args.key: tool.config[args.key]}, [{args.key: tool.config[args.key]}]
+        
+    if args.config_command == "profiles":
+        profiles = tool.scan_profiles()
+        rows = []
+        for name in profiles.names():
+            try:
+                profile = profiles.resolve(name)
+                rows.append({'name': name, 'base': profile['base'], 'auto_tune': profile['auto_tune'],
+                             'args': " ".join(profile['args']), 'error': None})
+            except ValueError as e:
+                rows.append({'name': name, 'base': None, 'auto_tune': None, 'args': None, 'error': str(e)})
+        print(tabulate([[r['name'], r['base'] or "-", "نعم" if r['auto_tune'] else "-", r['args'] or r['error']] for r in rows],
+                       headers=["الملف", "الأساس", "ضبط تلقائي", "خيارات nmap"], tablefmt="grid"))
+        return not any(r['error'] for r in rows), rows, rows
+        
+    if args.config_command == "set":
+        try:
+            value = json.loads(args.value)
+        except ValueError:
+            value = args.value
+        if args.key == "scan_profiles":
+            # رفض ملفات المسح غير الصالحة قبل حفظها
+            errors = ScanProfiles(AhmadToolkit.SCAN_OPTIONS, value if isinstance(value, dict) else None).validate_all()
+            if not isinstance(value, dict):
+                errors.insert(0, "scan_profiles يجب أن يكون كائن JSON")
+            if errors:
+                for error in errors:
+                    print(f"{Fore.RED}[!] {error}{Style.RESET_ALL}")
+                return False, {'errors': errors}, [{'error': e} for e in errors]
+        tool.config[args.key] = value
+        tool.save_config()
+        return True, {args.key: value}, [{args.key: value}]
+        
+    print(json.dumps(tool.config, indent=4, ensure_ascii=False))
+    return True, tool.config, [tool.config]
+
+
+def _print_metrics(summary):
+    """عرض ملخص المقاييس في جداول (الأزمنة ثم العدادات)"""
+    def series(item):
+        labels = ",".join(f"{key}={value}" for key, value in item['labels'].items())
+        return f"{item['name']}{{{labels}}}" if labels else item['name']
+
+    if summary['timings']:
+        print(tabulate([[series(t), t['count'], f"{t['sum']:.3f}s", f"{t['max']:.3f}s"] for t in summary['timings']],
+                       headers=["المرحلة", "العدد", "المجموع", "الأقصى"], tablefmt="simple"))
+    if summary['counters']:
+        print(tabulate([[series(c), c['value']] for c in summary['counters']], headers=["العداد", "القيمة"], tablefmt="simple"))
+
+
+def _json_default(value):
+    """تحويل كائنات النتائج إلى JSON (الحاويات المضغوطة كقوائم وباقي الكائنات كنصوص)"""
+    if isinstance(value, Sequence):
+        return list(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
+def main(argv=None):
+    """نقطة الدخول لسطر الأوامر"""
+    args = build_arg_parser().parse_args(argv)
+    machine = args.json or args.ndjson
+    
+    # في وضع الإخراج الآلي تذهب الرسائل النصية إلى stderr بدون ألوان ويبقى stdout للنتائج فقط
+    if machine or args.quiet or args.no_color:
+        init(strip=True)
+    result_out = sys.stdout
+    if args.quiet:
+        message_out = open(os.devnull, 'w')
+    else:
+        message_out = sys.stderr if machine else sys.stdout
+        
+    with contextlib.redirect_stdout(message_out):
+        tool = AhmadToolkit()
+        tool.interactive = sys.stdin.isatty() and not machine
+        tool.fast_start = tool.fast_start or args.fast_start or machine
+        assume_yes = args.yes or not tool.interactive
+        metrics_file = args.metrics_file or tool.config.get("metrics_file")
+        if args.metrics or metrics_file:
+            metrics.enabled = True
+        
+        if not (machine or args.quiet or args.no_banner):
+            tool.print_banner()
+            
+        if args.command is None:
+            # الوضع التفاعلي الأصلي
+            tool.check_root()
+            tool.check_dependencies()
+            return 0
+            
+        if args.command == "scan":
+            tool.check_root(assume_yes)
+            ok, payload, records = _cli_scan(tool, args)
+        elif args.command == "wifi":
+            tool.check_root(assume_yes)
+            if args.monitor:
+                summary = tool.wireless_monitor(interface=args.interface, interval=args.interval, duration=args.duration)
+                ok, payload, records = summary is not None, summary, (summary or {}).get('networks', [])
+            else:
+                networks = tool.wireless_scan(interface=args.interface)
+                ok, payload, records = networks is not None, networks, networks or []
+        elif args.command == "install":
+            results = tool.install_tools(args.tool, assume_yes=assume_yes)
+            ok, payload, records = bool(results) and all(results.values()), results, [{'tool': k, 'installed': v} for k, v in results.items()]
+        elif args.command == "batch":
+            if args.batch_command == "run":
+                tool.check_root(assume_yes)
+            ok, payload, records = _cli_batch(tool, args)
+        elif args.command == "deps":
+            auto_install = args.install_missing
+            if auto_install is None and not tool.interactive:
+                auto_install = False
+            missing = tool.check_dependencies(auto_install)
+            ok, payload, records = True, missing, [missing]
+        elif args.command == "history":
+            ok, payload, records = _cli_history(tool, args)
+        elif args.command == "daemon":
+            tool.check_root(assume_yes)
+            daemon = ToolkitDaemon(tool, host=args.host or tool.config.get("daemon_host", "127.0.0.1"),
+                                   port=args.port if args.port is not None else tool.config.get("daemon_port", 8765),
+                                   workers=args.workers or tool.config.get("daemon_workers", 4),
+                                   token=args.token or tool.config.get("daemon_token"),
+                                   max_jobs=tool.config.get("daemon_max_jobs", 1000), metrics_file=metrics_file)
+            jobs = daemon.serve()
+            ok, payload, records = True, {'jobs': jobs}, [{'jobs': jobs}]
+        elif args.command == "export":
+            rows = tool.export_results(args.xml_files, args.output, args.export_format)
+            ok, payload = rows is not None, {'output': args.output, 'rows': rows}
+            records = [payload]
+        else:
+            ok, payload, records = _cli_config(tool, args)
+            
+        if metrics_file:
+            try:
+                metrics.write(metrics_file)
+            except OSError as e:
+                print(f"{Fore.YELLOW}[!] تعذر كتابة ملف المقاييس: {str(e)}{Style.RESET_ALL}")
+        if args.metrics and not machine:
+            _print_metrics(metrics.summary())
+            
+    if args.json:
+        document = {'command': args.command, 'ok': ok, 'result': payload}
+        if metrics.enabled:
+            # ملخص مقاييس هذا التشغيل
+            document['metrics'] = metrics.summary()
+        json.dump(document, result_out, ensure_ascii=False, default=_json_default)
+        result_out.write("\n")
+    elif args.ndjson:
+        for record in records:
+            result_out.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""اختبار الاستعلام في سجل النشاط (ActivityLogger.query) عبر أجزاء مدورة ومضغوطة"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from test_scan_engine import load_toolkit
+
+
+class ActivityLogQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+        self.directory = tempfile.mkdtemp()
+        self.logger = self.toolkit.ActivityLogger(os.path.join(self.directory, "activity.jsonl"), max_bytes=0,
+                                                  compress=True, flush_interval=0)
+        # ثلاثة أجزاء: جزءان مدوران مضغوطان (1000 و 2000) والملف الحالي (3000) بدفعتين
+        for start, rotate in ((1000, True), (2000, True), (3000, False)):
+            self.write(start, ["scan_started", "scan_finished"] * 2 + ["scan_started"])
+            if rotate:
+                self.logger.rotate()
+        self.write(3100, ["wifi_scan"])
+
+    def tearDown(self):
+        self.logger.close()
+        shutil.rmtree(self.directory)
+
+    def write(self, start, events):
+        """كتابة أحداث بأوقات start و start+1 ... كدفعة واحدة في الفهرس"""
+        for offset, event in enumerate(events):
+            with mock.patch.object(self.toolkit.time, "time", return_value=start + offset):
+                self.logger.log(event, n=offset)
+        self.logger.flush()
+
+    def timestamps(self, **query):
+        return [record['ts'] for record in self.logger.query(**query)]
+
+    def test_segments_are_rotated_and_compressed(self):
+        segments = [os.path.basename(path) for path, _ in self.logger.segments()]
+        self.assertEqual(segments, ["activity.jsonl.2.gz", "activity.jsonl.1.gz", "activity.jsonl"])
+        for path, index_path in self.logger.segments():
+            self.assertTrue(os.path.exists(index_path), index_path)
+
+    def test_all_events_in_order(self):
+        self.assertEqual(self.timestamps(), [1000, 1001, 1002, 1003, 1004, 2000, 2001, 2002, 2003, 2004,
+                                             3000, 3001, 3002, 3003, 3004, 3100])
+
+    def test_time_filter(self):
+        # until غير شامل، والفترة تعبر حد الجزء المضغوط والملف الحالي
+        self.assertEqual(self.timestamps(since=2000, until=3000), [2000, 2001, 2002, 2003, 2004])
+        self.assertEqual(self.timestamps(since=1003, until=2001), [1003, 1004, 2000])
+        self.assertEqual(self.timestamps(since=2004.5, until=3001), [3000])
+        self.assertEqual(self.timestamps(since=5000), [])
+
+    def test_event_filter(self):
+        self.assertEqual(self.timestamps(events=["wifi_scan"]), [3100])
+        self.assertEqual(len(self.timestamps(events=["scan_finished"])), 6)
+        self.assertEqual(len(self.timestamps(events=["scan_started", "wifi_scan"])), 10)
+        self.assertEqual(self.timestamps(events=["install"]), [])
+
+    def test_time_and_event_filter(self):
+        records = list(self.logger.query(since=1002, until=3002, events=["scan_finished"]))
+        self.assertEqual([record['ts'] for record in records], [1003, 2001, 2003, 3001])
+        self.assertTrue(all(record['event'] == "scan_finished" for record in records))
+        self.assertEqual([record['n'] for record in records], [3, 1, 3, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""اختبار الصيغة العمودية (.ptcol): كتابة الأعمدة وقراءتها مرة أخرى بدون تغيير القيم"""
+
+import os
+import tempfile
+import unittest
+
+from test_scan_engine import load_toolkit
+
+
+class ColumnarRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+        handle, self.path = tempfile.mkstemp(suffix=".ptcol")
+        os.close(handle)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_values_with_nul_and_empty_strings(self):
+        rows = [("a\x00b", 1), (None, None), ("", 2), ("شبكة\x00", 3), ("a\x00b", 4), ("x", 5)]
+        with open(self.path, 'wb') as f:
+            writer = self.toolkit.ColumnarWriter(f, [("name", "str"), ("port", "int")], group_size=4)
+            for row in rows:
+                writer.write(row)
+            writer.close()
+
+        columns = self.toolkit.read_columnar(self.path)
+        self.assertEqual(columns["name"], [name for name, _ in rows])
+        self.assertEqual(columns["port"], [port for _, port in rows])
+
+
+if __name__ == "__main__":
+    unittest.main()
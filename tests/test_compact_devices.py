@@ -0,0 +1,37 @@
+"""اختبار الحاوية المضغوطة CompactDevices مقابل قائمة القواميس العادية على تقرير nmap اصطناعي"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from test_scan_engine import load_toolkit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from generators import nmap_xml
+
+
+class CompactDevicesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+        handle, self.path = tempfile.mkstemp(suffix=".xml")
+        os.close(handle)
+        # 50 جهاز: بعضها بعنوان MAC أو اسم، ومنافذ مفتوحة ومغلقة بخدمات مختلفة
+        nmap_xml(self.path, 50, ports_per_host=6, open_ratio=0.5, seed=7)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_matches_plain_device_dicts(self):
+        devices = self.toolkit.CompactDevices.from_xml(self.path)
+        expected = [self.toolkit.nmap_host_to_device(record) for record in self.toolkit.iter_nmap_hosts(self.path)]
+
+        self.assertEqual(list(devices), expected)
+        self.assertEqual(len(devices), 50)
+        self.assertEqual(devices[-1], expected[-1])
+        self.assertEqual(devices[10:13], expected[10:13])
+
+
+if __name__ == "__main__":
+    unittest.main()
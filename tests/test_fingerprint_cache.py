@@ -0,0 +1,90 @@
+"""اختبار ذاكرة بصمات الخدمات (FingerprintCache): انتهاء الصلاحية وتغير الشعار وحذف الأقدم استخداماً"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from test_scan_engine import load_toolkit
+
+
+def entry(ip, port, banner_hash, protocol="tcp", service="ssh"):
+    return {'ip': ip, 'port': port, 'protocol': protocol, 'banner_hash': banner_hash, 'service': service,
+            'product': "OpenSSH", 'version': "9.6", 'cpe': ["cpe:/a:openbsd:openssh:9.6"]}
+
+
+class FingerprintCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+        self.directory = tempfile.mkdtemp()
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        shutil.rmtree(self.directory)
+
+    def cache(self, **options):
+        cache = self.toolkit.FingerprintCache(os.path.join(self.directory, f"fingerprints{len(self.caches)}.db"), **options)
+        self.caches.append(cache)
+        return cache
+
+    def at(self, now):
+        """تثبيت الوقت الذي تراه الذاكرة"""
+        return mock.patch.object(self.toolkit.time, "time", return_value=now)
+
+    def test_hit_until_ttl_expires(self):
+        cache = self.cache(ttl=100)
+        with self.at(1000):
+            cache.store([entry("10.0.0.1", 22, "aa")])
+        endpoint = ("10.0.0.1", 22, "tcp")
+        with self.at(1099):
+            hits, misses = cache.lookup([endpoint], {("10.0.0.1", 22): "aa"})
+        self.assertEqual(misses, [])
+        self.assertEqual(hits[endpoint]['service'], "ssh")
+        self.assertEqual(hits[endpoint]['version'], "9.6")
+        with self.at(1100):
+            hits, misses = cache.lookup([endpoint], {("10.0.0.1", 22): "aa"})
+        self.assertEqual((hits, misses), ({}, [endpoint]))
+
+    def test_banner_hash_mismatch_is_a_miss(self):
+        cache = self.cache(ttl=100)
+        with self.at(1000):
+            cache.store([entry("10.0.0.1", 22, "aa"), entry("10.0.0.1", 161, None, protocol="udp", service="snmp")])
+        tcp, udp = ("10.0.0.1", 22, "tcp"), ("10.0.0.1", 161, "udp")
+        with self.at(1010):
+            # شعار متغير أو تعذر قراءته (None) يعني إعادة الفحص، وUDP لا يعتمد على الشعار
+            self.assertEqual(cache.lookup([tcp, udp], {("10.0.0.1", 22): "bb"}), (mock.ANY, [tcp]))
+            self.assertEqual(cache.lookup([tcp], {("10.0.0.1", 22): None})[1], [tcp])
+            self.assertEqual(cache.lookup([tcp], {})[1], [tcp])
+            hits, misses = cache.lookup([tcp, udp], {("10.0.0.1", 22): "aa"})
+        self.assertEqual(sorted(hits), [tcp, udp])
+        self.assertEqual(misses, [])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.cache(ttl=10000, max_entries=3)
+        banners = {(f"10.0.0.{i}", 22): "aa" for i in range(1, 6)}
+        for i in (1, 2, 3):
+            with self.at(1000 + i):
+                cache.store([entry(f"10.0.0.{i}", 22, "aa")])
+        # استخدام الأول يجعله الأحدث، فيُحذف الثاني بدلاً منه عند الإضافة
+        with self.at(1010):
+            cache.lookup([("10.0.0.1", 22, "tcp")], banners)
+        with self.at(1020):
+            cache.store([entry("10.0.0.4", 22, "aa")])
+        self.assertEqual(len(cache), 3)
+        with self.at(1030):
+            hits, misses = cache.lookup([(f"10.0.0.{i}", 22, "tcp") for i in range(1, 5)], banners)
+        self.assertEqual(sorted(ip for ip, _, _ in hits), ["10.0.0.1", "10.0.0.3", "10.0.0.4"])
+        self.assertEqual(misses, [("10.0.0.2", 22, "tcp")])
+
+        # إضافة دفعة أكبر من الحد تبقي أحدث max_entries فقط
+        with self.at(1040):
+            cache.store([entry(f"10.0.1.{i}", 22, "aa") for i in range(5)])
+        self.assertEqual(len(cache), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""اختبار محرك المسح المدمج (AsyncScanEngine) على منافذ استماع محلية على واجهة loopback"""
+
+import importlib.util
+import os
+import socket
+import sys
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "py-toolkit.py")
+
+
+def load_toolkit():
+    """تحميل py-toolkit.py كوحدة بايثون (اسم الملف يحتوي على شرطة فلا يمكن استيراده مباشرة)"""
+    if "py_toolkit" in sys.modules:
+        return sys.modules["py_toolkit"]
+    spec = importlib.util.spec_from_file_location("py_toolkit", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["py_toolkit"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def listen(family, host):
+    """منفذ استماع على منفذ عشوائي (الاتصال ينجح من قائمة الانتظار بدون accept)"""
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.bind((host, 0))
+    sock.listen(16)
+    return sock
+
+
+class AsyncScanEngineLoopbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+        self.sockets = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+
+    def test_mixed_ipv4_ipv6_targets(self):
+        if not socket.has_ipv6:
+            self.skipTest("IPv6 غير متاح")
+        try:
+            v6 = listen(socket.AF_INET6, "::1")
+        except OSError:
+            self.skipTest("لا يمكن الاستماع على ::1")
+        v4 = listen(socket.AF_INET, "127.0.0.1")
+        self.sockets += [v4, v6]
+        ports = sorted({v4.getsockname()[1], v6.getsockname()[1]})
+
+        engine = self.toolkit.AsyncScanEngine(concurrency=32, timeout=1.0, retries=0)
+        devices = engine.scan("::1 127.0.0.1", ports)
+
+        # IPv4 قبل IPv6 بدون خطأ مقارنة بين العائلتين
+        self.assertEqual([device['ip'] for device in devices], ["127.0.0.1", "::1"])
+        open_ports = {device['ip']: {int(port['port']) for port in device['open_ports']} for device in devices}
+        self.assertIn(v4.getsockname()[1], open_ports["127.0.0.1"])
+        self.assertIn(v6.getsockname()[1], open_ports["::1"])
+
+    def test_link_local_targets_keep_scope(self):
+        # أهداف الجيران من interface_targets تحمل %iface وبدونه يفشل الاتصال بعنوان link-local
+        addresses = list(self.toolkit.iter_target_addresses("fe80::%eth0/126 fe80::5%eth0 10.0.0.1"))
+        self.assertEqual([str(address) for address in addresses],
+                         ["fe80::1%eth0", "fe80::2%eth0", "fe80::3%eth0", "fe80::5%eth0", "10.0.0.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
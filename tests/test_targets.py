@@ -0,0 +1,25 @@
+"""اختبار التحقق من أهداف المسح قبل تمريرها إلى nmap"""
+
+import unittest
+
+from test_scan_engine import load_toolkit
+
+
+class ValidateScanTargetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+
+    def test_accepts_nmap_target_forms(self):
+        for target in ("10.0.0.0/24", "192.168.1.10-50", "192.168.0-255.1-254", "10.0.*.1", "scanme.nmap.org",
+                       "fe80::1%eth0", "2001:db8::/32", "::1 127.0.0.1", "10.0.0.1,5"):
+            self.toolkit.validate_scan_target(target)
+
+    def test_rejects_options_and_odd_characters(self):
+        for target in ("-oN /tmp/out", "10.0.0.1 --script=x", "10.0.0.1,-iL", "host;id", "$(id)", "host/x"):
+            with self.assertRaises(self.toolkit.TargetError):
+                self.toolkit.validate_scan_target(target)
+
+
+if __name__ == "__main__":
+    unittest.main()
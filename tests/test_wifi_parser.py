@@ -0,0 +1,68 @@
+"""اختبار تحليل مخرجات iwlist و iw المسجلة في benchmarks/corpus (حقل بحقل لكل شبكة)"""
+
+import os
+import unittest
+
+from test_scan_engine import load_toolkit
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus")
+
+ENCRYPTED = "مشفرة"
+OPEN = "غير مشفرة"
+
+FIELDS = ("ssid", "bssid", "channel", "frequency", "quality", "signal", "encryption", "security")
+
+# القيم المتوقعة لكل ملف بترتيب الحقول في FIELDS
+EXPECTED = {
+    "iwlist_home.txt": [
+        ("HomeNet", "3C:84:6A:1F:22:B0", 6, 2.437, 0.971, -42, ENCRYPTED, "WPA2"),
+        ("HomeNet_5G", "3C:84:6A:1F:22:B4", 44, 5.22, 0.786, -55, ENCRYPTED, "WPA2"),
+        # WPA و WPA2 معاً تُعرض WPA2
+        ("NETGEAR-Guest", "F4:F2:6D:90:11:0C", 1, 2.412, 0.443, -79, ENCRYPTED, "WPA2"),
+        ("CoffeeShop Free WiFi", "00:1A:2B:3C:4D:5E", 11, 2.462, 0.343, -86, OPEN, None),
+        # شبكة مخفية (ESSID فارغ)
+        ("", "A0:63:91:7E:00:21", 6, 2.437, 0.571, -70, ENCRYPTED, "WPA2"),
+    ],
+    # برامج التشغيل القديمة تكتب Quality:52/100 و Signal level:-61 (بنقطتين) أو الإشارة في سطر منفصل
+    "iwlist_legacy_driver.txt": [
+        ("linksys", "00:0F:66:A1:B2:C3", 3, 2.422, 0.52, -61, ENCRYPTED, None),
+        ("old-ap-wep", "00:0F:66:A1:B2:C9", 9, 2.452, 0.2, -90, ENCRYPTED, None),
+    ],
+    # iw لا يعطي الجودة، والقناة من DS Parameter set أو primary channel
+    "iw_scan.txt": [
+        ("HomeNet", "3C:84:6A:1F:22:B0", 6, 2.437, None, -42, ENCRYPTED, "WPA2"),
+        ("HomeNet_5G", "3C:84:6A:1F:22:B4", 44, 5.22, None, -55, ENCRYPTED, "WPA2"),
+        ("CoffeeShop Free WiFi", "00:1A:2B:3C:4D:5E", 11, 2.462, None, -86, OPEN, None),
+        ("NETGEAR-Guest", "F4:F2:6D:90:11:0C", 1, 2.412, None, -79, ENCRYPTED, "WPA2"),
+    ],
+}
+
+
+class WifiCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toolkit = load_toolkit()
+
+    def parse(self, name):
+        parser = self.toolkit.iter_iw_cells if name.startswith("iw_") else self.toolkit.iter_iwlist_cells
+        with open(os.path.join(CORPUS, name)) as f:
+            streamed = list(parser(f))
+        with open(os.path.join(CORPUS, name)) as f:
+            text = f.read()
+        # القراءة من أنبوب أو من نص كامل تعطي نفس النتيجة
+        self.assertEqual(streamed, list(parser(text)))
+        return streamed
+
+    def test_corpus_fields(self):
+        for name, expected in EXPECTED.items():
+            with self.subTest(name=name):
+                networks = self.parse(name)
+                self.assertEqual([tuple(network[field] for field in FIELDS) for network in networks], expected)
+
+    def test_every_corpus_file_is_covered(self):
+        files = sorted(name for name in os.listdir(CORPUS) if name.endswith(".txt"))
+        self.assertEqual(files, sorted(EXPECTED))
+
+
+if __name__ == "__main__":
+    unittest.main()